@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""Замеры производительности Video Downloader (см. benchmarks/run.py)"""
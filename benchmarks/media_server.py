@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Локальный медиасервер для замеров Video Downloader
+
+Отдаёт синтетические файлы без обращения к сети:
+    /progressive/<байт>/<id>.mp4              - обычный файл (поддерживает Range)
+    /hls/<сегментов>x<байт>/<id>.m3u8         - плейлист HLS и сегменты <id>/seg<N>.ts
+    /dash/<сегментов>x<байт>/<id>.mpd         - манифест DASH, <id>/init.mp4 и <id>/seg<N>.m4s
+
+<id> становится названием видео, поэтому URL и файлы не совпадают (кэш
+информации, проверка повторов, общая папка). Содержимое - псевдослучайные
+байты: yt-dlp не разбирает их, пока не нужен ffmpeg.
+"""
+
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Блок данных, из которого нарезается содержимое файлов
+BLOCK_SIZE = 1024 * 1024
+
+# Размер одной записи в сокет
+CHUNK_SIZE = 64 * 1024
+
+# Длительность одного сегмента HLS/DASH (сек)
+SEGMENT_SECONDS = 2
+
+ROUTES = [
+    ('progressive', re.compile(r'^/progressive/(\d+)/[\w-]+\.mp4$')),
+    ('hls_playlist', re.compile(r'^/hls/(\d+)x(\d+)/([\w-]+)\.m3u8$')),
+    ('hls_segment', re.compile(r'^/hls/(\d+)x(\d+)/[\w-]+/seg(\d+)\.ts$')),
+    ('dash_manifest', re.compile(r'^/dash/(\d+)x(\d+)/([\w-]+)\.mpd$')),
+    ('dash_segment', re.compile(r'^/dash/(\d+)x(\d+)/[\w-]+/(?:init|seg\d+)\.(?:mp4|m4s)$')),
+]
+
+
+def media_url(base_url, kind, name, size, segments=0):
+    """
+    URL синтетического файла на сервере base_url
+
+    Args:
+        kind: 'progressive', 'hls' или 'dash'
+        name: уникальная часть URL
+        size: размер файла (progressive) или одного сегмента (байт)
+        segments: число сегментов HLS/DASH
+    """
+    if kind == 'progressive':
+        return f'{base_url}/progressive/{size}/{name}.mp4'
+    if kind == 'hls':
+        return f'{base_url}/hls/{segments}x{size}/{name}.m3u8'
+    if kind == 'dash':
+        return f'{base_url}/dash/{segments}x{size}/{name}.mpd'
+    raise ValueError(f"Неизвестный вид файла: {kind}")
+
+
+def hls_playlist(name, segments):
+    """Плейлист HLS (VOD) из segments сегментов"""
+    lines = ['#EXTM3U', '#EXT-X-VERSION:3', f'#EXT-X-TARGETDURATION:{SEGMENT_SECONDS}',
+             '#EXT-X-MEDIA-SEQUENCE:0', '#EXT-X-PLAYLIST-TYPE:VOD']
+    for index in range(segments):
+        lines += [f'#EXTINF:{SEGMENT_SECONDS}.0,', f'{name}/seg{index}.ts']
+    lines.append('#EXT-X-ENDLIST')
+    return '\n'.join(lines) + '\n'
+
+
+def dash_manifest(name, segments):
+    """Манифест DASH с одним представлением (видео и звук вместе), чтобы не требовался ffmpeg"""
+    duration = segments * SEGMENT_SECONDS
+    urls = '\n'.join(f'          <SegmentURL media="{name}/seg{index}.m4s"/>' for index in range(segments))
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{duration}S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" segmentAlignment="true">
+      <Representation id="main" bandwidth="2000000" codecs="avc1.4d401f,mp4a.40.2" width="1280" height="720">
+        <SegmentList timescale="1" duration="{SEGMENT_SECONDS}">
+          <Initialization sourceURL="{name}/init.mp4"/>
+{urls}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+'''
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    """Обработчик запросов медиасервера"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.handle_request(send_body=False)
+
+    def do_GET(self):
+        self.handle_request(send_body=True)
+
+    def handle_request(self, send_body):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        server.count_request()
+
+        path = self.path.split('?', 1)[0]
+        for route, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            self.send_error(404)
+            return
+
+        if route == 'progressive':
+            self.send_payload(int(match.group(1)), 'video/mp4', send_body, ranges=True)
+        elif route == 'hls_playlist':
+            self.send_text(hls_playlist(match.group(3), int(match.group(1))),
+                           'application/vnd.apple.mpegurl', send_body)
+        elif route == 'hls_segment':
+            self.send_payload(int(match.group(2)), 'video/mp2t', send_body)
+        elif route == 'dash_manifest':
+            self.send_text(dash_manifest(match.group(3), int(match.group(1))), 'application/dash+xml', send_body)
+        else:
+            self.send_payload(int(match.group(2)), 'video/mp4', send_body)
+
+    def send_text(self, text, content_type, send_body):
+        body = text.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def send_payload(self, size, content_type, send_body, ranges=False):
+        start, end = 0, size - 1
+        header = self.headers.get('Range')
+        match = re.match(r'bytes=(\d*)-(\d*)$', header or '') if ranges else None
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(end, int(match.group(2))) if match.group(2) else end
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        if ranges:
+            self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        if not send_body:
+            return
+
+        block = self.server.block
+        position = start
+        try:
+            while position <= end:
+                offset = position % len(block)
+                length = min(CHUNK_SIZE, end - position + 1, len(block) - offset)
+                self.wfile.write(block[offset:offset + length])
+                position += length
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        self.server.count_bytes(position - start)
+
+
+class MediaServer(ThreadingHTTPServer):
+    """
+    Медиасервер на 127.0.0.1 в фоновом потоке
+
+    Используется как контекстный менеджер:
+        with MediaServer(latency=0.02) as server:
+            url = media_url(server.base_url, 'progressive', 'clip1', 10 * 1024 * 1024)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, port=0, latency=0.0, seed=0):
+        """
+        Args:
+            port: порт (0 - любой свободный)
+            latency: задержка перед ответом на каждый запрос (сек), имитирует сеть
+            seed: начальное значение генератора содержимого
+        """
+        super().__init__(('127.0.0.1', port), MediaHandler)
+        self.latency = latency
+        self.block = memoryview(random.Random(seed).getrandbits(BLOCK_SIZE * 8).to_bytes(BLOCK_SIZE, 'little'))
+        self.requests = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def count_bytes(self, amount):
+        with self._lock:
+            self.bytes_sent += amount
+
+    def start(self):
+        """Запустить сервер в фоновом потоке"""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Остановить сервер"""
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Замеры производительности Video Downloader
+
+Запуск из корня проекта (сеть не нужна):
+    python -m benchmarks.run                         - все сценарии
+    python -m benchmarks.run --quick                 - уменьшенные объёмы
+    python -m benchmarks.run --only history,progress --label 3.2.0
+    python -m benchmarks.run --compare benchmarks/results/<файл>.json
+
+Каждый сценарий выполняется в отдельном процессе (свои CPU и пиковая
+память); медиасервер работает в этом процессе. Результаты сохраняются
+в benchmarks/results/<дата>_<метка>.json и сравниваются с прошлым
+файлом: ухудшение больше порога помечается.
+"""
+
+import argparse
+import json
+import multiprocessing
+import platform
+import subprocess
+import sys
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.media_server import MediaServer
+from benchmarks.scenarios import SCENARIOS
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+
+# Объёмы по умолчанию и для --quick
+DEFAULT_OPTIONS = {
+    'jobs': 4,
+    'items': 24,
+    'file_mb': 8,
+    'segments': 30,
+    'segment_kb': 256,
+    'fragments': 4,
+    'latency_ms': 20,
+    'history_rows': 100000,
+    'history_ops': 1000,
+    'queue_items': 20000,
+    'progress_calls': 50000,
+    'convert_seconds': 10,
+    'convert_batch': 0,  # Файлов в пакете (0 - по числу ядер)
+    'encode_seconds': 5,
+}
+QUICK_OPTIONS = dict(DEFAULT_OPTIONS, items=8, file_mb=2, segments=10, history_rows=20000,
+                     history_ops=200, queue_items=5000, progress_calls=10000, convert_seconds=3,
+                     encode_seconds=2)
+
+# Ухудшение, начиная с которого метрика считается регрессией (доля)
+DEFAULT_THRESHOLD = 0.10
+
+# Направление метрик по окончанию имени: True - больше лучше
+METRIC_DIRECTIONS = [
+    ('_per_sec', True),
+    ('_mbps', True),
+    ('_ms', False),
+    ('_us', False),
+    ('_sec', False),
+    ('_mb', False),
+]
+
+
+def run_scenario(name, options):
+    """Выполнить сценарий (в дочернем процессе)"""
+    try:
+        return SCENARIOS[name](options)
+    except Exception as e:
+        return {'error': f"{type(e).__name__}: {e}"}
+
+
+def metric_direction(name):
+    """True - больше лучше, False - меньше лучше, None - не сравнивается"""
+    for suffix, higher_is_better in METRIC_DIRECTIONS:
+        if name.endswith(suffix):
+            return higher_is_better
+    return None
+
+
+def compare(current, previous, threshold=DEFAULT_THRESHOLD):
+    """
+    Сравнить метрики с прошлым запуском
+
+    Returns:
+        список строк отчёта и число регрессий
+    """
+    lines = []
+    regressions = 0
+    for scenario, metrics in current['scenarios'].items():
+        old_metrics = previous.get('scenarios', {}).get(scenario)
+        if not old_metrics:
+            continue
+        for name, value in metrics.items():
+            higher_is_better = metric_direction(name)
+            old = old_metrics.get(name)
+            if higher_is_better is None or not isinstance(value, (int, float)) \
+                    or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old
+            worse = -change if higher_is_better else change
+            mark = ''
+            if worse > threshold:
+                mark = '  ⚠ регрессия'
+                regressions += 1
+            elif -worse > threshold:
+                mark = '  ✓ улучшение'
+            lines.append(f"  {scenario}.{name:<24} {old:>12} → {value:<12} {change:+.1%}{mark}")
+    return lines, regressions
+
+
+def git_revision():
+    """Текущий коммит или None"""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=RESULTS_DIR.parent, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def ytdlp_version():
+    """Версия yt-dlp или None"""
+    try:
+        from yt_dlp.version import __version__
+    except ImportError:
+        return None
+    return __version__
+
+
+def latest_result(exclude=None):
+    """Последний сохранённый файл результатов"""
+    files = sorted(path for path in RESULTS_DIR.glob('*.json') if path != exclude)
+    return files[-1] if files else None
+
+
+def build_parser():
+    """Параметры командной строки"""
+    parser = argparse.ArgumentParser(description="Замеры производительности Video Downloader")
+    parser.add_argument('--only', metavar='NAMES',
+                        help='сценарии через запятую (по умолчанию все)')
+    parser.add_argument('--quick', action='store_true', help='уменьшенные объёмы')
+    parser.add_argument('--jobs', type=int, metavar='N', help='параллельных загрузок')
+    parser.add_argument('--items', type=int, metavar='N', help='видео в сценариях загрузки')
+    parser.add_argument('--latency', type=int, metavar='MS', help='задержка медиасервера на запрос')
+    parser.add_argument('--label', default='', help='метка в имени файла (например, версия)')
+    parser.add_argument('--output', metavar='FILE', help='файл результатов')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='сравнить с этим файлом (по умолчанию - последний в benchmarks/results)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD * 100, metavar='PCT',
+                        help='ухудшение в процентах, считающееся регрессией (по умолчанию 10)')
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help='код выхода 1 при регрессиях')
+    return parser
+
+
+def main(argv=None):
+    """Главная функция"""
+    args = build_parser().parse_args(argv)
+    names = args.only.split(',') if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        print(f"✗ Неизвестные сценарии: {', '.join(unknown)} (есть: {', '.join(SCENARIOS)})")
+        return 2
+
+    options = dict(QUICK_OPTIONS if args.quick else DEFAULT_OPTIONS)
+    for key, value in (('jobs', args.jobs), ('items', args.items), ('latency_ms', args.latency)):
+        if value is not None:
+            options[key] = value
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'label': args.label,
+        'git': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'yt_dlp': ytdlp_version(),
+        'options': options,
+        'scenarios': {},
+    }
+
+    context = multiprocessing.get_context('spawn')
+    with MediaServer(latency=options['latency_ms'] / 1000) as server:
+        scenario_options = dict(options, base_url=server.base_url)
+        for name in names:
+            print(f"▶ {name}...", flush=True)
+            with context.Pool(1) as pool:
+                metrics = pool.apply(run_scenario, (name, scenario_options))
+            results['scenarios'][name] = metrics
+            for key, value in metrics.items():
+                print(f"    {key:<24} {value}")
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    output = Path(args.output) if args.output else \
+        RESULTS_DIR / (f"{stamp}_{args.label}.json" if args.label else f"{stamp}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Результаты: {output}")
+
+    previous_path = Path(args.compare) if args.compare else latest_result(exclude=output.resolve())
+    if not previous_path:
+        return 0
+    with open(previous_path, 'r', encoding='utf-8') as f:
+        previous = json.load(f)
+    lines, regressions = compare(results, previous, args.threshold / 100)
+    print(f"Сравнение с {previous_path} ({previous.get('label') or previous.get('created')}):")
+    print('\n'.join(lines) if lines else "  нет общих метрик")
+    if regressions:
+        print(f"⚠ Регрессий: {regressions}")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,420 @@
+# -*- coding: utf-8 -*-
+"""
+Сценарии замеров Video Downloader
+
+Каждый сценарий - функция (options) -> словарь метрик. Сценарии работают
+с настоящим кодом приложения (engine, storage) и временными файлами;
+сеть заменяет MediaServer, запущенный родительским процессом.
+
+Имена метрик задают направление сравнения (см. run.py):
+    *_per_sec, *_mbps          - больше лучше
+    *_ms, *_us, *_sec, *_mb    - меньше лучше
+"""
+
+import importlib
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from queue import Queue
+
+from benchmarks.media_server import media_url
+from converter import BatchConverter, ConvertJob, benchmark_profiles
+from engine import (DownloadWorkerPool, BandwidthScheduler, ProgressTracker, InfoCache,
+                    YoutubeDLPool)
+from storage import DownloadHistory, PersistentQueue
+
+
+MB = 1024 * 1024
+
+# Слова для синтетических названий в истории
+TITLE_WORDS = ['music', 'live', 'tutorial', 'review', 'trailer', 'podcast', 'news', 'game',
+               'cooking', 'travel', 'concert', 'lecture', 'vlog', 'remix', 'highlights', 'interview']
+
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу (fraction от 0 до 1)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    """Пиковый объём памяти процесса (MB) или None, если узнать нельзя"""
+    try:
+        import resource
+    except ImportError:
+        return _windows_peak_rss_mb()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS - байты
+    return round(peak / MB if sys.platform == 'darwin' else peak / 1024, 1)
+
+
+def _windows_peak_rss_mb():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class ProcessMemoryCounters(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if not ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return None
+        return round(counters.PeakWorkingSetSize / MB, 1)
+    except (AttributeError, OSError):
+        return None
+
+
+class Measurement:
+    """Время, процессорное время и память блока кода"""
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.wall
+        self.cpu = time.process_time() - self.cpu
+
+    def metrics(self):
+        return {'wall_sec': round(self.wall, 3), 'cpu_sec': round(self.cpu, 3),
+                'peak_rss_mb': peak_rss_mb()}
+
+
+def timed_ms(function, *args, **kwargs):
+    """Выполнить функцию и вернуть время в мс"""
+    started = time.perf_counter()
+    function(*args, **kwargs)
+    return (time.perf_counter() - started) * 1000
+
+
+# ============= ЗАГРУЗКИ =============
+
+def run_downloads(urls, options, fragments=1):
+    """
+    Скачать urls через DownloadWorkerPool, как очередь приложения
+
+    Returns:
+        словарь метрик
+    """
+    # Импорт yt-dlp замеряется отдельно, чтобы не попасть в задержку первых видео
+    import_ms = timed_ms(importlib.import_module, 'yt_dlp')
+    workdir = tempfile.mkdtemp(prefix='vd-bench-')
+    try:
+        history = DownloadHistory(os.path.join(workdir, 'history.db'))
+        info_cache = InfoCache(os.path.join(workdir, 'info_cache.db'))
+        ydl_pool = YoutubeDLPool()
+        tracker = ProgressTracker()
+        scheduler = BandwidthScheduler(0, {'default': options['jobs']})
+
+        download_queue = Queue()
+        for url in urls:
+            download_queue.put({
+                'url': url,
+                'quality': 'best',
+                'download_path': workdir,
+                'quiet': True,
+                'fragments': fragments
+            })
+
+        started = {}
+        latencies = []
+        errors = []
+        finished = threading.Event()
+        lock = threading.Lock()
+
+        def on_start(item):
+            with lock:
+                started[id(item)] = time.perf_counter()
+
+        def on_success(item, info):
+            final = tracker.finish(item)
+            history.add_from_info(item, info, final.job_bytes if final else 0)
+            with lock:
+                latencies.append((time.perf_counter() - started[id(item)]) * 1000)
+
+        def on_error(item, error, kind):
+            tracker.finish(item, 'error')
+            with lock:
+                errors.append(f"{item['url']} [{kind}]: {error}")
+
+        pool = DownloadWorkerPool(
+            download_queue,
+            workers=options['jobs'],
+            scheduler=scheduler,
+            info_cache=info_cache,
+            progress_hook=tracker.update,
+            on_start=on_start,
+            on_success=on_success,
+            on_error=on_error,
+            on_finish=lambda completed, failed: finished.set(),
+            ydl_pool=ydl_pool
+        )
+
+        with Measurement() as measurement:
+            pool.start()
+            finished.wait()
+
+        history.close()
+        ydl_pool.close()
+        total_bytes = tracker.session_bytes
+        metrics = {
+            'items': len(urls),
+            'failed': len(errors),
+            'downloaded_mib': round(total_bytes / MB, 1),
+            'throughput_mbps': round(total_bytes / MB / measurement.wall, 2),
+            'items_per_sec': round(len(latencies) / measurement.wall, 2),
+            'latency_p50_ms': round(percentile(latencies, 0.5), 1),
+            'latency_p99_ms': round(percentile(latencies, 0.99), 1),
+            'ydl_created': ydl_pool.created,
+            'ydl_reused': ydl_pool.reused,
+            'ytdlp_import_ms': round(import_ms, 1),
+        }
+        metrics.update(measurement.metrics())
+        if errors:
+            metrics['first_error'] = errors[0]
+        return metrics
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def download_progressive(options):
+    """Обычные файлы (один HTTP-запрос на видео)"""
+    size = options['file_mb'] * MB
+    urls = [media_url(options['base_url'], 'progressive', f'progressive{index}', size)
+            for index in range(options['items'])]
+    return run_downloads(urls, options)
+
+
+def download_hls(options):
+    """HLS: видео из множества сегментов"""
+    urls = [media_url(options['base_url'], 'hls', f'hls{index}', options['segment_kb'] * 1024,
+                      options['segments'])
+            for index in range(options['items'])]
+    return run_downloads(urls, options, options['fragments'])
+
+
+def download_dash(options):
+    """DASH: манифест и сегменты"""
+    urls = [media_url(options['base_url'], 'dash', f'dash{index}', options['segment_kb'] * 1024,
+                      options['segments'])
+            for index in range(options['items'])]
+    return run_downloads(urls, options, options['fragments'])
+
+
+# ============= ИСТОРИЯ =============
+
+def history_db(options):
+    """История загрузок и очередь на большом объёме записей"""
+    workdir = tempfile.mkdtemp(prefix='vd-bench-')
+    try:
+        rows = options['history_rows']
+        rng = random.Random(0)
+        with Measurement() as measurement:
+            history = DownloadHistory(os.path.join(workdir, 'history.db'))
+            conn = history.connect()
+
+            # Заполнение одной транзакцией: так история растёт при импорте
+            seed_started = time.perf_counter()
+            with conn:
+                conn.executemany(
+                    'INSERT INTO downloads (url, title, quality, filename, size, canonical, download_date) '
+                    'VALUES (?, ?, ?, ?, ?, canonical_of(?), datetime(\'now\', ?))',
+                    ((f'https://www.youtube.com/watch?v=b{index:010d}',
+                      ' '.join(rng.choice(TITLE_WORDS) for _ in range(4)) + f' {index}',
+                      rng.choice(['best', '1080', '720', 'audio']),
+                      f'video{index}.mp4', rng.randint(MB, 500 * MB),
+                      f'https://www.youtube.com/watch?v=b{index:010d}',
+                      f'-{rng.randint(0, 365 * 24 * 60)} minutes')
+                     for index in range(rows)))
+            seed_sec = time.perf_counter() - seed_started
+
+            inserts = [timed_ms(history.add_download, f'https://example.com/new{index}',
+                                f'new video {index}', '720', f'new{index}.mp4', MB)
+                       for index in range(options['history_ops'])]
+            pages = [timed_ms(history.get_page, rng.randint(0, rows // 2), sort=rng.choice(['date', 'title', 'size']))
+                     for _ in range(options['history_ops'] // 5)]
+            searches = [timed_ms(history.get_page, 0, search=rng.choice(TITLE_WORDS)[:4])
+                        for _ in range(options['history_ops'] // 5)]
+            count_ms = timed_ms(history.count, 'music')
+            statistics_ms = timed_ms(history.get_statistics)
+            export_ms = timed_ms(history.export, os.path.join(workdir, 'export.csv'))
+
+            # Постановка в очередь большого списка с проверкой повторов и истории
+            queue = PersistentQueue(history)
+            urls = [f'https://www.youtube.com/watch?v=b{index:010d}' for index in range(0, rows, 2)]
+            items = [{'url': url, 'quality': 'best'} for url in urls[:options['queue_items']]]
+            items += [{'url': f'https://youtu.be/q{index:09d}', 'quality': 'best'}
+                      for index in range(options['queue_items'])]
+            add_new_ms = timed_ms(queue.add_new, items)
+            history.close()
+
+        metrics = {
+            'rows': rows,
+            'seed_rows_per_sec': round(rows / seed_sec),
+            'insert_p50_ms': round(percentile(inserts, 0.5), 3),
+            'insert_p99_ms': round(percentile(inserts, 0.99), 3),
+            'page_p50_ms': round(percentile(pages, 0.5), 3),
+            'page_p99_ms': round(percentile(pages, 0.99), 3),
+            'search_p50_ms': round(percentile(searches, 0.5), 3),
+            'search_p99_ms': round(percentile(searches, 0.99), 3),
+            'count_ms': round(count_ms, 3),
+            'statistics_ms': round(statistics_ms, 3),
+            'export_ms': round(export_ms, 1),
+            'queue_add_new_ms': round(add_new_ms, 1),
+        }
+        metrics.update(measurement.metrics())
+        return metrics
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ============= ПРОГРЕСС =============
+
+def progress_events(options):
+    """Хук прогресса: стоимость вызова при нескольких параллельных загрузках"""
+    tracker = ProgressTracker()
+    delivered = {}
+
+    def render(event):
+        # Так интерфейс хранит последнее событие каждой загрузки до отрисовки
+        delivered[event.job_id] = (event.percent, event.speed, event.eta)
+
+    tracker.subscribe(render)
+    calls = options['progress_calls']
+    batch = 1000
+    batch_costs = []
+    lock = threading.Lock()
+
+    def worker(index):
+        item = {'url': f'https://example.com/progress{index}'}
+        total = calls * 1024
+        costs = []
+        for start in range(0, calls, batch):
+            began = time.perf_counter()
+            for step in range(start, min(calls, start + batch)):
+                tracker.update(item, {'status': 'downloading', 'filename': 'video.mp4',
+                                      'downloaded_bytes': step * 1024, 'total_bytes': total,
+                                      'speed': 1024.0 * 1024, 'eta': 10})
+            costs.append((time.perf_counter() - began) * 1e6 / batch)
+        tracker.update(item, {'status': 'finished', 'filename': 'video.mp4', 'total_bytes': total})
+        tracker.finish(item)
+        with lock:
+            batch_costs.extend(costs)
+
+    threads = [threading.Thread(target=worker, args=(index,)) for index in range(options['jobs'])]
+    with Measurement() as measurement:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    metrics = {
+        'calls': calls * len(threads),
+        'updates_per_sec': round(calls * len(threads) / measurement.wall),
+        'call_p50_us': round(percentile(batch_costs, 0.5), 3),
+        'call_p99_us': round(percentile(batch_costs, 0.99), 3),
+    }
+    metrics.update(measurement.metrics())
+    return metrics
+
+
+# ============= КОНВЕРТАЦИЯ =============
+
+def run_conversions(paths, output_format, quality, workers=0):
+    """Сконвертировать файлы через BatchConverter, как вкладка конвертера; возвращает задачи"""
+    finished = threading.Event()
+    converter = BatchConverter(workers, on_finish=lambda done, failed: finished.set())
+    jobs = [converter.add(ConvertJob(path, output_format, quality)) for path in paths]
+    converter.start()
+    finished.wait()
+    return jobs
+
+
+def convert(options):
+    """Конвертация ffmpeg через BatchConverter: один файл и пакет на все ядра"""
+    if not shutil.which('ffmpeg'):
+        return {'skipped': 'ffmpeg не найден'}
+
+    workdir = tempfile.mkdtemp(prefix='vd-bench-')
+    try:
+        source = os.path.join(workdir, 'source.mp4')
+        duration = options['convert_seconds']
+        subprocess.run(['ffmpeg', '-y', '-v', 'error',
+                        '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={duration}',
+                        '-f', 'lavfi', '-i', f'sine=frequency=440:duration={duration}',
+                        '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-shortest', source],
+                       check=True, capture_output=True)
+
+        metrics = {'source_sec': duration}
+        with Measurement() as measurement:
+            for name, output_format, quality in (('remux', 'mkv', 'Оригинальное'), ('scale_480', 'mp4', '480p')):
+                job, = run_conversions([source], output_format, quality)
+                if job.status != 'done':
+                    return {'error': f"{name}: {job.error}"}
+                metrics[f'{name}_ms'] = round(job.elapsed * 1000, 1)
+                metrics[f'{name}_speed_per_sec'] = round(duration / job.elapsed, 2)
+
+            # Пакет: по файлу на ядро, все сразу
+            copies = []
+            for index in range(options['convert_batch'] or os.cpu_count() or 1):
+                copy = os.path.join(workdir, f'batch{index}.mp4')
+                shutil.copyfile(source, copy)
+                copies.append(copy)
+            started = time.perf_counter()
+            jobs = run_conversions(copies, 'mp4', '480p')
+            batch_sec = time.perf_counter() - started
+            elapsed = [job.elapsed * 1000 for job in jobs]
+            metrics.update({
+                'batch_files': len(jobs),
+                'batch_failed': sum(job.status != 'done' for job in jobs),
+                'batch_files_per_sec': round(len(jobs) / batch_sec, 3),
+                'batch_job_p50_ms': round(percentile(elapsed, 0.5), 1),
+                'batch_job_p99_ms': round(percentile(elapsed, 0.99), 1),
+            })
+        metrics.update(measurement.metrics())
+        return metrics
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def encode_profiles(options):
+    """Скорость кодирования и битрейт каждого профиля конвертера"""
+    if not shutil.which('ffmpeg'):
+        return {'skipped': 'ffmpeg не найден'}
+
+    metrics = {}
+    for result in benchmark_profiles(options['encode_seconds']):
+        name = f"{result['profile']}_{result['encoder'].replace('-', '_')}"
+        if result['error']:
+            metrics[f'{name}_error'] = result['error']
+        else:
+            metrics[f'{name}_frames_per_sec'] = result['fps']
+            metrics[f'{name}_kbps'] = result['kbps']
+    return metrics
+
+
+SCENARIOS = {
+    'download_progressive': download_progressive,
+    'download_hls': download_hls,
+    'download_dash': download_dash,
+    'history': history_db,
+    'progress': progress_events,
+    'convert': convert,
+    'encode_profiles': encode_profiles,
+}
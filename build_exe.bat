@@ -24,6 +24,14 @@ REM Собираем в ПАПКУ (более стабильно чем --onefi
 python -m PyInstaller --windowed ^
     --name "VideoDownloader" ^
     --add-data "themes.py;." ^
+    --add-data "engine.py;." ^
+    --add-data "thumbnails.py;." ^
+    --add-data "storage.py;." ^
+    --add-data "gui.py;." ^
+    --add-data "cli.py;." ^
+    --add-data "converter.py;." ^
+    --add-data "postprocess.py;." ^
+    --add-data "defaults.py;." ^
     --hidden-import=tkinterdnd2 ^
     --hidden-import=PIL ^
     --hidden-import=PIL.Image ^
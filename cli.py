@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Пакетный режим Video Downloader (без графического интерфейса)
+
+Не импортирует tkinter, PIL, pystray и plyer: подходит для серверов
+без дисплея и запуска из cron.
+"""
+
+import os
+import shutil
+import sys
+import threading
+import time
+from queue import Queue
+
+from engine import (DownloadWorkerPool, BandwidthScheduler, ProgressTracker, InfoCache,
+                    YoutubeDLPool, RetryPolicy, CircuitBreaker, canonical_url, collection_kind,
+                    clamp_workers, clamp_fragments, resolve_downloader, format_size, format_eta)
+from converter import benchmark_profiles
+from postprocess import PostProcessor, postprocess_settings, STAGE_LABELS
+from storage import Config, DownloadHistory, SubscriptionStore
+
+
+_print_lock = threading.Lock()
+
+
+def echo(message):
+    """Вывести строку (безопасно из нескольких потоков)"""
+    with _print_lock:
+        print(message, flush=True)
+
+
+def read_urls(path):
+    """Прочитать URL из файла ('-' - стандартный ввод), по одному на строку"""
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip().startswith('http')]
+
+
+def run_batch(args):
+    """
+    Скачать все URL из файла args.batch
+
+    Returns:
+        код выхода: 0 - всё скачано, 1 - были ошибки, 2 - неверные параметры
+    """
+    config = Config()
+
+    try:
+        urls = read_urls(args.batch)
+    except OSError as e:
+        echo(f"✗ Не удалось прочитать {args.batch}: {e}")
+        return 2
+
+    if not urls:
+        echo("Нет URL для загрузки")
+        return 0
+
+    download_path = args.output or config.get('last_download_path')
+    if not os.path.isdir(download_path):
+        echo(f"✗ Папка не существует: {download_path}")
+        return 2
+
+    workers = clamp_workers(args.jobs if args.jobs is not None else config.get('queue_workers', 4))
+    speed_limit = args.limit if args.limit is not None else config.get('speed_limit', 0)
+
+    history = DownloadHistory()
+    scheduler = BandwidthScheduler(speed_limit, config.get('host_limits'))
+    tracker = ProgressTracker(config.get('progress_rate_hz'))
+    info_cache = InfoCache(ttl=config.get('info_cache_ttl'), max_mb=config.get('info_cache_mb'))
+    ydl_pool = YoutubeDLPool()
+    retries = args.retries if args.retries is not None else config.get('retry_attempts')
+    retry_policy = RetryPolicy(retries, config.get('retry_delay'))
+    breaker = CircuitBreaker(config.get('breaker_threshold'), config.get('breaker_cooldown'))
+    fragments = clamp_fragments(args.fragments if args.fragments is not None else config.get('fragments'))
+    downloader = args.downloader or config.get('downloader', 'native')
+    if resolve_downloader(downloader) != downloader:
+        echo(f"⚠ {downloader} не найден в PATH: используется встроенный загрузчик")
+
+    template = {
+        'quality': args.quality,
+        'subtitles': args.subtitles,
+        'subtitle_language': args.sub_lang,
+        'speed_limit': 0,  # Общий лимит соблюдает scheduler
+        'cookiefile': args.cookies or '',
+        'download_path': download_path,
+        'refresh_info': args.no_cache,
+        'quiet': not args.verbose,
+        'fragments': fragments,
+        'downloader': downloader
+    }
+
+    # Плейлисты и каналы: только видео, новые с прошлого запуска (--force - все).
+    # Очереди на диске здесь нет - видео отмечаются виденными только после загрузки
+    subscriptions = SubscriptionStore(history)
+    sources = {}  # Канонический ключ видео -> URL плейлиста или канала
+    expanded = []
+    for url in urls:
+        if not collection_kind(url):
+            expanded.append(url)
+            continue
+        try:
+            title, added, scanned, new = subscriptions.sync(
+                url, lambda items: items, template, ydl_pool, full=args.force, mark_seen=False)
+        except Exception as e:
+            echo(f"✗ {url}: не удалось получить список видео: {e}")
+            continue
+        echo(f"{title or url}: просмотрено {scanned}, новых {new}")
+        for item in added:
+            sources.setdefault(canonical_url(item['url']), url)
+            expanded.append(item['url'])
+    urls = expanded
+
+    # Повторы в списке и уже скачанные видео пропускаем
+    unique = {}
+    for url in urls:
+        unique.setdefault(canonical_url(url), url)
+    skip = config.get('skip_downloaded', True) and not args.force
+    skipped_downloaded = history.downloaded_keys(unique) if skip else set()
+    if len(unique) < len(urls) or skipped_downloaded:
+        echo(f"Пропущено: повторы - {len(urls) - len(unique)}, уже скачаны - {len(skipped_downloaded)}")
+    for key in skipped_downloaded:
+        if key in sources:
+            subscriptions.mark_seen(sources[key], [key])
+    urls = [url for key, url in unique.items() if key not in skipped_downloaded]
+    if not urls:
+        history.close()
+        ydl_pool.close()
+        return 0
+
+    download_queue = Queue()
+    for url in urls:
+        download_queue.put(dict(template, url=url))
+
+    total = len(urls)
+    counter = {'done': 0}
+    counter_lock = threading.Lock()
+    finished = threading.Event()
+
+    def numbered(message):
+        with counter_lock:
+            counter['done'] += 1
+            echo(f"[{counter['done']}/{total}] {message}")
+
+    def on_postprocess_update(job):
+        if job.status == 'error':
+            echo(f"✗ Обработка {job.title}: {job.error}")
+        elif job.status == 'running':
+            echo(f"⚙ {STAGE_LABELS[job.stage]}: {job.title}")
+        if job.status != 'running':
+            for old, new in job.moved:
+                history.update_filename(old, new)
+
+    # Обработка файлов (этапы из настроек) идёт параллельно с загрузками
+    stages, postprocess_options = postprocess_settings(config)
+    postprocessor = PostProcessor(config.get('postprocess_workers'), on_update=on_postprocess_update,
+                                  on_notify=lambda job: echo(f"✓ Обработано: {job.files[0]}"),
+                                  stall_timeout=config.get('convert_stall_timeout'))
+
+    def on_success(item, info):
+        final = tracker.finish(item)
+        downloaded = final.job_bytes if final else 0
+        title = history.add_from_info(item, info, downloaded)
+        key = canonical_url(item['url'])
+        if key in sources:
+            subscriptions.mark_seen(sources[key], [key])
+        numbered(f"✓ {title} ({format_size(info.get('filesize') or downloaded)})")
+        for warning in info.get('_integrity_warnings') or []:
+            echo(f"⚠ {warning}")
+        postprocessor.submit(item, info, stages, postprocess_options)
+
+    def on_error(item, error, kind):
+        tracker.finish(item, 'error')
+        numbered(f"✗ {item['url']} [{kind}]: {error}")
+
+    def on_retry(item, error, kind, delay):
+        tracker.finish(item, 'retry')
+        echo(f"↻ {item['url']} [{kind}]: повтор через {delay:.0f} сек")
+
+    pool = DownloadWorkerPool(
+        download_queue,
+        workers=workers,
+        scheduler=scheduler,
+        info_cache=info_cache,
+        progress_hook=tracker.update,
+        on_success=on_success,
+        on_error=on_error,
+        on_finish=lambda completed, failed: finished.set(),
+        ydl_pool=ydl_pool,
+        retry_policy=retry_policy,
+        breaker=breaker,
+        on_retry=on_retry
+    )
+
+    echo(f"Загрузка {total} URL в {download_path} ({workers} параллельных загрузок, "
+         f"фрагментов {fragments}, загрузчик {resolve_downloader(downloader)})")
+    started = time.time()
+    pool.start()
+
+    try:
+        while not finished.wait(1):
+            pass
+    except KeyboardInterrupt:
+        echo("Остановка: ожидание текущих загрузок...")
+        pool.stop()
+        finished.wait()
+        postprocessor.stop()
+
+    if stages:
+        echo(f"Ожидание обработки файлов ({', '.join(STAGE_LABELS[stage].lower() for stage in stages)})...")
+        postprocessor.wait()
+    elapsed = time.time() - started
+    echo(f"Готово за {elapsed:.0f} сек: успешно {pool.completed}, ошибок {pool.failed}, "
+         f"скачано {format_size(tracker.session_bytes)}")
+    paused = breaker.open_sites()
+    if paused:
+        echo("Приостановлены после ошибок подряд: " + ", ".join(
+            f"{site} (ещё {format_eta(left)})" for site, left in sorted(paused.items())))
+    history.close()
+    ydl_pool.close()
+    return 1 if pool.failed or postprocessor.failed else 0
+
+
+def run_encoder_benchmark():
+    """Замер скорости кодирования профилей конвертера на этом компьютере"""
+    if not shutil.which('ffmpeg'):
+        echo("✗ FFmpeg не найден")
+        return 1
+    echo(f"{'профиль':<10} {'кодировщик':<12} {'потоков':>7} {'fps':>8} {'кбит/с':>8}")
+
+    def report(result):
+        if result['error']:
+            echo(f"{result['profile']:<10} {result['encoder']:<12} ошибка: {result['error']}")
+        else:
+            echo(f"{result['profile']:<10} {result['encoder']:<12} {result['threads']:>7} "
+                 f"{result['fps']:>8} {result['kbps']:>8}")
+
+    results = benchmark_profiles(on_result=report)
+    return 1 if any(result['error'] for result in results) else 0
@@ -0,0 +1,736 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль пакетной конвертации (ffmpeg) для Video Downloader
+
+Не зависит от tkinter: задачи выполняются параллельными процессами ffmpeg,
+а интерфейс получает уведомления через обратные вызовы.
+"""
+
+import itertools
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from queue import PriorityQueue, Queue, Empty
+
+from defaults import DEFAULT_PROFILE, DEFAULT_STALL_TIMEOUT
+
+
+# Форматы и качество вкладки конвертера
+CONVERT_FORMATS = ["MP4", "MKV", "AVI", "WEBM", "MP3", "M4A"]
+CONVERT_QUALITIES = ["Оригинальное", "1080p", "720p", "480p"]
+
+# Файлы, которые берутся из папки
+MEDIA_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.webm', '.mov', '.flv', '.m4v', '.ts',
+                    '.mp3', '.m4a', '.wav', '.flac', '.ogg', '.opus', '.aac'}
+
+# Суффикс результата; такие файлы при обходе папки пропускаются
+OUTPUT_SUFFIX = '_converted'
+
+# Приоритеты задач: меньше - раньше
+PRIORITIES = {'high': 0, 'normal': 1, 'low': 2}
+
+# Потоков ffmpeg на одну задачу при автоматическом выборе числа процессов
+DEFAULT_CONVERT_THREADS = 2
+
+# Кодеки, которые контейнер принимает без перекодирования (None - любые);
+# типа дорожки нет в словаре - такие дорожки в результат не попадают
+CONTAINER_CODECS = {
+    'mp4': {'video': {'h264', 'hevc', 'av1', 'vp9', 'mpeg4'},
+            'audio': {'aac', 'mp3', 'alac', 'ac3', 'eac3', 'opus'}},
+    'mkv': {'video': None, 'audio': None, 'subtitle': None},
+    'webm': {'video': {'vp8', 'vp9', 'av1'}, 'audio': {'opus', 'vorbis'}},
+    'avi': {'video': {'mpeg4', 'h264', 'mjpeg', 'msmpeg4v3'}, 'audio': {'mp3', 'ac3', 'pcm_s16le'}},
+    'mp3': {'audio': {'mp3'}},
+    'm4a': {'audio': {'aac', 'alac'}},
+}
+
+# Кодировщики, если дорожку нельзя скопировать: (видео, звук)
+CONTAINER_ENCODERS = {
+    'mp4': ('libx264', 'aac'),
+    'mkv': ('libx264', 'aac'),
+    'webm': ('libvpx-vp9', 'libopus'),
+    'avi': ('mpeg4', 'libmp3lame'),
+    'mp3': (None, 'libmp3lame'),
+    'm4a': (None, 'aac'),
+}
+
+# Профили кодирования: параметры кодировщиков видео (AVOption, значение), битрейт звука,
+# потоков на процесс ffmpeg и замена кодировщика видео для контейнеров
+ENCODER_PROFILES = {
+    'fast': {
+        'threads': 2,
+        'audio_bitrate': '128k',
+        'video': {
+            'libx264': [('preset', 'veryfast'), ('crf', '23')],
+            'libx265': [('preset', 'veryfast'), ('crf', '28')],
+            'libvpx-vp9': [('deadline', 'realtime'), ('cpu-used', '8'), ('row-mt', '1'),
+                           ('crf', '36'), ('b', '0')],
+            'mpeg4': [('qscale', '5')],
+        },
+        'encoders': {},
+    },
+    'balanced': {
+        'threads': 2,
+        'audio_bitrate': '192k',
+        'video': {
+            'libx264': [('preset', 'medium'), ('crf', '21')],
+            'libx265': [('preset', 'medium'), ('crf', '26')],
+            'libvpx-vp9': [('deadline', 'good'), ('cpu-used', '4'), ('row-mt', '1'),
+                           ('crf', '32'), ('b', '0')],
+            'mpeg4': [('qscale', '3')],
+        },
+        'encoders': {},
+    },
+    'archival': {
+        'threads': 4,  # Медленные пресеты хорошо делятся на потоки, а процессов меньше - меньше памяти
+        'audio_bitrate': '256k',
+        'video': {
+            'libx264': [('preset', 'slow'), ('crf', '18')],
+            'libx265': [('preset', 'slow'), ('crf', '22')],
+            'libvpx-vp9': [('deadline', 'good'), ('cpu-used', '1'), ('row-mt', '1'),
+                           ('crf', '28'), ('b', '0')],
+            'mpeg4': [('qscale', '2')],
+        },
+        'encoders': {'mp4': 'libx265', 'mkv': 'libx265'},
+    },
+}
+PROFILE_LABELS = {'fast': 'Быстрый', 'balanced': 'Сбалансированный', 'archival': 'Архивный'}
+
+# Кодировщики видео, которые проверяет benchmark_profiles, и контейнер для каждого
+BENCHMARK_ENCODERS = {
+    'libx264': 'mp4',
+    'libx265': 'mp4',
+    'libvpx-vp9': 'webm',
+    'mpeg4': 'avi',
+}
+
+# Сколько результатов ffprobe держать в памяти
+PROBE_CACHE_SIZE = 1000
+
+# Подписи способов конвертации
+PLAN_MODES = {
+    'copy': 'Без перекодирования',
+    'audio': 'Перекодирование звука',
+    'transcode': 'Перекодирование',
+}
+
+# Как часто проверять зависание (сек)
+STALL_CHECK_INTERVAL = 1
+
+# Сколько последних строк stderr хранить для сообщения об ошибке
+STDERR_TAIL_LINES = 20
+
+# Без окна консоли для каждого ffmpeg в Windows
+CREATE_NO_WINDOW = getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+
+
+def plan_workers(workers=0, cpu_count=None, threads=DEFAULT_CONVERT_THREADS):
+    """
+    Число одновременных процессов ffmpeg и потоков для каждого
+
+    Args:
+        workers: процессов (0 - по числу ядер)
+        threads: потоков на процесс при автоматическом выборе (см. ENCODER_PROFILES)
+
+    Returns:
+        (процессов, потоков на процесс)
+    """
+    cpu_count = cpu_count or os.cpu_count() or 1
+    try:
+        workers = int(workers or 0)
+    except (TypeError, ValueError):
+        workers = 0
+    if workers <= 0:
+        workers = max(1, cpu_count // max(1, threads))
+    workers = min(workers, cpu_count)
+    return workers, max(1, cpu_count // workers)
+
+
+def collect_inputs(paths):
+    """
+    Развернуть выбранные файлы и папки в список медиафайлов
+
+    Папки обходятся рекурсивно; результаты прошлых конвертаций пропускаются.
+    """
+    files = []
+    seen = set()
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            candidates = sorted(p for p in path.rglob('*') if p.is_file())
+        else:
+            candidates = [path]
+        for candidate in candidates:
+            if candidate.suffix.lower() not in MEDIA_EXTENSIONS or candidate.stem.endswith(OUTPUT_SUFFIX):
+                continue
+            key = os.path.normcase(str(candidate.resolve()))
+            if key not in seen:
+                seen.add(key)
+                files.append(candidate)
+    return files
+
+
+_probe_cache = OrderedDict()
+_probe_lock = threading.Lock()
+
+
+def probe_media(path):
+    """
+    Дорожки и длительность файла по ffprobe
+
+    Результат запоминается по пути, размеру и времени изменения файла.
+
+    Returns:
+        {'duration': сек или None, 'streams': [{'index', 'type', 'codec', 'height', 'attached_pic'}]}
+        или None, если ffprobe недоступен или не смог прочитать файл
+    """
+    path = Path(path)
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    key = (os.path.normcase(str(path.resolve())), stat.st_size, stat.st_mtime_ns)
+    with _probe_lock:
+        if key in _probe_cache:
+            _probe_cache.move_to_end(key)
+            return _probe_cache[key]
+
+    try:
+        result = subprocess.run(['ffprobe', '-v', 'error', '-of', 'json', '-show_entries',
+                                 'format=duration:stream=index,codec_type,codec_name,height'
+                                 ':stream_disposition=attached_pic', str(path)],
+                                capture_output=True, text=True, errors='replace', timeout=30,
+                                creationflags=CREATE_NO_WINDOW)
+        data = json.loads(result.stdout or '{}')
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+    if result.returncode != 0 or not data.get('streams'):
+        return None
+
+    try:
+        duration = float(data.get('format', {}).get('duration'))
+    except (TypeError, ValueError):
+        duration = None
+    info = {
+        'duration': duration if duration and duration > 0 else None,
+        'streams': [{
+            'index': stream['index'],
+            'type': stream.get('codec_type'),
+            'codec': stream.get('codec_name'),
+            'height': stream.get('height'),
+            'attached_pic': bool(stream.get('disposition', {}).get('attached_pic')),
+        } for stream in data['streams']],
+    }
+    with _probe_lock:
+        _probe_cache[key] = info
+        while len(_probe_cache) > PROBE_CACHE_SIZE:
+            _probe_cache.popitem(last=False)
+    return info
+
+
+def quality_height(quality):
+    """Высота кадра для качества вкладки конвертера ('720p' -> 720) или None для оригинального"""
+    try:
+        return int(str(quality).rstrip('p'))
+    except ValueError:
+        return None
+
+
+def video_encoder(output_format, profile=DEFAULT_PROFILE):
+    """Кодировщик видео для контейнера с учётом профиля (None - контейнер только для звука)"""
+    encoder = CONTAINER_ENCODERS.get(output_format, ('libx264', 'aac'))[0]
+    if encoder is None:
+        return None
+    return ENCODER_PROFILES[profile]['encoders'].get(output_format, encoder)
+
+
+def encoder_arguments(encoder, profile=DEFAULT_PROFILE, specifier='v'):
+    """Параметры кодировщика из профиля для дорожки specifier ('v', 'a' или номер выходной дорожки)"""
+    settings = ENCODER_PROFILES[profile]
+    if encoder in settings['video']:
+        options = settings['video'][encoder]
+    else:
+        options = [('b', settings['audio_bitrate'])]
+    args = []
+    for option, value in options:
+        args += [f'-{option}:{specifier}', value]
+    return args
+
+
+class ConversionPlan:
+    """Что делать с каждой дорожкой исходного файла: копировать или перекодировать"""
+
+    def __init__(self, profile=DEFAULT_PROFILE):
+        self.profile = profile
+        self.streams = []  # (дорожка из probe_media, кодировщик или None - копия, высота или None)
+
+    def add(self, stream, encoder=None, height=None):
+        self.streams.append((stream, encoder, height))
+
+    @property
+    def mode(self):
+        """'copy' - всё копируется, 'audio' - перекодируется только звук, 'transcode' - видео тоже"""
+        encoded = {stream['type'] for stream, encoder, _ in self.streams if encoder}
+        if 'video' in encoded:
+            return 'transcode'
+        return 'audio' if encoded else 'copy'
+
+    def arguments(self, threads=1):
+        """Аргументы ffmpeg между входным и выходным файлом"""
+        args = []
+        for output_index, (stream, encoder, height) in enumerate(self.streams):
+            args += ['-map', f"0:{stream['index']}", f'-c:{output_index}', encoder or 'copy']
+            if height:
+                args += [f'-filter:{output_index}', f'scale=-2:{height}']
+            if encoder:
+                args += encoder_arguments(encoder, self.profile, output_index)
+        if self.mode == 'transcode':
+            args += ['-threads', str(threads)]
+        return args
+
+    def describe(self):
+        """Описание для лога: 'видео h264 - копия, звук opus -> aac'"""
+        names = {'video': 'видео', 'audio': 'звук', 'subtitle': 'субтитры'}
+        parts = []
+        for stream, encoder, height in self.streams:
+            action = f"-> {encoder}" + (f" {height}p" if height else "") if encoder else "- копия"
+            parts.append(f"{names.get(stream['type'], stream['type'])} {stream['codec']} {action}")
+        return ', '.join(parts)
+
+
+def plan_conversion(info, output_format, quality='Оригинальное', profile=DEFAULT_PROFILE):
+    """
+    Выбрать для каждой дорожки копирование или перекодирование
+
+    Дорожка копируется, если её кодек подходит контейнеру и не нужно
+    уменьшать кадр; видео меньше целевой высоты не увеличивается.
+
+    Args:
+        info: результат probe_media
+        profile: профиль кодирования (ключ ENCODER_PROFILES)
+
+    Returns:
+        ConversionPlan (пустой, если подходящих дорожек нет)
+    """
+    allowed = CONTAINER_CODECS.get(output_format, {})
+    audio_encoder = CONTAINER_ENCODERS.get(output_format, ('libx264', 'aac'))[1]
+    streams = info['streams']
+    plan = ConversionPlan(profile)
+
+    video = next((stream for stream in streams
+                  if stream['type'] == 'video' and not stream['attached_pic']), None)
+    if video and 'video' in allowed:
+        height = quality_height(quality)
+        if height and video['height'] and video['height'] <= height:
+            height = None  # Уже не больше нужного размера
+        codecs = allowed['video']
+        if not height and (codecs is None or video['codec'] in codecs):
+            plan.add(video)
+        else:
+            plan.add(video, video_encoder(output_format, profile), height)
+
+    audio = next((stream for stream in streams if stream['type'] == 'audio'), None)
+    if audio:
+        codecs = allowed['audio']
+        plan.add(audio, None if codecs is None or audio['codec'] in codecs else audio_encoder)
+
+    if 'subtitle' in allowed:
+        for stream in streams:
+            if stream['type'] == 'subtitle':
+                plan.add(stream)
+    return plan
+
+
+def parse_progress(values):
+    """
+    Разобрать блок вывода ffmpeg -progress
+
+    Returns:
+        (обработано секунд или None, fps или None, скорость относительно реального времени или None)
+    """
+    position = None
+    for key in ('out_time_us', 'out_time_ms'):  # Оба ключа - в микросекундах
+        try:
+            position = max(0, int(values[key])) / 1e6
+            break
+        except (KeyError, ValueError):
+            pass
+
+    def number(key):
+        try:
+            return float(values.get(key, '').rstrip('x'))
+        except ValueError:
+            return None
+
+    return position, number('fps'), number('speed')
+
+
+class ConvertJob:
+    """Задача конвертации одного файла"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, input_path, output_format='mp4', quality='Оригинальное', priority='normal',
+                 profile=DEFAULT_PROFILE):
+        self.id = next(self._ids)
+        self.input_path = Path(input_path)
+        self.output_format = output_format.lower()
+        self.quality = quality
+        self.priority = priority if priority in PRIORITIES else 'normal'
+        self.profile = profile if profile in ENCODER_PROFILES else DEFAULT_PROFILE
+        # Потоков ffmpeg по профилю; BatchConverter ограничивает их долей ядер на процесс
+        self.threads = ENCODER_PROFILES[self.profile]['threads']
+        self.output_path = self.input_path.with_name(
+            f"{self.input_path.stem}{OUTPUT_SUFFIX}.{self.output_format}")
+        self.status = 'queued'  # 'queued', 'running', 'done', 'error', 'cancelled'
+        self.progress = 0.0  # Процент
+        self.duration = None  # Длительность исходного файла (сек), если известна
+        self.position = 0.0  # Обработано секунд
+        self.fps = None
+        self.speed = None  # Во сколько раз быстрее реального времени
+        self.eta = None  # Осталось секунд
+        self.plan = None  # ConversionPlan; None - ffprobe недоступен
+        self.error = None
+        self.started = None
+        self.finished = None
+        self.process = None
+
+    @property
+    def elapsed(self):
+        """Время выполнения (сек)"""
+        if not self.started:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+    def apply_progress(self, values):
+        """
+        Учесть блок вывода -progress
+
+        Returns:
+            True, если обработка продвинулась
+        """
+        position, fps, speed = parse_progress(values)
+        self.fps, self.speed = fps, speed
+        if position is None or position <= self.position:
+            return False
+        self.position = position
+        if self.duration:
+            self.progress = min(99.9, position * 100.0 / self.duration)
+            self.eta = (self.duration - position) / speed if speed else None
+        return True
+
+    def command(self, threads=1):
+        """Команда ffmpeg для задачи (ход выполнения - в stdout в формате -progress)"""
+        cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-v', 'error', '-nostats', '-progress', 'pipe:1',
+               '-y', '-i', str(self.input_path)]
+        if self.plan is not None:
+            cmd += self.plan.arguments(threads)
+        elif self.quality == "Оригинальное":
+            cmd += ['-c', 'copy']
+        else:
+            height = self.quality.replace('p', '')
+            encoder = video_encoder(self.output_format, self.profile)
+            cmd += ['-vf', f'scale=-2:{height}', '-threads', str(threads)]
+            if encoder:
+                cmd += ['-c:v', encoder] + encoder_arguments(encoder, self.profile)
+        return cmd + [str(self.output_path)]
+
+
+class BatchConverter:
+    """
+    Очередь конвертации с приоритетами и пулом процессов ffmpeg
+
+    Каждый рабочий поток запускает свой процесс ffmpeg: потоков столько,
+    сколько задаёт профиль задачи, но не больше доли ядер на процесс
+    (plan_workers), поэтому пакет файлов занимает все ядра.
+    """
+
+    def __init__(self, workers=0, on_update=None, on_finish=None, stall_timeout=DEFAULT_STALL_TIMEOUT):
+        """
+        Args:
+            workers: одновременных процессов ffmpeg (0 - по числу ядер)
+            on_update: функция (job) при смене состояния или прогресса задачи (из рабочего потока)
+            on_finish: функция (done, failed) после опустошения очереди
+            stall_timeout: остановить ffmpeg без продвижения дольше стольких секунд (0 - не следить)
+        """
+        self.workers, self.threads = plan_workers(workers)  # threads - предел потоков на процесс
+        self.stall_timeout = stall_timeout
+        self.on_update = on_update
+        self.on_finish = on_finish
+        self.jobs = []
+        self._queue = PriorityQueue()
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+        self._active_workers = 0
+
+    @property
+    def is_running(self):
+        """Есть ли активные рабочие потоки"""
+        with self._lock:
+            return self._active_workers > 0
+
+    def add(self, job):
+        """Поставить задачу в очередь"""
+        with self._lock:
+            self.jobs.append(job)
+            self._queue.put((PRIORITIES[job.priority], next(self._order), job))
+        return job
+
+    def counts(self):
+        """Число задач в каждом состоянии"""
+        counts = {}
+        with self._lock:
+            for job in self.jobs:
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return counts
+
+    def overall_progress(self):
+        """Общий прогресс пакета (процент, без отменённых задач)"""
+        with self._lock:
+            jobs = [job for job in self.jobs if job.status != 'cancelled']
+        if not jobs:
+            return 0.0
+        return sum(100.0 if job.status in ('done', 'error') else job.progress for job in jobs) / len(jobs)
+
+    def set_workers(self, workers):
+        """Изменить число процессов ffmpeg (0 - по числу ядер) и долю ядер на каждый"""
+        with self._lock:
+            self.workers, self.threads = plan_workers(workers)
+
+    def start(self):
+        """Запустить недостающие рабочие потоки"""
+        with self._lock:
+            missing = self.workers - self._active_workers
+            self._active_workers += max(0, missing)
+        for index in range(missing):
+            threading.Thread(target=self._worker, name=f"convert-worker-{index + 1}", daemon=True).start()
+
+    def run(self, job):
+        """
+        Выполнить задачу в текущем потоке, минуя очередь
+
+        Пока задача выполняется, её можно отменить через cancel или cancel_all;
+        после завершения она не остаётся в списке jobs.
+        """
+        with self._lock:
+            self.jobs.append(job)
+            job.status = 'running'
+            job.started = time.time()
+        try:
+            self._notify(job)
+            self._run(job)
+            self._notify(job)
+        finally:
+            with self._lock:
+                self.jobs.remove(job)
+        return job
+
+    def cancel(self, job):
+        """Отменить задачу: ожидающая не начнётся, выполняющаяся будет остановлена"""
+        with self._lock:
+            if job.status not in ('queued', 'running'):
+                return
+            job.status = 'cancelled'
+            process = job.process
+        if process and process.poll() is None:
+            process.terminate()
+        self._notify(job)
+
+    def cancel_all(self):
+        """Отменить все незавершённые задачи"""
+        with self._lock:
+            jobs = [job for job in self.jobs if job.status in ('queued', 'running')]
+        for job in jobs:
+            self.cancel(job)
+
+    def clear_finished(self):
+        """Убрать из списка завершённые задачи"""
+        with self._lock:
+            self.jobs = [job for job in self.jobs if job.status in ('queued', 'running')]
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception:
+                pass
+
+    def _worker(self):
+        """Цикл рабочего потока: брать задачи по приоритету, пока очередь не опустеет"""
+        while True:
+            # Взять задачу и уменьшить счётчик потоков под одной блокировкой:
+            # start() не примет за работающий поток, который уже решил завершиться
+            with self._lock:
+                try:
+                    _, _, job = self._queue.get_nowait()
+                except Empty:
+                    self._active_workers -= 1
+                    last = self._active_workers == 0
+                    break
+                if job.status != 'queued':
+                    continue  # Отменена до начала
+                job.status = 'running'
+                job.started = time.time()
+            try:
+                self._notify(job)
+                self._run(job)
+                self._notify(job)
+            except Exception as e:
+                with self._lock:
+                    job.status, job.error, job.finished = 'error', str(e), time.time()
+                self._notify(job)
+        if last and self.on_finish:
+            counts = self.counts()
+            self.on_finish(counts.get('done', 0), counts.get('error', 0))
+
+    def _run(self, job):
+        """Выполнить задачу в процессе ffmpeg, читая ход выполнения построчно"""
+        threads = min(job.threads, self.threads)
+        info = probe_media(job.input_path)
+        if info:
+            job.duration = info['duration']
+            job.plan = plan_conversion(info, job.output_format, job.quality, job.profile)
+            if not job.plan.streams:
+                with self._lock:
+                    job.status, job.finished = 'error', time.time()
+                    job.error = f"Нет дорожек, подходящих для {job.output_format.upper()}"
+                return
+            self._notify(job)
+        try:
+            process = subprocess.Popen(job.command(threads), stdout=subprocess.PIPE,
+                                       stderr=subprocess.PIPE, text=True, errors='replace',
+                                       creationflags=CREATE_NO_WINDOW)
+        except OSError as e:
+            with self._lock:
+                job.status, job.error, job.finished = 'error', str(e), time.time()
+            return
+
+        with self._lock:
+            job.process = process
+            cancelled = job.status == 'cancelled'
+        if cancelled:
+            process.terminate()
+
+        # stderr читается отдельно, иначе заполненный канал остановит ffmpeg
+        stderr_tail = deque(maxlen=STDERR_TAIL_LINES)
+        stderr_reader = threading.Thread(target=stderr_tail.extend, args=(process.stderr,), daemon=True)
+        stderr_reader.start()
+        lines = Queue()
+
+        def read_stdout():
+            for line in process.stdout:
+                lines.put(line)
+            lines.put(None)
+
+        threading.Thread(target=read_stdout, daemon=True).start()
+
+        values = {}
+        last_activity = time.monotonic()
+        stalled = False
+        while True:
+            try:
+                line = lines.get(timeout=STALL_CHECK_INTERVAL)
+            except Empty:
+                line = ''
+            if line is None:
+                break
+            key, _, value = line.strip().partition('=')
+            if key:
+                values[key] = value
+            if key == 'progress':
+                # Конец блока: progress=continue или progress=end
+                if job.apply_progress(values):
+                    last_activity = time.monotonic()
+                values = {}
+                self._notify(job)
+            # Проверка на каждой итерации: зависший ffmpeg продолжает печатать
+            # progress=continue с тем же out_time
+            if self.stall_timeout and not stalled \
+                    and time.monotonic() - last_activity > self.stall_timeout:
+                stalled = True
+                process.kill()
+
+        process.wait()
+        stderr_reader.join(timeout=5)
+
+        with self._lock:
+            job.process = None
+            job.finished = time.time()
+            if job.status == 'cancelled':
+                pass  # Код возврата после terminate не важен
+            elif stalled:
+                job.status = 'error'
+                job.error = f"ffmpeg не продвигается {self.stall_timeout} сек - остановлен"
+            elif process.returncode == 0:
+                job.status = 'done'
+                job.progress = 100.0
+                job.eta = 0
+            else:
+                job.status = 'error'
+                tail = [line.strip() for line in stderr_tail if line.strip()]
+                job.error = tail[-1] if tail else f"ffmpeg завершился с кодом {process.returncode}"
+        if (job.status == 'cancelled' or stalled) and job.output_path.exists():
+            # Недописанный файл не нужен
+            try:
+                job.output_path.unlink()
+            except OSError:
+                pass
+
+
+def benchmark_profiles(seconds=5, size='1280x720', rate=30, profiles=None, encoders=None, on_result=None):
+    """
+    Замер скорости кодирования профилей на этом компьютере
+
+    Кодирует синтетический ролик (testsrc2) каждым кодировщиком из
+    BENCHMARK_ENCODERS с параметрами каждого профиля (все сочетания) и
+    числом потоков, которое получит один процесс ffmpeg при пакетной
+    конвертации.
+
+    Args:
+        seconds: длительность ролика
+        profiles: профили (по умолчанию все)
+        encoders: кодировщики (по умолчанию все из BENCHMARK_ENCODERS)
+        on_result: функция (result) после каждого замера
+
+    Returns:
+        список {'profile', 'encoder', 'threads', 'fps', 'kbps', 'error'}
+    """
+    results = []
+    workdir = tempfile.mkdtemp(prefix='vd-encode-')
+    try:
+        for profile in profiles or list(ENCODER_PROFILES):
+            threads = plan_workers(0, threads=ENCODER_PROFILES[profile]['threads'])[1]
+            for encoder in encoders or list(BENCHMARK_ENCODERS):
+                output = Path(workdir) / f"{profile}_{encoder}.{BENCHMARK_ENCODERS[encoder]}"
+                cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-v', 'error', '-y',
+                       '-f', 'lavfi', '-i', f'testsrc2=size={size}:rate={rate}:duration={seconds}',
+                       '-c:v', encoder, '-threads', str(threads)] + \
+                    encoder_arguments(encoder, profile) + [str(output)]
+                result = {'profile': profile, 'encoder': encoder, 'threads': threads,
+                          'fps': None, 'kbps': None, 'error': None}
+                started = time.perf_counter()
+                try:
+                    process = subprocess.run(cmd, capture_output=True, text=True, errors='replace',
+                                             creationflags=CREATE_NO_WINDOW)
+                except OSError as e:
+                    result['error'] = str(e)
+                else:
+                    elapsed = time.perf_counter() - started
+                    if process.returncode == 0 and output.exists():
+                        result['fps'] = round(seconds * rate / elapsed, 1)
+                        result['kbps'] = round(output.stat().st_size * 8 / 1000 / seconds)
+                    else:
+                        lines = process.stderr.strip().splitlines()
+                        result['error'] = lines[-1] if lines else f"код {process.returncode}"
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
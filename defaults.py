@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+"""
+Значения по умолчанию конвертации и обработки для Video Downloader
+
+Отдельный модуль без зависимостей: настройки (storage) берут отсюда
+значения по умолчанию, не импортируя converter и postprocess.
+"""
+
+# Профиль кодирования по умолчанию (ключ converter.ENCODER_PROFILES)
+DEFAULT_PROFILE = 'balanced'
+
+# Процесс без продвижения в выводе -progress дольше этого считается зависшим (сек)
+DEFAULT_STALL_TIMEOUT = 120
+
+# Потоков обработки по умолчанию: этапы нагружают процессор и диск,
+# несколько параллельных ffmpeg уже займут все ядра
+DEFAULT_POSTPROCESS_WORKERS = 1
@@ -0,0 +1,1546 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль движка загрузок для Video Downloader
+"""
+
+import os
+import hashlib
+import json
+import random
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from queue import Empty
+from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+
+# yt_dlp импортируется при первой загрузке: реестр экстракторов тяжёлый,
+# а для запуска интерфейса он не нужен
+
+
+# Допустимые границы числа параллельных загрузок
+MIN_WORKERS = 1
+MAX_WORKERS = 16
+
+# Сайты, для которых действуют отдельные лимиты соединений
+KNOWN_SITES = {
+    'youtube': ('youtube.com', 'youtu.be'),
+    'tiktok': ('tiktok.com',),
+    'instagram': ('instagram.com',),
+    'pinterest': ('pinterest.com', 'pin.it'),
+}
+
+# Одновременных соединений на сайт по умолчанию
+DEFAULT_HOST_LIMITS = {
+    'youtube': 4,
+    'tiktok': 2,
+    'instagram': 2,
+    'pinterest': 2,
+    'default': 4,
+}
+
+
+# Частота событий прогресса на одну загрузку (в секунду)
+DEFAULT_PROGRESS_RATE = 4
+
+# Кэш информации о видео: время жизни (сек) и размер (MB)
+DEFAULT_INFO_CACHE_TTL = 3600
+DEFAULT_INFO_CACHE_MB = 100
+
+# Сколько простаивающих экземпляров YoutubeDL держать в пуле
+DEFAULT_YDL_POOL_SIZE = 16
+
+# Фрагментов DASH/HLS, скачиваемых одновременно в одной загрузке
+DEFAULT_FRAGMENTS = 4
+MAX_FRAGMENTS = 16  # Больше не принимает aria2c (-x)
+
+# Загрузчики: встроенный в yt-dlp и внешние программы (если установлены)
+DOWNLOADERS = ('native', 'aria2c')
+
+# Проверка файлов: допустимое отклонение от примерного размера (доля)
+# и ключи контрольных сумм в описании формата
+APPROX_SIZE_TOLERANCE = 0.3
+CHECKSUM_KEYS = ('sha256', 'sha1', 'md5')
+
+# Повторы: число попыток, базовая и максимальная задержка (сек), разброс задержки (доля)
+DEFAULT_RETRY_ATTEMPTS = 5
+DEFAULT_RETRY_DELAY = 5
+MAX_RETRY_DELAY = 600
+RETRY_JITTER = 0.5
+
+# Предохранитель сайта: ошибок подряд до отключения и пауза (сек)
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 300
+
+# Классы ошибок загрузки и признаки в тексте сообщения (проверяются по порядку)
+ERROR_PATTERNS = [
+    ('rate_limit', ('http error 429', 'too many requests', 'rate-limit', 'rate limit')),
+    ('geo', ('georestricted', 'not available in your country', 'geo restriction', 'geo-restrict',
+             'from your location')),
+    ('forbidden', ('http error 403', 'forbidden')),
+    ('permanent', ('unsupported url', 'private video', 'video unavailable', 'has been removed',
+                   'copyright', 'sign in to confirm your age', 'members-only', 'requested format is not available',
+                   'http error 404', 'http error 410', 'no video formats found', 'is not a valid url')),
+    ('network', ('timed out', 'timeout', 'connection reset', 'connection refused', 'connection aborted',
+                 'temporary failure in name resolution', 'name or service not known', 'remote end closed',
+                 'incompleteread', 'incomplete read', 'content too short', 'unable to download',
+                 'http error 5', 'network is unreachable', 'broken pipe', 'got error')),
+]
+
+# Сколько раз повторять ошибку каждого класса (geo и permanent - не повторять)
+RETRY_LIMITS = {'network': DEFAULT_RETRY_ATTEMPTS, 'rate_limit': DEFAULT_RETRY_ATTEMPTS, 'forbidden': 2}
+
+# Параметры ссылок, не влияющие на содержимое: точные имена и префиксы
+# (по префиксу только utm_: иначе 'si' отбросил бы и 'site', 'sig', 'size')
+TRACKING_PARAMS = {'fbclid', 'gclid', 'si', 'feature', 'pp'}
+TRACKING_PREFIXES = ('utm_',)
+
+# Идентификаторы видео в ссылках известных сайтов (для поиска повторов).
+# Сравниваются с началом ссылки: сайт должен быть хостом, а не частью
+# другого имени (notyoutube.com) или параметра (?u=youtube.com/...)
+CANONICAL_HOST = r'(?:https?://)?(?:[\w-]+\.)*'
+CANONICAL_PATTERNS = [
+    ('youtube', re.compile(CANONICAL_HOST + r'(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:[^#]*&)?v=|shorts/'
+                                            r'|embed/|live/|v/)|youtu\.be/)([\w-]{11})(?![\w-])', re.I)),
+    ('tiktok', re.compile(CANONICAL_HOST + r'tiktok\.com/@[^/?#]+/video/(\d+)', re.I)),
+    ('instagram', re.compile(CANONICAL_HOST + r'instagram\.com/(?:[^/?#]+/)?(?:p|reels?|tv)/([\w-]+)', re.I)),
+    ('pinterest', re.compile(CANONICAL_HOST + r'pinterest\.[a-z.]+/pin/(\d+)', re.I)),
+]
+
+# Ссылки на каналы (новые видео первыми) и плейлисты
+CHANNEL_PATTERN = re.compile(r'youtube\.com/(?:@[^/?#]+|channel/[^/?#]+|c/[^/?#]+|user/[^/?#]+)'
+                             r'(?:/(?:videos|shorts|streams|featured)?)?/?(?:[?#]|$)'
+                             r'|tiktok\.com/@[^/?#]+/?(?:[?#]|$)')
+PLAYLIST_PATTERN = re.compile(r'youtube\.com/playlist\?(?:.*&)?list='
+                              r'|pinterest\.[a-z.]+/(?!pin/)[^/?#]+/[^/?#]+/?(?:[?#]|$)')
+
+# Синхронизация канала: остановиться после стольких уже известных видео подряд
+SYNC_STOP_AFTER_KNOWN = 30
+
+
+def format_size(num_bytes):
+    """Размер в человекочитаемом виде"""
+    num_bytes = float(num_bytes or 0)
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if num_bytes < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} TB"
+
+
+def format_eta(seconds):
+    """Оставшееся время в виде ЧЧ:ММ:СС или ММ:СС"""
+    if seconds is None:
+        return "N/A"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:02d}:{seconds:02d}"
+
+
+def clamp_workers(value):
+    """Привести число потоков к допустимому диапазону"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = MIN_WORKERS
+    return max(MIN_WORKERS, min(MAX_WORKERS, value))
+
+
+def clamp_fragments(value):
+    """Привести число параллельных фрагментов к допустимому диапазону"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        value = 1
+    return max(1, min(MAX_FRAGMENTS, value))
+
+
+_downloader_paths = {}
+
+
+def downloader_available(name):
+    """Установлен ли внешний загрузчик (поиск в PATH выполняется один раз)"""
+    if name not in _downloader_paths:
+        _downloader_paths[name] = shutil.which(name)
+    return _downloader_paths[name] is not None
+
+
+def resolve_downloader(name):
+    """Загрузчик, который будет использован: внешний, если он установлен, иначе встроенный"""
+    if name in DOWNLOADERS and name != 'native' and downloader_available(name):
+        return name
+    return 'native'
+
+
+def get_site(url):
+    """
+    Определить сайт по URL
+
+    Returns:
+        'youtube', 'tiktok', 'instagram', 'pinterest' или 'other'
+    """
+    host = get_host(url)
+    for site, domains in KNOWN_SITES.items():
+        for domain in domains:
+            if host == domain or host.endswith('.' + domain):
+                return site
+    return 'other'
+
+
+def get_host(url):
+    """Имя хоста из URL без 'www.'"""
+    host = (urlparse(url).hostname or '').lower()
+    return host[4:] if host.startswith('www.') else host
+
+
+def normalize_url(url):
+    """Привести URL к единому виду для ключей кэша (без www, якоря и меток отслеживания)"""
+    parts = urlparse(url.strip())
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port:
+        host = f"{host}:{parts.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if key not in TRACKING_PARAMS and not key.startswith(TRACKING_PREFIXES))
+    return urlunparse(('https', host, parts.path.rstrip('/') or '/', '', urlencode(query), ''))
+
+
+def canonical_url(url):
+    """
+    Ключ видео для поиска повторов
+
+    Для известных сайтов - 'сайт:id' (youtu.be/ID, watch?v=ID и shorts/ID дают
+    один ключ), для остальных - normalize_url.
+    """
+    for site, pattern in CANONICAL_PATTERNS:
+        match = pattern.match(url.strip())
+        if match:
+            return f"{site}:{match.group(1)}"
+    return normalize_url(url)
+
+
+def collection_kind(url):
+    """'channel', 'playlist' или None для ссылки на одно видео"""
+    if CHANNEL_PATTERN.search(url):
+        return 'channel'
+    if PLAYLIST_PATTERN.search(url):
+        return 'playlist'
+    return None
+
+
+def build_ydl_opts(item, progress_hook=None):
+    """
+    Собрать опции yt-dlp из элемента очереди
+
+    Args:
+        item: словарь задачи ('url', 'quality', 'subtitles', 'subtitle_language',
+              'speed_limit', 'cookiefile', 'download_path', 'quiet',
+              'fragments', 'downloader')
+        progress_hook: функция обработки прогресса yt-dlp
+    """
+    output_template = os.path.join(item.get('download_path', ''), '%(title)s.%(ext)s')
+
+    opts = {
+        'outtmpl': output_template,
+        'noplaylist': True,  # Задача - одно видео; плейлисты разворачивает expand_collection
+        'progress_hooks': [progress_hook] if progress_hook else [],
+        'quiet': False,
+        'no_warnings': False,
+    }
+
+    # Качество
+    quality = item.get('quality', 'best')
+    if quality == "audio":
+        opts['format'] = 'bestaudio/best'
+        opts['postprocessors'] = [{
+            'key': 'FFmpegExtractAudio',
+            'preferredcodec': 'mp3',
+            'preferredquality': '192',
+        }]
+    elif quality == "best":
+        opts['format'] = 'bestvideo+bestaudio/best'
+        opts['merge_output_format'] = 'mp4'
+    else:
+        opts['format'] = f'bestvideo[height<={quality}]+bestaudio/best[height<={quality}]'
+        opts['merge_output_format'] = 'mp4'
+
+    # Субтитры
+    if item.get('subtitles'):
+        opts['writesubtitles'] = True
+        opts['subtitleslangs'] = [item.get('subtitle_language') or 'en']
+
+    # Ограничение скорости
+    speed_limit = item.get('speed_limit') or 0
+    if speed_limit > 0:
+        opts['ratelimit'] = speed_limit * 1024
+
+    # Cookies
+    if item.get('cookiefile'):
+        opts['cookiefile'] = item['cookiefile']
+
+    # Фрагменты DASH/HLS качаются параллельно, а не по одному
+    fragments = clamp_fragments(item.get('fragments', 1))
+    if fragments > 1:
+        opts['concurrent_fragment_downloads'] = fragments
+
+    # Внешний загрузчик; если он не установлен - встроенный
+    if resolve_downloader(item.get('downloader')) == 'aria2c':
+        opts['external_downloader'] = {'default': 'aria2c'}
+        opts['external_downloader_args'] = {
+            'aria2c': [f'--max-connection-per-server={fragments}', f'--split={fragments}',
+                       f'--max-concurrent-downloads={fragments}', '--min-split-size=1M']
+        }
+
+    # Возобновление: сначала пробуем формат, начатый в прошлый раз (его .part на диске)
+    if item.get('resume_format'):
+        opts['format'] = f"{item['resume_format']}/{opts['format']}"
+    opts['continuedl'] = True
+
+    # Тихий режим (пакетная загрузка без интерфейса)
+    if item.get('quiet'):
+        opts.update(quiet=True, no_warnings=True, noprogress=True)
+
+    return opts
+
+
+def _open_ydl(ydl_opts, ydl_pool=None):
+    """Экземпляр YoutubeDL из пула или новый (в обоих случаях - контекстный менеджер)"""
+    if ydl_pool:
+        return ydl_pool.checkout(ydl_opts)
+    import yt_dlp
+    return yt_dlp.YoutubeDL(ydl_opts)
+
+
+def extract_info_cached(url, info_cache=None, bypass=False, ydl_opts=None, ydl_pool=None):
+    """
+    Получить информацию о видео без загрузки, используя кэш
+
+    Returns:
+        (info, из_кэша)
+    """
+    if info_cache and not bypass:
+        info = info_cache.get(url)
+        if info is not None:
+            return info, True
+
+    with _open_ydl(ydl_opts or {'quiet': True, 'no_warnings': True}, ydl_pool) as ydl:
+        info = ydl.sanitize_info(ydl.extract_info(url, download=False), remove_private_keys=True)
+
+    if info_cache:
+        info_cache.put(url, info)
+    return info, False
+
+
+def expand_collection(url, ydl_pool=None, known=None, stop_after_known=0, max_depth=2):
+    """
+    Развернуть плейлист или канал в список видео (плоская экстракция без загрузки)
+
+    Страницы плейлиста запрашиваются по мере перебора, поэтому при
+    stop_after_known > 0 перебор канала прекращается, как только встретилось
+    столько известных видео подряд.
+
+    Args:
+        known: множество канонических ключей уже виденных видео
+        stop_after_known: сколько известных подряд означает, что дальше только старые
+        max_depth: глубина вложенности (вкладки канала - это плейлисты)
+
+    Returns:
+        (название, [{'url', 'title', 'key'}, ...]) в порядке источника
+    """
+    known = known or set()
+    opts = {'quiet': True, 'no_warnings': True, 'extract_flat': 'in_playlist', 'lazy_playlist': True}
+    entries = []
+    seen = set()
+
+    def walk(result, depth):
+        known_in_row = 0
+        # entries может быть ленивым списком (PagedList / генератор) - не приводим к list
+        for entry in result.get('entries') or ():
+            if not entry:
+                continue
+            entry_url = entry.get('url') or entry.get('webpage_url')
+            if not entry_url:
+                continue
+            nested = (entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+                      or collection_kind(entry_url))
+            if nested:
+                if depth < max_depth:
+                    walk(resolve(entry_url), depth + 1)
+                continue
+
+            key = canonical_url(entry_url)
+            if key in seen:
+                continue
+            seen.add(key)
+            entries.append({'url': entry_url, 'title': entry.get('title'), 'key': key})
+
+            known_in_row = known_in_row + 1 if key in known else 0
+            if stop_after_known and known_in_row >= stop_after_known:
+                break
+
+    def resolve(target):
+        result = ydl.extract_info(target, download=False, process=False)
+        # Ссылка на канал может сначала перенаправить на вкладку
+        for _ in range(max_depth):
+            if result.get('_type') not in ('url', 'url_transparent'):
+                break
+            result = ydl.extract_info(result['url'], download=False, process=False)
+        return result
+
+    with _open_ydl(opts, ydl_pool) as ydl:
+        result = resolve(url)
+        if result.get('_type') not in ('playlist', 'multi_video'):
+            # Это одно видео
+            video_url = result.get('webpage_url') or url
+            return result.get('title'), [{'url': video_url, 'title': result.get('title'),
+                                          'key': canonical_url(video_url)}]
+        walk(result, 0)
+        return result.get('title'), entries
+
+
+def _run_download(ydl_opts, item, info_cache=None, ydl_pool=None):
+    """Загрузка по готовым опциям; при наличии - из кэшированной информации"""
+    import yt_dlp
+    url = item['url']
+    with _open_ydl(ydl_opts, ydl_pool) as ydl:
+        cached = info_cache.get(url) if info_cache and not item.get('refresh_info') else None
+        if cached is not None:
+            try:
+                # Повторная экстракция не нужна: выбираем формат из сохранённого словаря
+                return ydl.process_ie_result(cached, download=True)
+            except yt_dlp.utils.DownloadError:
+                # Ссылки на форматы могли устареть - получаем информацию заново
+                info_cache.delete(url)
+
+        info = ydl.extract_info(url, download=True)
+        if info_cache:
+            info_cache.put(url, ydl.sanitize_info(info, remove_private_keys=True))
+        return info
+
+
+class IntegrityError(Exception):
+    """Скачанный файл не совпал с ожидаемым размером или контрольной суммой"""
+
+
+class CircuitOpenError(Exception):
+    """Загрузки с сайта приостановлены предохранителем (CircuitBreaker)"""
+
+    error_kind = 'paused'
+
+    def __init__(self, site, retry_after):
+        super().__init__(f"Загрузки с {site} приостановлены после ошибок подряд, "
+                         f"повтор через {format_eta(retry_after)}")
+        self.site = site
+        self.retry_after = retry_after
+
+
+def classify_error(error):
+    """
+    Класс ошибки загрузки
+
+    Returns:
+        'network' - временный сбой сети, 'rate_limit' - HTTP 429, 'forbidden' - HTTP 403,
+        'geo' - региональная блокировка, 'permanent' - повтор не поможет
+    """
+    if isinstance(error, IntegrityError):
+        return 'network'  # Повреждение при передаче - скачиваем ещё раз
+
+    # Исходная ошибка: yt-dlp заворачивает её в DownloadError / ExtractorError
+    chain = []
+    current = error
+    while current is not None and current not in chain and len(chain) < 10:
+        chain.append(current)
+        exc_info = getattr(current, 'exc_info', None)
+        current = (getattr(current, 'cause', None) or (exc_info[1] if exc_info else None)
+                   or current.__cause__ or current.__context__)
+
+    for exc in chain:
+        status = getattr(exc, 'status', None) or getattr(exc, 'code', None)
+        if status == 429:
+            return 'rate_limit'
+        if status == 403:
+            return 'forbidden'
+        if type(exc).__name__ == 'GeoRestrictedError':
+            return 'geo'
+
+    text = ' '.join(str(exc) for exc in chain).lower()
+    for kind, patterns in ERROR_PATTERNS:
+        if any(pattern in text for pattern in patterns):
+            return kind
+
+    if any(isinstance(exc, (OSError, TimeoutError)) for exc in chain):
+        return 'network'
+    return 'permanent'
+
+
+def file_checksum(path, algorithm):
+    """Контрольная сумма файла (читается блоками по 1 MB)"""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def verify_file(path, fmt, total_bytes=None):
+    """
+    Сверить файл с описанием формата yt-dlp
+
+    Точный размер ('filesize' или Content-Length из total_bytes) должен
+    совпасть. Примерный ('filesize_approx') - только оценка сайта: если
+    файл меньше на APPROX_SIZE_TOLERANCE и более, возвращается
+    предупреждение, а файл считается скачанным. Контрольная сумма
+    проверяется, если сайт её сообщил.
+
+    Args:
+        total_bytes: размер по Content-Length, известный во время загрузки
+
+    Returns:
+        текст предупреждения или None
+
+    Raises:
+        IntegrityError
+    """
+    size = os.path.getsize(path)
+    expected_size = fmt.get('filesize') or total_bytes
+    warning = None
+    if expected_size:
+        if size != expected_size:
+            raise IntegrityError(f"{os.path.basename(path)}: размер {size} вместо {expected_size}")
+    elif fmt.get('filesize_approx'):
+        if size < fmt['filesize_approx'] * (1 - APPROX_SIZE_TOLERANCE):
+            warning = (f"{os.path.basename(path)}: размер {format_size(size)}, "
+                       f"сайт оценивал около {format_size(fmt['filesize_approx'])}")
+
+    for algorithm in CHECKSUM_KEYS:
+        expected = fmt.get(algorithm)
+        if expected:
+            if file_checksum(path, algorithm) != str(expected).lower():
+                raise IntegrityError(f"{os.path.basename(path)}: не совпала сумма {algorithm}")
+            break
+    return warning
+
+
+class DownloadMonitor:
+    """
+    Наблюдение за загрузкой одной задачи через хук прогресса
+
+    Сохраняет в journal состояние частичной загрузки (выбранный формат и
+    .part-файлы), чтобы после сбоя продолжить с того же места, и проверяет
+    каждый скачанный файл до слияния дорожек.
+    """
+
+    def __init__(self, item, journal=None):
+        """
+        Args:
+            item: словарь задачи
+            journal: объект с методом save_partial(item, state) или None
+        """
+        self.item = item
+        self.journal = journal
+        self.files = []  # Временные файлы в порядке начала загрузки
+        self.format_ids = []
+        self.errors = []
+        self.warnings = []  # Несовпадения с примерным размером: файл оставлен
+        self.sizes = {}  # Размер по Content-Length для каждого файла
+
+    def resume_format(self, fmt):
+        """Строка формата, повторяющая выбор прошлой попытки"""
+        pinned = '+'.join(self.format_ids)
+        if len(self.format_ids) == 1:
+            # Вторая дорожка ещё не начиналась - подбираем её так же, как в первый раз
+            if fmt.get('acodec') == 'none':
+                pinned += '+bestaudio'
+            elif fmt.get('vcodec') == 'none' and self.item.get('quality') != 'audio':
+                pinned = f"bestvideo+{pinned}"
+        return pinned
+
+    def hook(self, d):
+        """Хук прогресса yt-dlp"""
+        fmt = d.get('info_dict') or {}
+        if d.get('status') == 'downloading':
+            if d.get('total_bytes') and d.get('filename'):
+                self.sizes[d['filename']] = d['total_bytes']
+            tmpfilename = d.get('tmpfilename') or d.get('filename')
+            if not tmpfilename or tmpfilename in self.files:
+                return
+            self.files.append(tmpfilename)
+            if fmt.get('format_id') and fmt['format_id'] not in self.format_ids:
+                self.format_ids.append(fmt['format_id'])
+            if self.journal:
+                try:
+                    self.journal.save_partial(self.item, {
+                        'format': self.resume_format(fmt),
+                        'files': self.files,
+                        'downloaded_bytes': d.get('downloaded_bytes') or 0,
+                    })
+                except Exception:
+                    pass
+        elif d.get('status') == 'finished' and d.get('filename'):
+            try:
+                warning = verify_file(d['filename'], fmt, self.sizes.get(d['filename']))
+                if warning:
+                    self.warnings.append(warning)
+            except IntegrityError as e:
+                self.errors.append(e)
+                # Готовый файл yt-dlp посчитал бы уже скачанным - удаляем, чтобы скачать заново
+                try:
+                    os.remove(d['filename'])
+                except OSError:
+                    pass
+            except OSError:
+                pass
+
+    def check(self, info=None):
+        """
+        Поднять IntegrityError, если проверка какого-либо файла не прошла,
+        или если итогового файла нет / он пустой
+        """
+        if self.errors:
+            raise self.errors[0]
+        for download in (info or {}).get('requested_downloads') or []:
+            path = download.get('filepath')
+            if path and (not os.path.exists(path) or os.path.getsize(path) == 0):
+                raise IntegrityError(f"{os.path.basename(path)}: итоговый файл отсутствует или пуст")
+
+
+def download_item(item, progress_hook=None, scheduler=None, job=None, info_cache=None, ydl_pool=None,
+                  journal=None):
+    """
+    Скачать один элемент очереди и вернуть словарь информации yt-dlp
+
+    Args:
+        item: словарь задачи ('refresh_info': True - не брать информацию из кэша)
+        progress_hook: функция обработки прогресса yt-dlp
+        scheduler: общий BandwidthScheduler (лимит скорости вместо 'ratelimit')
+        job: слот, уже полученный у scheduler (иначе будет получен здесь)
+        info_cache: InfoCache для повторного использования информации о видео
+        ydl_pool: YoutubeDLPool для повторного использования экземпляров YoutubeDL
+        journal: хранилище состояния частичных загрузок (метод save_partial(item, state))
+
+    Returns:
+        информация yt-dlp; '_integrity_warnings' - файлы меньше примерного размера (не удаляются)
+
+    Raises:
+        IntegrityError: файл скачан, но не прошёл проверку (он удаляется)
+    """
+    monitor = DownloadMonitor(item, journal)
+    own_job = scheduler is not None and job is None
+    if own_job:
+        job = scheduler.acquire(item['url'], connections=clamp_fragments(item.get('fragments', 1)))
+
+    def hook(d):
+        if scheduler:
+            scheduler.throttle(job, d)
+        monitor.hook(d)
+        if progress_hook:
+            progress_hook(d)
+
+    try:
+        # Если есть планировщик, скорость ограничивает он, а не yt-dlp.
+        # Внешний загрузчик не вызывает хук во время загрузки - ему передаём
+        # долю общего лимита на момент старта. Фрагментов - не больше
+        # соединений, выданных планировщиком
+        if scheduler:
+            external = resolve_downloader(item.get('downloader')) != 'native'
+            item_opts = dict(item, speed_limit=job.bucket.rate // 1024 if external else 0,
+                             fragments=job.connections)
+        else:
+            item_opts = item
+        ydl_opts = build_ydl_opts(item_opts, hook)
+        try:
+            info = _run_download(ydl_opts, item, info_cache, ydl_pool)
+        except Exception:
+            # Ошибка слияния после удаления повреждённой дорожки - сообщаем о причине
+            monitor.check()
+            raise
+        monitor.check(info)
+        if monitor.warnings:
+            # Как '_filename' yt-dlp: служебное поле, в кэш информации не попадает
+            info['_integrity_warnings'] = monitor.warnings
+        return info
+    finally:
+        if own_job:
+            scheduler.release(job)
+
+
+def download_with_retry(item, progress_hook=None, scheduler=None, info_cache=None, ydl_pool=None,
+                        journal=None, retry_policy=None, breaker=None, on_retry=None):
+    """
+    Скачать одну задачу, повторяя временные ошибки (поток ждёт между попытками)
+
+    Args:
+        retry_policy: RetryPolicy (по умолчанию - стандартная)
+        breaker: CircuitBreaker, которому сообщаются результаты попыток
+        on_retry: функция (item, exception, kind, delay) перед повтором
+        остальные - как у download_item
+
+    Raises:
+        CircuitOpenError: сайт приостановлен предохранителем (загрузка не начиналась)
+        исключение последней попытки; его класс - в атрибуте error_kind
+    """
+    retry_policy = retry_policy or RetryPolicy()
+    site = BandwidthScheduler.host_key(item['url'])
+    while True:
+        wait = breaker.allow(site) if breaker else 0
+        if wait:
+            raise CircuitOpenError(site, wait)
+        item['attempts'] = item.get('attempts', 0) + 1
+        try:
+            info = download_item(item, progress_hook, scheduler, info_cache=info_cache,
+                                 ydl_pool=ydl_pool, journal=journal)
+        except Exception as e:
+            kind = classify_error(e)
+            if breaker:
+                breaker.record_failure(site, kind)
+            if not retry_policy.should_retry(kind, item['attempts']):
+                e.error_kind = kind
+                raise
+            delay = retry_policy.delay(kind, item['attempts'])
+            if kind == 'forbidden':
+                item['refresh_info'] = True
+            if on_retry:
+                on_retry(item, e, kind, delay)
+            time.sleep(delay)
+        else:
+            if breaker:
+                breaker.record_success(site)
+            return info
+
+
+class InfoCache:
+    """
+    Дисковый кэш информации о видео (результатов extract_info)
+
+    Записи живут ttl секунд; при превышении max_mb вытесняются
+    давно не использованные (LRU).
+    """
+
+    def __init__(self, db_path=None, ttl=DEFAULT_INFO_CACHE_TTL, max_mb=DEFAULT_INFO_CACHE_MB):
+        self.db_path = Path(db_path) if db_path else Path.home() / ".videodownloader" / "info_cache.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._local = threading.local()
+        with self.connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS info_cache (
+                    key TEXT PRIMARY KEY,
+                    info BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    accessed REAL NOT NULL
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_info_cache_accessed ON info_cache(accessed)')
+
+    def connect(self):
+        """Соединение текущего потока"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, url):
+        """Информация из кэша или None (нет записи или истёк срок)"""
+        key = normalize_url(url)
+        conn = self.connect()
+        row = conn.execute('SELECT info, created FROM info_cache WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+
+        now = time.time()
+        with conn:
+            if now - row[1] > self.ttl:
+                conn.execute('DELETE FROM info_cache WHERE key = ?', (key,))
+                return None
+            conn.execute('UPDATE info_cache SET accessed = ? WHERE key = ?', (now, key))
+        return json.loads(zlib.decompress(row[0]))
+
+    def peek(self, url):
+        """Информация из кэша без учёта срока и без обновления LRU"""
+        row = self.connect().execute('SELECT info FROM info_cache WHERE key = ?',
+                                     (normalize_url(url),)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, url, info):
+        """Сохранить информацию (под исходным URL и под webpage_url)"""
+        data = zlib.compress(json.dumps(info, ensure_ascii=False).encode('utf-8'))
+        keys = {normalize_url(url)}
+        if info.get('webpage_url'):
+            keys.add(normalize_url(info['webpage_url']))
+
+        now = time.time()
+        conn = self.connect()
+        with conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO info_cache (key, info, size, created, accessed) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(key, data, len(data), now, now) for key in keys]
+            )
+            self._evict(conn)
+
+    def delete(self, url):
+        """Удалить запись"""
+        conn = self.connect()
+        with conn:
+            conn.execute('DELETE FROM info_cache WHERE key = ?', (normalize_url(url),))
+
+    def clear(self):
+        """Очистить кэш"""
+        conn = self.connect()
+        with conn:
+            conn.execute('DELETE FROM info_cache')
+
+    def _evict(self, conn):
+        """Вытеснить давно не использованные записи сверх лимита размера"""
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM info_cache').fetchone()[0]
+        excess = total - self.max_bytes
+        if excess <= 0:
+            return
+
+        expired = []
+        for key, size in conn.execute('SELECT key, size FROM info_cache ORDER BY accessed'):
+            expired.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM info_cache WHERE key = ?', expired)
+
+
+class _ProgressDispatcher:
+    """Постоянный хук прогресса экземпляра из пула; передаёт события хукам текущей задачи"""
+
+    def __init__(self):
+        self.hooks = []
+
+    def __call__(self, d):
+        for hook in self.hooks:
+            hook(d)
+
+
+class YoutubeDLPool:
+    """
+    Пул долгоживущих экземпляров yt_dlp.YoutubeDL
+
+    Экземпляры группируются по отпечатку опций (формат, cookies, лимит
+    скорости, субтитры, папка): между загрузками сохраняются инициализированные
+    экстракторы, загруженный файл cookies и открытые HTTP-соединения.
+    Экземпляр выдаётся одному потоку за раз.
+    """
+
+    def __init__(self, max_idle=DEFAULT_YDL_POOL_SIZE):
+        """
+        Args:
+            max_idle: сколько простаивающих экземпляров хранить (лишние закрываются)
+        """
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = OrderedDict()  # Отпечаток -> список (экземпляр, диспетчер), по давности
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(ydl_opts):
+        """Отпечаток опций без хуков прогресса (они подменяются при каждой выдаче)"""
+        opts = {key: value for key, value in ydl_opts.items() if key != 'progress_hooks'}
+        return json.dumps(opts, sort_keys=True, default=repr)
+
+    @contextmanager
+    def checkout(self, ydl_opts):
+        """
+        Взять экземпляр для опций ydl_opts (with pool.checkout(opts) as ydl: ...)
+
+        Хуки прогресса из ydl_opts действуют только до возврата экземпляра.
+        """
+        key = self.fingerprint(ydl_opts)
+        with self._lock:
+            entries = self._idle.get(key)
+            entry = entries.pop() if entries else None
+            if entries is not None and not entries:
+                del self._idle[key]
+            if entry:
+                self.reused += 1
+
+        if entry is None:
+            import yt_dlp
+            dispatcher = _ProgressDispatcher()
+            ydl = yt_dlp.YoutubeDL(dict(ydl_opts, progress_hooks=[dispatcher]))
+            entry = (ydl, dispatcher)
+            with self._lock:
+                self.created += 1
+
+        ydl, dispatcher = entry
+        dispatcher.hooks = list(ydl_opts.get('progress_hooks') or [])
+        try:
+            yield ydl
+        except Exception as e:
+            import yt_dlp
+            dispatcher.hooks = []
+            if isinstance(e, yt_dlp.utils.DownloadError):
+                # Обычная ошибка загрузки: экземпляр исправен
+                self._checkin(key, entry)
+            else:
+                self._close(ydl)
+            raise
+        except BaseException:
+            # Прерывание посреди загрузки: состояние экземпляра не гарантировано
+            self._close(ydl)
+            raise
+        else:
+            dispatcher.hooks = []
+            self._checkin(key, entry)
+
+    def _checkin(self, key, entry):
+        """Вернуть экземпляр в пул, закрыв самые старые сверх лимита"""
+        evicted = []
+        with self._lock:
+            self._idle.setdefault(key, []).append(entry)
+            self._idle.move_to_end(key)
+            while sum(len(entries) for entries in self._idle.values()) > self.max_idle:
+                oldest_key, entries = next(iter(self._idle.items()))
+                evicted.append(entries.pop(0))
+                if not entries:
+                    del self._idle[oldest_key]
+        for ydl, _ in evicted:
+            self._close(ydl)
+
+    @staticmethod
+    def _close(ydl):
+        """Закрыть экземпляр (сохраняет cookies и закрывает соединения)"""
+        try:
+            ydl.close()
+        except Exception:
+            pass
+
+    def close(self):
+        """Закрыть все простаивающие экземпляры"""
+        with self._lock:
+            entries = [entry for group in self._idle.values() for entry in group]
+            self._idle.clear()
+        for ydl, _ in entries:
+            self._close(ydl)
+
+
+class TokenBucket:
+    """Корзина токенов: ограничивает поток байт заданной скоростью"""
+
+    def __init__(self, rate=0):
+        """
+        Args:
+            rate: байт в секунду (0 = без ограничений)
+        """
+        self._lock = threading.Lock()
+        self.rate = 0
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+        self.set_rate(rate)
+
+    def set_rate(self, rate):
+        """Изменить скорость; запас токенов не больше одной секунды"""
+        with self._lock:
+            self._refill()
+            self.rate = max(0, rate)
+            self.tokens = min(self.tokens, float(self.rate))
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate:
+            self.tokens = min(float(self.rate), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, amount):
+        """
+        Списать уже полученные байты и подождать, если лимит превышен
+
+        Returns:
+            время ожидания в секундах
+        """
+        with self._lock:
+            if not self.rate:
+                return 0.0
+            self._refill()
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class BandwidthJob:
+    """Слот активной загрузки в BandwidthScheduler"""
+
+    def __init__(self, url, host_key, connections=1):
+        self.url = url
+        self.host_key = host_key
+        self.connections = connections  # Соединений к сайту (фрагментов параллельно)
+        self.bucket = TokenBucket()
+        self.filename = None
+        self.last_bytes = 0
+
+
+class BandwidthScheduler:
+    """
+    Общий планировщик полосы для всех активных загрузок
+
+    Делит общий лимит (KB/s) поровну между активными загрузками и
+    ограничивает число одновременных соединений к каждому сайту.
+    Каждая загрузка сначала получает одно соединение; параллельные
+    фрагменты - только из свободных, не больше доли сайта на загрузку.
+    """
+
+    def __init__(self, limit_kbps=0, host_limits=None):
+        """
+        Args:
+            limit_kbps: общий лимит скорости в KB/s (0 = без ограничений)
+            host_limits: словарь {сайт: соединений}, ключ 'default' для прочих хостов
+        """
+        self._cond = threading.Condition()
+        self._jobs = []
+        self._host_counts = {}  # Соединений к сайту
+        self._host_jobs = {}  # Загрузок с сайта
+        self.limit = 0
+        self.host_limits = dict(DEFAULT_HOST_LIMITS)
+        self.set_host_limits(host_limits)
+        self.set_limit(limit_kbps)
+
+    @staticmethod
+    def host_key(url):
+        """Ключ лимита: известный сайт или имя хоста"""
+        site = get_site(url)
+        return site if site != 'other' else get_host(url)
+
+    def set_limit(self, limit_kbps):
+        """Изменить общий лимит скорости"""
+        try:
+            limit_kbps = int(limit_kbps or 0)
+        except (TypeError, ValueError):
+            limit_kbps = 0
+        with self._cond:
+            self.limit = max(0, limit_kbps) * 1024
+            self._rebalance()
+
+    def set_host_limits(self, host_limits):
+        """Изменить лимиты соединений по сайтам"""
+        with self._cond:
+            for key, value in (host_limits or {}).items():
+                try:
+                    self.host_limits[key] = max(1, int(value))
+                except (TypeError, ValueError):
+                    pass
+            self._cond.notify_all()
+
+    def _host_limit(self, key):
+        return self.host_limits.get(key, self.host_limits.get('default', 4))
+
+    def _rebalance(self):
+        """Поровну разделить общий лимит между активными загрузками"""
+        share = self.limit // len(self._jobs) if self._jobs and self.limit else 0
+        for job in self._jobs:
+            job.bucket.set_rate(share)
+
+    def try_acquire(self, url, connections=1, peers=1):
+        """
+        Занять слот без ожидания; None, если лимит сайта исчерпан
+
+        Args:
+            connections: сколько соединений нужно загрузке (фрагментов параллельно);
+                job.connections - сколько выдано
+            peers: сколько загрузок ожидается с сайта одновременно (вместе с этой) -
+                фрагментов выдаётся не больше лимита сайта, делённого на них
+        """
+        key = self.host_key(url)
+        with self._cond:
+            if self._host_counts.get(key, 0) >= self._host_limit(key):
+                return None
+            return self._register(url, key, connections, peers)
+
+    def acquire(self, url, timeout=None, connections=1, peers=1):
+        """Занять слот, ожидая освобождения соединения к сайту (connections, peers - как в try_acquire)"""
+        key = self.host_key(url)
+        with self._cond:
+            if not self._cond.wait_for(
+                    lambda: self._host_counts.get(key, 0) < self._host_limit(key), timeout):
+                raise TimeoutError(f"Нет свободных соединений к {key}")
+            return self._register(url, key, connections, peers)
+
+    def _register(self, url, key, connections=1, peers=1):
+        # Одно соединение загрузке гарантировано; фрагменты - из свободных и не
+        # больше доли сайта, чтобы первая загрузка не заняла весь лимит
+        limit = self._host_limit(key)
+        count = self._host_counts.get(key, 0)
+        jobs = self._host_jobs.get(key, 0) + 1
+        share = limit // max(jobs, peers)
+        connections = max(1, min(connections, limit - count, share))
+        job = BandwidthJob(url, key, connections)
+        self._host_counts[key] = count + connections
+        self._host_jobs[key] = jobs
+        self._jobs.append(job)
+        self._rebalance()
+        return job
+
+    def release(self, job):
+        """Освободить слот загрузки"""
+        with self._cond:
+            if job in self._jobs:
+                self._jobs.remove(job)
+                self._host_counts[job.host_key] -= job.connections
+                self._host_jobs[job.host_key] -= 1
+                self._rebalance()
+            self._cond.notify_all()
+
+    def wait_for_slot(self, timeout):
+        """Подождать освобождения любого слота"""
+        with self._cond:
+            self._cond.wait(timeout)
+
+    def throttle(self, job, d):
+        """Хук прогресса yt-dlp: учесть скачанные байты и притормозить загрузку"""
+        if d.get('status') != 'downloading':
+            return
+        downloaded = d.get('downloaded_bytes') or 0
+        if d.get('filename') != job.filename:
+            # Новый файл (например, аудиодорожка после видео)
+            job.filename = d.get('filename')
+            job.last_bytes = 0
+        delta = downloaded - job.last_bytes
+        job.last_bytes = downloaded
+        if delta > 0:
+            job.bucket.consume(delta)
+
+
+class RetryPolicy:
+    """Когда и через сколько повторять неудачную загрузку"""
+
+    def __init__(self, max_attempts=DEFAULT_RETRY_ATTEMPTS, base_delay=DEFAULT_RETRY_DELAY,
+                 max_delay=MAX_RETRY_DELAY, jitter=RETRY_JITTER):
+        """
+        Args:
+            max_attempts: попыток всего (для временных сетевых ошибок)
+            base_delay: задержка перед первым повтором (сек), далее удваивается
+            max_delay: верхняя граница задержки (сек)
+            jitter: случайное уменьшение задержки (доля), чтобы повторы не шли волной
+        """
+        self.max_attempts = max(1, int(max_attempts))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def should_retry(self, kind, attempt):
+        """Повторять ли после неудачной попытки номер attempt (с 1)"""
+        limit = min(RETRY_LIMITS.get(kind, 0), self.max_attempts)
+        return attempt < limit
+
+    def delay(self, kind, attempt):
+        """Задержка перед следующей попыткой (экспоненциальная, со случайным разбросом)"""
+        base = self.base_delay * (6 if kind == 'rate_limit' else 1)
+        delay = min(self.max_delay, base * 2 ** (attempt - 1))
+        return delay * (1 - random.uniform(0, self.jitter))
+
+
+class CircuitBreaker:
+    """
+    Предохранители сайтов
+
+    После threshold временных ошибок подряд загрузки с сайта приостанавливаются
+    на cooldown секунд; затем пропускается одна пробная загрузка: успех
+    снимает блокировку, ошибка продлевает её. Ключ сайта - как у
+    BandwidthScheduler.host_key (неизвестные сайты - по имени хоста).
+    """
+
+    # Ошибки, говорящие о проблемах сайта или сети, а не конкретного видео
+    TRIP_KINDS = ('network', 'rate_limit', 'forbidden')
+
+    def __init__(self, threshold=DEFAULT_BREAKER_THRESHOLD, cooldown=DEFAULT_BREAKER_COOLDOWN):
+        self.threshold = max(1, int(threshold))
+        self.cooldown = cooldown
+        self._failures = {}  # Сайт -> ошибок подряд
+        self._open_until = {}  # Сайт -> время снятия блокировки
+        self._trial = set()  # Сайты, где идёт пробная загрузка
+        self._lock = threading.Lock()
+
+    def allow(self, site):
+        """0 - можно загружать, иначе через сколько секунд спросить снова"""
+        with self._lock:
+            until = self._open_until.get(site)
+            if until is None:
+                return 0
+            remaining = until - time.monotonic()
+            if remaining > 0:
+                return remaining
+            if site in self._trial:
+                return min(self.cooldown, 5)
+            self._trial.add(site)
+            return 0
+
+    def record_success(self, site):
+        """Загрузка с сайта удалась"""
+        with self._lock:
+            self._failures.pop(site, None)
+            self._open_until.pop(site, None)
+            self._trial.discard(site)
+
+    def record_failure(self, site, kind):
+        """
+        Загрузка с сайта не удалась
+
+        Returns:
+            True, если предохранитель сработал
+        """
+        with self._lock:
+            self._trial.discard(site)
+            if kind not in self.TRIP_KINDS:
+                return False
+            failures = self._failures.get(site, 0) + 1
+            self._failures[site] = failures
+            if failures >= self.threshold or site in self._open_until:
+                self._open_until[site] = time.monotonic() + self.cooldown
+                return True
+            return False
+
+    def open_sites(self):
+        """Заблокированные сайты и оставшееся время (сек)"""
+        now = time.monotonic()
+        with self._lock:
+            return {site: until - now for site, until in self._open_until.items() if until > now}
+
+
+class ProgressEvent:
+    """Снимок прогресса одной загрузки"""
+
+    def __init__(self, job_id, url, status, downloaded_bytes=0, total_bytes=0,
+                 speed=0, eta=None, filename='', job_bytes=0):
+        self.job_id = job_id
+        self.url = url
+        self.status = status  # 'downloading', 'finished', 'error', 'done'
+        self.downloaded_bytes = downloaded_bytes
+        self.total_bytes = total_bytes
+        self.speed = speed  # байт/с
+        self.eta = eta  # секунд
+        self.filename = filename
+        self.job_bytes = job_bytes  # байт по всем файлам задачи (видео + аудио)
+        self.timestamp = time.time()
+
+    @property
+    def percent(self):
+        """Процент загрузки текущего файла"""
+        if self.status in ('finished', 'done'):
+            return 100.0
+        if not self.total_bytes:
+            return 0.0
+        return min(100.0, self.downloaded_bytes * 100.0 / self.total_bytes)
+
+
+class ProgressTracker:
+    """
+    Сбор прогресса загрузок из хуков yt-dlp
+
+    Прореживает вызовы хука до заданной частоты на каждую загрузку, хранит
+    последние числовые значения и рассылает ProgressEvent подписчикам.
+    """
+
+    def __init__(self, rate_hz=DEFAULT_PROGRESS_RATE):
+        """
+        Args:
+            rate_hz: максимум событий 'downloading' в секунду на загрузку
+        """
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._subscribers = []
+        self._next_id = 1
+        self.session_bytes = 0  # Скачано за сессию по завершённым задачам
+        self.set_rate(rate_hz)
+
+    def set_rate(self, rate_hz):
+        """Изменить частоту событий"""
+        try:
+            rate_hz = float(rate_hz)
+        except (TypeError, ValueError):
+            rate_hz = DEFAULT_PROGRESS_RATE
+        self.interval = 1.0 / rate_hz if rate_hz > 0 else 0.0
+
+    def subscribe(self, callback):
+        """Подписаться на события: callback(event) вызывается из потока загрузки"""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def _job(self, item):
+        job = self._jobs.get(id(item))
+        if job is None:
+            job = {'id': self._next_id, 'url': item.get('url', ''), 'files': {},
+                   'last_emit': 0.0, 'event': None}
+            self._next_id += 1
+            self._jobs[id(item)] = job
+        return job
+
+    def update(self, item, d):
+        """
+        Хук прогресса yt-dlp для задачи item
+
+        Returns:
+            ProgressEvent, если событие не было отброшено прореживанием
+        """
+        status = d.get('status')
+        filename = d.get('filename', '')
+        total = d.get('total_bytes') or d.get('total_bytes_estimate') or 0
+        downloaded = d.get('downloaded_bytes') or 0
+        if status == 'finished':
+            downloaded = downloaded or total
+
+        with self._lock:
+            job = self._job(item)
+            job['files'][filename] = downloaded
+            now = time.monotonic()
+            if status == 'downloading' and now - job['last_emit'] < self.interval:
+                return None
+            job['last_emit'] = now
+            event = ProgressEvent(job['id'], job['url'], status, downloaded, total,
+                                  d.get('speed') or 0 if status == 'downloading' else 0,
+                                  d.get('eta'), filename, sum(job['files'].values()))
+            job['event'] = event
+            subscribers = list(self._subscribers)
+
+        self._notify(subscribers, event)
+        return event
+
+    def finish(self, item, status='done'):
+        """
+        Завершить задачу ('done', 'error' или 'retry' - попытка будет повторена)
+
+        Returns:
+            итоговый ProgressEvent (job_bytes - всего скачано байт)
+        """
+        with self._lock:
+            job = self._jobs.pop(id(item), None)
+            if job is None:
+                return None
+            job_bytes = sum(job['files'].values())
+            if status == 'done':
+                self.session_bytes += job_bytes
+            event = ProgressEvent(job['id'], job['url'], status, job_bytes, job_bytes,
+                                  job_bytes=job_bytes)
+            subscribers = list(self._subscribers)
+
+        self._notify(subscribers, event)
+        return event
+
+    @staticmethod
+    def _notify(subscribers, event):
+        for callback in subscribers:
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    def snapshot(self):
+        """Последние события всех активных задач"""
+        with self._lock:
+            return [job['event'] for job in self._jobs.values() if job['event']]
+
+    def total_speed(self):
+        """Суммарная скорость активных загрузок (байт/с)"""
+        return sum(event.speed for event in self.snapshot())
+
+
+class DownloadWorkerPool:
+    """
+    Пул потоков для параллельной загрузки элементов очереди
+
+    Неудачные задачи классифицируются (classify_error): временные ошибки
+    повторяются по retry_policy через отложенный возврат в очередь, так что
+    рабочие потоки не простаивают; сайты с ошибками подряд отключает breaker.
+    """
+
+    def __init__(self, download_queue, workers=4, scheduler=None, info_cache=None, progress_hook=None,
+                 on_start=None, on_success=None, on_error=None, on_finish=None, ydl_pool=None,
+                 journal=None, retry_policy=None, breaker=None, on_retry=None):
+        """
+        Args:
+            download_queue: очередь (queue.Queue) со словарями задач
+            workers: число одновременных загрузок (1-16)
+            scheduler: общий BandwidthScheduler (лимиты скорости и соединений)
+            info_cache: InfoCache для повторного использования информации о видео
+            progress_hook: функция (item, d) для прогресса каждой задачи
+            on_start: функция (item) перед началом загрузки
+            on_success: функция (item, info) после успешной загрузки
+            on_error: функция (item, exception, kind) после последней неудачной попытки
+            on_finish: функция (completed, failed) после опустошения очереди
+            ydl_pool: YoutubeDLPool, общий для всех потоков
+            journal: хранилище состояния частичных загрузок (см. download_item)
+            retry_policy: RetryPolicy (по умолчанию - стандартная)
+            breaker: CircuitBreaker (по умолчанию - свой для пула)
+            on_retry: функция (item, exception, kind, delay) перед отложенным повтором
+        """
+        self.download_queue = download_queue
+        self.workers = clamp_workers(workers)
+        self.scheduler = scheduler
+        self.info_cache = info_cache
+        self.progress_hook = progress_hook
+        self.on_start = on_start
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_finish = on_finish
+        self.ydl_pool = ydl_pool
+        self.journal = journal
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker or CircuitBreaker()
+        self.on_retry = on_retry
+
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._active_workers = 0
+        self._delayed = 0  # Задач, ожидающих возврата в очередь
+
+    @property
+    def is_running(self):
+        """Есть ли активные рабочие потоки"""
+        with self._lock:
+            return self._active_workers > 0
+
+    def start(self):
+        """Запустить рабочие потоки"""
+        self._stop_event.clear()
+        with self._lock:
+            self._active_workers = self.workers
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"download-worker-{index + 1}",
+                                      daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def stop(self):
+        """Не брать новые задачи (текущие загрузки завершатся)"""
+        self._stop_event.set()
+
+    def _make_hook(self, item):
+        """Привязать хук прогресса yt-dlp к конкретной задаче"""
+        if not self.progress_hook:
+            return None
+        return lambda d: self.progress_hook(item, d)
+
+    def _put_later(self, item, delay):
+        """Вернуть задачу в очередь через delay секунд, не занимая рабочий поток"""
+        def put():
+            # Сначала кладём задачу, потом уменьшаем счётчик: поток, увидевший
+            # ноль отложенных, обязательно увидит и непустую очередь
+            self.download_queue.put(item)
+            with self._lock:
+                self._delayed -= 1
+
+        with self._lock:
+            self._delayed += 1
+        timer = threading.Timer(delay, put)
+        timer.daemon = True
+        timer.start()
+
+    def _next_item(self):
+        """Следующая задача или None, если очередь пуста и отложенных задач нет"""
+        while not self._stop_event.is_set():
+            try:
+                return self.download_queue.get(timeout=0.5)
+            except Empty:
+                with self._lock:
+                    delayed = self._delayed
+                if delayed == 0 and self.download_queue.empty():
+                    return None
+        return None
+
+    def _handle_error(self, item, error):
+        """Повторить задачу позже или окончательно записать ошибку"""
+        kind = classify_error(error)
+        site = BandwidthScheduler.host_key(item['url'])
+        self.breaker.record_failure(site, kind)
+
+        attempt = item.get('attempts', 1)
+        if not self._stop_event.is_set() and self.retry_policy.should_retry(kind, attempt):
+            delay = self.retry_policy.delay(kind, attempt)
+            if kind == 'forbidden':
+                # Ссылки на форматы могли устареть - получим информацию заново
+                item['refresh_info'] = True
+            with self._lock:
+                self.retried += 1
+            if self.on_retry:
+                self.on_retry(item, error, kind, delay)
+            self._put_later(item, delay)
+            return
+
+        with self._lock:
+            self.failed += 1
+        if self.on_error:
+            self.on_error(item, error, kind)
+
+    def _worker(self):
+        """Цикл рабочего потока: брать задачи, пока очередь не опустеет"""
+        try:
+            while True:
+                item = self._next_item()
+                if item is None:
+                    break
+
+                job = None
+                if self.scheduler:
+                    # Остальные потоки скоро начнут свои загрузки - фрагментов не больше их доли
+                    peers = min(self.workers, self.download_queue.qsize() + 1)
+                    job = self.scheduler.try_acquire(item['url'], clamp_fragments(item.get('fragments', 1)),
+                                                     peers)
+                    if job is None:
+                        # Лимит соединений к сайту исчерпан: вернуть задачу в конец очереди
+                        self.download_queue.put(item)
+                        self.download_queue.task_done()
+                        self.scheduler.wait_for_slot(0.5)
+                        continue
+
+                site = BandwidthScheduler.host_key(item['url'])
+                wait = self.breaker.allow(site)
+                if wait:
+                    # Сайт временно отключён предохранителем
+                    if job:
+                        self.scheduler.release(job)
+                    self._put_later(item, wait)
+                    self.download_queue.task_done()
+                    continue
+
+                try:
+                    item['attempts'] = item.get('attempts', 0) + 1
+                    if self.on_start:
+                        self.on_start(item)
+                    info = download_item(item, self._make_hook(item), self.scheduler, job,
+                                         self.info_cache, self.ydl_pool, self.journal)
+                except Exception as e:
+                    self._handle_error(item, e)
+                else:
+                    self.breaker.record_success(site)
+                    with self._lock:
+                        self.completed += 1
+                    if self.on_success:
+                        try:
+                            self.on_success(item, info)
+                        except Exception as e:
+                            # Файл уже скачан: не повторяем, только сообщаем
+                            if self.on_error:
+                                self.on_error(item, e, 'permanent')
+                finally:
+                    if job:
+                        self.scheduler.release(job)
+                    self.download_queue.task_done()
+        finally:
+            with self._lock:
+                self._active_workers -= 1
+                last = self._active_workers == 0
+            if last and self.on_finish:
+                self.on_finish(self.completed, self.failed)
@@ -0,0 +1,2136 @@
+# -*- coding: utf-8 -*-
+"""
+Графический интерфейс Video Downloader (Tkinter)
+"""
+
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox, scrolledtext
+from tkinterdnd2 import DND_FILES, TkinterDnD  # Для Drag & Drop
+import threading
+import os
+import sys
+import subprocess
+from datetime import datetime
+from queue import Queue
+from collections import deque
+from themes import apply_theme
+from thumbnails import ThumbnailCache
+from converter import (BatchConverter, ConvertJob, benchmark_profiles, collect_inputs,
+                       CONVERT_FORMATS, CONVERT_QUALITIES, MEDIA_EXTENSIONS, PLAN_MODES, PROFILE_LABELS)
+from postprocess import PostProcessor, postprocess_settings, STAGE_LABELS
+from storage import Config, DownloadHistory, PersistentQueue, SubscriptionStore, HISTORY_PAGE_SIZE
+from engine import (DownloadWorkerPool, BandwidthScheduler, ProgressTracker, InfoCache, YoutubeDLPool,
+                    RetryPolicy, CircuitBreaker, classify_error, collection_kind,
+                    clamp_fragments, downloader_available, DOWNLOADERS, MAX_FRAGMENTS,
+                    download_with_retry, extract_info_cached, clamp_workers,
+                    format_size, format_eta, MIN_WORKERS, MAX_WORKERS)
+import shutil
+import time
+
+# PIL, pystray, plyer и schedule импортируются при первом использовании:
+# они не нужны, чтобы показать окно, а вместе заметно замедляют запуск
+
+
+# Лог: период отрисовки (мс), размер буфера и максимум строк в окне
+LOG_FLUSH_INTERVAL = 100
+LOG_BUFFER_SIZE = 5000
+LOG_MAX_LINES = 2000
+
+# Период обновления индикаторов прогресса (мс)
+PROGRESS_REFRESH_INTERVAL = 250
+
+# Задержка поиска по истории при вводе (мс)
+HISTORY_SEARCH_DELAY = 300
+
+# Подписи классов ошибок в списке неудачных загрузок
+ERROR_KIND_LABELS = {
+    'network': 'Сеть',
+    'rate_limit': 'HTTP 429',
+    'forbidden': 'HTTP 403',
+    'geo': 'Гео-блокировка',
+    'permanent': 'Постоянная',
+    'paused': 'Сайт приостановлен',
+}
+
+# Подписи состояний и приоритетов задач конвертации
+CONVERT_STATUS_LABELS = {
+    'queued': 'В очереди',
+    'running': 'Выполняется',
+    'done': 'Готово',
+    'error': 'Ошибка',
+    'cancelled': 'Отменено',
+}
+PRIORITY_LABELS = {'high': 'Высокий', 'normal': 'Обычный', 'low': 'Низкий'}
+
+
+class LogBuffer:
+    """Потокобезопасный кольцевой буфер сообщений лога"""
+    
+    def __init__(self, maxlen=LOG_BUFFER_SIZE):
+        self._lines = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+        self.dropped = 0  # Сообщений вытеснено до отрисовки
+    
+    def put(self, message):
+        """Добавить сообщение (из любого потока)"""
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self.dropped += 1
+            self._lines.append(message)
+    
+    def drain(self):
+        """Забрать все накопленные сообщения и число пропущенных"""
+        with self._lock:
+            lines = list(self._lines)
+            dropped = self.dropped
+            self._lines.clear()
+            self.dropped = 0
+        return lines, dropped
+
+
+class VideoDownloaderApp:
+    """Главный класс приложения с ВСЕМИ функциями"""
+    
+    def __init__(self, root, profiler=None):
+        self.root = root
+        self.profiler = profiler  # Замеры времени запуска (--profile-startup)
+        self.root.title("YouTube Video Downloader - Enhanced Edition")
+        self.root.geometry("900x700")
+        self.root.resizable(True, True)
+        
+        # Инициализация компонентов
+        self.config = Config()
+        self.history = DownloadHistory()
+        self.queue_store = PersistentQueue(self.history)  # Копия очереди на диске
+        self.subscriptions = SubscriptionStore(self.history)  # Плейлисты и каналы
+        self.download_queue = Queue()
+        self.queue_pool = None  # Пул потоков очереди
+        self.scheduler = BandwidthScheduler(self.config.get('speed_limit', 0),
+                                            self.config.get('host_limits'))
+        self.progress_tracker = ProgressTracker(self.config.get('progress_rate_hz'))
+        self.info_cache = InfoCache(ttl=self.config.get('info_cache_ttl'),
+                                    max_mb=self.config.get('info_cache_mb'))
+        self.ydl_pool = YoutubeDLPool()  # Экземпляры YoutubeDL, общие для загрузок
+        self.retry_policy = RetryPolicy(self.config.get('retry_attempts'), self.config.get('retry_delay'))
+        self.breaker = CircuitBreaker(self.config.get('breaker_threshold'),
+                                      self.config.get('breaker_cooldown'))
+        self.thumbnails = ThumbnailCache()
+        # Обработка загруженных файлов - свой пул, потоки загрузки её не ждут
+        self.postprocessor = PostProcessor(self.config.get('postprocess_workers'),
+                                           on_update=self.on_postprocess_update,
+                                           on_notify=self.on_postprocess_notify,
+                                           stall_timeout=self.config.get('convert_stall_timeout'))
+        self.queue_urls = []  # URL элементов в порядке списка очереди
+        self.scheduled_tasks = []  # Запланированные задачи
+        self.tray_icon = None  # Иконка в трее
+        self.log_buffer = LogBuffer()
+        
+        # Переменные
+        self.download_path = tk.StringVar(value=self.config.get('last_download_path'))
+        self.url = tk.StringVar()
+        self.quality = tk.StringVar(value="best")
+        self.is_downloading = False
+        self.current_preset = tk.StringVar(value="Нет")
+        
+        # Опции
+        self.download_subtitles = tk.BooleanVar(value=self.config.get('download_subtitles'))
+        self.subtitle_language = tk.StringVar(value=self.config.get('subtitle_language'))
+        self.speed_limit = tk.IntVar(value=self.config.get('speed_limit'))
+        self.use_cookies = tk.BooleanVar(value=False)
+        self.cookies_file = tk.StringVar()
+        self.refresh_info = tk.BooleanVar(value=False)  # Не брать информацию из кэша
+        self.queue_workers = tk.IntVar(value=clamp_workers(self.config.get('queue_workers', 4)))
+        self.fragments = tk.IntVar(value=clamp_fragments(self.config.get('fragments')))
+        self.downloader = tk.StringVar(value=self.config.get('downloader', 'native'))
+        self.mark_startup("компоненты")
+        
+        # Применяем тему
+        apply_theme(self.root, self.config.get('theme', 'default'))
+        self.mark_startup("тема")
+        
+        # UI
+        self.setup_ui()
+        self.mark_startup("вкладки")
+        self.setup_dragdrop()
+        self.setup_hotkeys()
+        self.setup_tray()
+        self.mark_startup("drag & drop, горячие клавиши, трей")
+        self.resume_queue()
+        self.mark_startup("восстановление очереди")
+        
+        # Запускаем отрисовку лога, прогресса и проверку планировщика
+        self.root.after(LOG_FLUSH_INTERVAL, self.flush_log)
+        self.root.after(PROGRESS_REFRESH_INTERVAL, self.refresh_progress)
+        self.root.after(60000, self.check_scheduled_tasks)
+        
+        # Автообновление ОТКЛЮЧЕНО для совместимости с PyInstaller
+        # Используйте кнопку "Обновить yt-dlp" для обновления
+    
+    def mark_startup(self, stage):
+        """Отметить этап запуска для --profile-startup"""
+        if self.profiler:
+            self.profiler.mark(stage)
+    
+    def setup_ui(self):
+        """Настройка интерфейса"""
+        # Создаём вкладки
+        notebook = ttk.Notebook(self.root)
+        notebook.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.notebook = notebook
+        self.lazy_tabs = {}  # Вкладка -> функция построения при первом открытии
+        
+        # Вкладка: Загрузка
+        download_tab = ttk.Frame(notebook)
+        notebook.add(download_tab, text="📥 Загрузка")
+        self.setup_download_tab(download_tab)
+        
+        # Вкладка: История
+        history_tab = ttk.Frame(notebook)
+        notebook.add(history_tab, text="📜 История")
+        self.setup_history_tab(history_tab)
+        
+        # Вкладка: Настройки
+        settings_tab = ttk.Frame(notebook)
+        notebook.add(settings_tab, text="⚙️ Настройки")
+        self.setup_settings_tab(settings_tab)
+        
+        # Вкладка: Очередь
+        queue_tab = ttk.Frame(notebook)
+        notebook.add(queue_tab, text="🔄 Очередь")
+        self.setup_queue_tab(queue_tab)
+        
+        # Вкладка: Планировщик (строится при первом открытии)
+        scheduler_tab = ttk.Frame(notebook)
+        notebook.add(scheduler_tab, text="⏰ Планировщик")
+        self.lazy_tabs[str(scheduler_tab)] = lambda: self.setup_scheduler_tab(scheduler_tab)
+        
+        # Вкладка: Конвертер (строится при первом открытии)
+        converter_tab = ttk.Frame(notebook)
+        notebook.add(converter_tab, text="🎬 Конвертер")
+        self.lazy_tabs[str(converter_tab)] = lambda: self.setup_converter_tab(converter_tab)
+        
+        notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
+    
+    def on_tab_changed(self, event=None):
+        """Построить содержимое вкладки при первом её открытии"""
+        build = self.lazy_tabs.pop(self.notebook.select(), None)
+        if build:
+            build()
+    
+    def setup_download_tab(self, parent):
+        """Вкладка загрузки"""
+        main_frame = ttk.Frame(parent, padding="10")
+        main_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Заголовок
+        title_label = ttk.Label(main_frame, text="YouTube Video Downloader", 
+                               font=("Arial", 16, "bold"))
+        title_label.grid(row=0, column=0, columnspan=4, pady=10)
+        
+        # URL ввод с Drag & Drop
+        url_label = ttk.Label(main_frame, text="URL видео (можно перетащить ссылку):", 
+                             font=("Arial", 10))
+        url_label.grid(row=1, column=0, sticky=tk.W, pady=5, columnspan=4)
+        
+        self.url_entry = ttk.Entry(main_frame, textvariable=self.url, width=80)
+        self.url_entry.grid(row=2, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        # Пресеты
+        preset_frame = ttk.Frame(main_frame)
+        preset_frame.grid(row=3, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Label(preset_frame, text="Пресет:").pack(side=tk.LEFT, padx=5)
+        preset_combo = ttk.Combobox(preset_frame, textvariable=self.current_preset,
+                                    values=["Нет"] + list(self.config.get('presets', {}).keys()),
+                                    width=20)
+        preset_combo.pack(side=tk.LEFT, padx=5)
+        preset_combo.bind('<<ComboboxSelected>>', self.apply_preset)
+        
+        # Качество
+        quality_label = ttk.Label(main_frame, text="Качество:", font=("Arial", 10))
+        quality_label.grid(row=4, column=0, sticky=tk.W, pady=5, columnspan=4)
+        
+        quality_frame = ttk.Frame(main_frame)
+        quality_frame.grid(row=5, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        qualities = [
+            ("Лучшее", "best"),
+            ("4K (2160p)", "2160"),
+            ("Full HD (1080p)", "1080"),
+            ("HD (720p)", "720"),
+            ("SD (480p)", "480"),
+            ("Только аудио (mp3)", "audio")
+        ]
+        
+        for idx, (text, value) in enumerate(qualities):
+            rb = ttk.Radiobutton(quality_frame, text=text, variable=self.quality, value=value)
+            rb.grid(row=0, column=idx, padx=5)
+        
+        # Опции
+        options_frame = ttk.LabelFrame(main_frame, text="Дополнительные опции", padding="10")
+        options_frame.grid(row=6, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=10)
+        
+        ttk.Checkbutton(options_frame, text="Скачать субтитры", 
+                       variable=self.download_subtitles).grid(row=0, column=0, sticky=tk.W)
+        ttk.Label(options_frame, text="Язык:").grid(row=0, column=1, padx=(20,5))
+        ttk.Entry(options_frame, textvariable=self.subtitle_language, width=5).grid(row=0, column=2)
+        
+        ttk.Checkbutton(options_frame, text="Использовать cookies", 
+                       variable=self.use_cookies).grid(row=1, column=0, sticky=tk.W)
+        ttk.Button(options_frame, text="Выбрать файл cookies", 
+                  command=self.browse_cookies).grid(row=1, column=1, padx=5)
+        
+        ttk.Label(options_frame, text="Общее ограничение скорости (KB/s на все загрузки, 0=без ограничений):").grid(
+            row=2, column=0, sticky=tk.W, columnspan=2)
+        ttk.Entry(options_frame, textvariable=self.speed_limit, width=10).grid(row=2, column=2)
+        
+        ttk.Checkbutton(options_frame, text="Обновить информацию (не использовать кэш)", 
+                       variable=self.refresh_info).grid(row=3, column=0, sticky=tk.W, columnspan=2)
+        
+        # Путь сохранения
+        path_label = ttk.Label(main_frame, text="Папка сохранения:", font=("Arial", 10))
+        path_label.grid(row=7, column=0, sticky=tk.W, pady=5, columnspan=4)
+        
+        path_frame = ttk.Frame(main_frame)
+        path_frame.grid(row=8, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        path_entry = ttk.Entry(path_frame, textvariable=self.download_path, width=70)
+        path_entry.grid(row=0, column=0, sticky=(tk.W, tk.E), padx=(0, 5))
+        
+        browse_button = ttk.Button(path_frame, text="Обзор...", command=self.browse_folder)
+        browse_button.grid(row=0, column=1)
+        
+        path_frame.columnconfigure(0, weight=1)
+        
+        # Кнопки действий
+        button_frame = ttk.Frame(main_frame)
+        button_frame.grid(row=9, column=0, columnspan=4, pady=15)
+        
+        self.download_button = ttk.Button(button_frame, text="Скачать видео", 
+                                         command=self.start_download, width=20)
+        self.download_button.grid(row=0, column=0, padx=5)
+        
+        ttk.Button(button_frame, text="Добавить в очередь", 
+                  command=self.add_to_queue, width=20).grid(row=0, column=1, padx=5)
+        
+        self.info_button = ttk.Button(button_frame, text="Получить информацию", 
+                                     command=self.get_video_info, width=20)
+        self.info_button.grid(row=0, column=2, padx=5)
+        
+        ttk.Button(button_frame, text="Очистить", 
+                  command=self.clear_log, width=15).grid(row=0, column=3, padx=5)
+        
+        self.update_button = ttk.Button(button_frame, text="Обновить yt-dlp", 
+                                       command=self.manual_update_ytdlp, width=15)
+        self.update_button.grid(row=0, column=4, padx=5)
+        
+        # Прогресс
+        progress_frame = ttk.Frame(main_frame)
+        progress_frame.grid(row=10, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        self.progress = ttk.Progressbar(progress_frame, mode='determinate', maximum=100)
+        self.progress.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        self.throughput_label = ttk.Label(progress_frame, text="", width=40, anchor=tk.E)
+        self.throughput_label.pack(side=tk.LEFT, padx=(10, 0))
+        
+        # Предпросмотр
+        preview_frame = ttk.LabelFrame(main_frame, text="Предпросмотр", padding="5")
+        preview_frame.grid(row=11, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=5)
+        
+        self.preview_label = ttk.Label(preview_frame, text="Нет предпросмотра")
+        self.preview_label.pack()
+        
+        # Лог
+        log_label = ttk.Label(main_frame, text="Лог операций:", font=("Arial", 10))
+        log_label.grid(row=12, column=0, sticky=tk.W, pady=5, columnspan=4)
+        
+        self.log_text = scrolledtext.ScrolledText(main_frame, height=10, width=100, 
+                                                  wrap=tk.WORD, state='disabled')
+        self.log_text.grid(row=13, column=0, columnspan=4, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        
+        # Информация
+        info_label = ttk.Label(main_frame, 
+                              text="Поддерживаются: YouTube, Pinterest, TikTok, Instagram и 1000+ других сайтов",
+                              font=("Arial", 8), foreground="gray")
+        info_label.grid(row=14, column=0, columnspan=4, pady=5)
+        
+        # Конфигурация весов
+        main_frame.columnconfigure(0, weight=1)
+        main_frame.rowconfigure(13, weight=1)
+    
+    def setup_history_tab(self, parent):
+        """Вкладка истории"""
+        frame = ttk.Frame(parent, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Заголовок
+        ttk.Label(frame, text="История загрузок", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Кнопки
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Button(btn_frame, text="Обновить", command=self.refresh_history).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Очистить историю", command=self.clear_history_confirm).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Экспорт...", command=self.export_history_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="📊 Статистика", command=self.show_statistics).pack(side=tk.LEFT, padx=5)
+        
+        # Поиск
+        search_frame = ttk.Frame(frame)
+        search_frame.pack(fill=tk.X, pady=5)
+        
+        ttk.Label(search_frame, text="Поиск:").pack(side=tk.LEFT, padx=5)
+        self.history_search = tk.StringVar()
+        search_entry = ttk.Entry(search_frame, textvariable=self.history_search, width=50)
+        search_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        search_entry.bind('<KeyRelease>', self.on_history_search)
+        search_entry.bind('<Return>', lambda e: self.refresh_history())
+        
+        self.history_status = ttk.Label(search_frame, text="", foreground="gray")
+        self.history_status.pack(side=tk.LEFT, padx=5)
+        
+        # Таблица истории (строки подгружаются порциями при прокрутке)
+        tree_frame = ttk.Frame(frame)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        
+        self.history_scrollbar = ttk.Scrollbar(tree_frame)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        self.history_tree = ttk.Treeview(tree_frame, columns=('date', 'title', 'quality', 'size'),
+                                        show='headings', yscrollcommand=self.on_history_scroll)
+        self.history_scrollbar.config(command=self.history_tree.yview)
+        
+        self.history_sort = 'date'
+        self.history_descending = True
+        self.history_loaded = 0
+        self.history_total = 0
+        self.history_last_row = None  # Последняя загруженная строка (начало следующей страницы)
+        self.history_search_job = None
+        self.history_page_pending = False
+        self.history_headings = {'date': 'Дата', 'title': 'Название', 'quality': 'Качество', 'size': 'Размер'}
+        for column, text in self.history_headings.items():
+            self.history_tree.heading(column, text=text,
+                                      command=lambda c=column: self.sort_history(c))
+        
+        self.history_tree.column('date', width=150)
+        self.history_tree.column('title', width=400)
+        self.history_tree.column('quality', width=100)
+        self.history_tree.column('size', width=100)
+        
+        self.history_tree.pack(fill=tk.BOTH, expand=True)
+        
+        # Загружаем историю
+        self.refresh_history()
+    
+    def setup_settings_tab(self, parent):
+        """Вкладка настроек"""
+        frame = ttk.Frame(parent, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Настройки приложения", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Информация об обновлении
+        info_frame = ttk.Frame(frame)
+        info_frame.pack(fill=tk.X, pady=10)
+        ttk.Label(info_frame, text="ℹ️ Для обновления yt-dlp используйте кнопку 'Обновить yt-dlp' на главной вкладке",
+                 wraplength=400, foreground="blue").pack(anchor=tk.W, padx=10)
+        
+        # Тема (placeholder для будущей реализации)
+        ttk.Label(frame, text="Тема интерфейса:", font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=(20,5))
+        theme_var = tk.StringVar(value=self.config.get('theme', 'default'))
+        theme_combo = ttk.Combobox(frame, textvariable=theme_var, values=['default', 'dark'], width=20)
+        theme_combo.pack(anchor=tk.W, padx=20)
+        
+        ttk.Label(frame, text="(Перезапустите приложение для применения темы)", 
+                 foreground="gray").pack(anchor=tk.W, padx=20)
+        
+        # Обработка после загрузки
+        ttk.Label(frame, text="После загрузки:", font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=(20,5))
+        postprocess_frame = ttk.Frame(frame)
+        postprocess_frame.pack(anchor=tk.W, padx=20)
+        postprocess_convert_var = tk.BooleanVar(value=self.config.get('postprocess_convert', False))
+        ttk.Checkbutton(postprocess_frame, text="Конвертировать в", 
+                       variable=postprocess_convert_var).grid(row=0, column=0, sticky=tk.W)
+        postprocess_format_var = tk.StringVar(value=self.config.get('postprocess_format', 'mp4').upper())
+        ttk.Combobox(postprocess_frame, textvariable=postprocess_format_var, values=CONVERT_FORMATS,
+                     width=8, state='readonly').grid(row=0, column=1, padx=5, sticky=tk.W)
+        postprocess_keep_var = tk.BooleanVar(value=self.config.get('postprocess_keep_original', False))
+        ttk.Checkbutton(postprocess_frame, text="оставить исходный файл", 
+                       variable=postprocess_keep_var).grid(row=0, column=2, padx=5, sticky=tk.W)
+        auto_organize_var = tk.BooleanVar(value=self.config.get('auto_organize', False))
+        ttk.Checkbutton(postprocess_frame, text="Раскладывать по папкам сайтов (YouTube, TikTok и т.д.)", 
+                       variable=auto_organize_var).grid(row=1, column=0, columnspan=3, sticky=tk.W)
+        postprocess_metadata_var = tk.BooleanVar(value=self.config.get('postprocess_metadata', False))
+        ttk.Checkbutton(postprocess_frame, text="Записывать название, автора и ссылку в теги файла", 
+                       variable=postprocess_metadata_var).grid(row=2, column=0, columnspan=3, sticky=tk.W)
+        postprocess_notify_var = tk.BooleanVar(value=self.config.get('postprocess_notify', False))
+        ttk.Checkbutton(postprocess_frame, text="Уведомлять о завершении обработки", 
+                       variable=postprocess_notify_var).grid(row=3, column=0, columnspan=3, sticky=tk.W)
+        
+        # Загрузчик
+        ttk.Label(frame, text="Загрузка:", font=("Arial", 10, "bold")).pack(anchor=tk.W, pady=(20,5))
+        downloader_frame = ttk.Frame(frame)
+        downloader_frame.pack(anchor=tk.W, padx=20)
+        ttk.Label(downloader_frame, text="Фрагментов параллельно (DASH/HLS):").grid(row=0, column=0, sticky=tk.W)
+        ttk.Spinbox(downloader_frame, from_=1, to=MAX_FRAGMENTS, textvariable=self.fragments,
+                    width=5).grid(row=0, column=1, padx=5, sticky=tk.W)
+        ttk.Label(downloader_frame, text="Загрузчик:").grid(row=1, column=0, sticky=tk.W, pady=(5,0))
+        downloader_combo = ttk.Combobox(downloader_frame, textvariable=self.downloader,
+                                        values=list(DOWNLOADERS), width=10, state='readonly')
+        downloader_combo.grid(row=1, column=1, padx=5, pady=(5,0), sticky=tk.W)
+        downloader_combo.bind('<<ComboboxSelected>>', self.check_downloader)
+        ttk.Label(frame, text="(aria2c используется, только если он установлен; иначе - встроенный загрузчик)", 
+                 foreground="gray").pack(anchor=tk.W, padx=20)
+        
+        # Кэш информации о видео
+        ttk.Button(frame, text="Очистить кэш информации о видео", 
+                  command=self.clear_info_cache).pack(anchor=tk.W, pady=(20,5))
+        
+        # Сохранить настройки
+        ttk.Button(frame, text="Сохранить настройки", 
+                  command=lambda: [
+                      self.config.set('theme', theme_var.get()),
+                      self.config.set('auto_organize', auto_organize_var.get()),
+                      self.config.set('postprocess_convert', postprocess_convert_var.get()),
+                      self.config.set('postprocess_format', postprocess_format_var.get().lower()),
+                      self.config.set('postprocess_keep_original', postprocess_keep_var.get()),
+                      self.config.set('postprocess_metadata', postprocess_metadata_var.get()),
+                      self.config.set('postprocess_notify', postprocess_notify_var.get()),
+                      self.save_downloader_settings(),
+                      messagebox.showinfo("Успех", "Настройки сохранены!")
+                  ]).pack(pady=20)
+    
+    def check_downloader(self, event=None):
+        """Предупредить, если выбранный внешний загрузчик не установлен"""
+        name = self.downloader.get()
+        if name != 'native' and not downloader_available(name):
+            self.log(f"⚠ {name} не найден в PATH: будет использован встроенный загрузчик")
+    
+    def save_downloader_settings(self):
+        """Сохранить число фрагментов и загрузчик по умолчанию"""
+        try:
+            fragments = clamp_fragments(self.fragments.get())
+        except tk.TclError:
+            fragments = clamp_fragments(self.config.get('fragments'))
+        self.fragments.set(fragments)
+        self.config.set('fragments', fragments)
+        self.config.set('downloader', self.downloader.get())
+    
+    def setup_queue_tab(self, parent):
+        """Вкладка очереди"""
+        frame = ttk.Frame(parent, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Очередь загрузок", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Кнопки управления
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(fill=tk.X, pady=5)
+        
+        self.start_queue_button = ttk.Button(btn_frame, text="Начать загрузку очереди", 
+                                            command=self.start_queue_processing)
+        self.start_queue_button.pack(side=tk.LEFT, padx=5)
+        
+        ttk.Button(btn_frame, text="Импорт из файла", command=self.import_urls_file).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Очистить очередь", command=self.clear_queue).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Синхронизировать каналы",
+                   command=self.sync_all_sources).pack(side=tk.LEFT, padx=5)
+        
+        ttk.Label(btn_frame, text="Параллельных загрузок:").pack(side=tk.LEFT, padx=(20, 5))
+        ttk.Spinbox(btn_frame, from_=MIN_WORKERS, to=MAX_WORKERS, textvariable=self.queue_workers,
+                    width=5).pack(side=tk.LEFT)
+        
+        # Активные загрузки
+        ttk.Label(frame, text="Активные загрузки:").pack(anchor=tk.W)
+        self.active_tree = ttk.Treeview(frame, columns=('url', 'progress', 'speed', 'eta'),
+                                        show='headings', height=6)
+        self.active_tree.heading('url', text='URL')
+        self.active_tree.heading('progress', text='Прогресс')
+        self.active_tree.heading('speed', text='Скорость')
+        self.active_tree.heading('eta', text='Осталось')
+        self.active_tree.column('url', width=350)
+        self.active_tree.column('progress', width=180)
+        self.active_tree.column('speed', width=100)
+        self.active_tree.column('eta', width=80)
+        self.active_tree.pack(fill=tk.X, pady=5)
+        
+        # Сайты, приостановленные предохранителем после ошибок подряд
+        self.paused_sites_label = ttk.Label(frame, text="", foreground="gray")
+        self.paused_sites_label.pack(anchor=tk.W)
+        
+        # Список очереди и превью выбранного элемента
+        list_frame = ttk.Frame(frame)
+        list_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.queue_listbox = tk.Listbox(list_frame, height=14)
+        self.queue_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.queue_listbox.bind('<<ListboxSelect>>', self.on_queue_select)
+        
+        self.queue_preview = ttk.Label(list_frame, text="Нет предпросмотра", width=28, anchor=tk.CENTER)
+        self.queue_preview.pack(side=tk.LEFT, padx=(10, 0))
+        
+        ttk.Label(frame, text=f"Элементов в очереди: 0", font=("Arial", 10)).pack()
+        
+        # Неудачные загрузки (вместо окон с ошибками)
+        failed_frame = ttk.LabelFrame(frame, text="Неудачные загрузки", padding="5")
+        failed_frame.pack(fill=tk.BOTH, pady=5)
+        
+        self.failed_tree = ttk.Treeview(failed_frame, columns=('url', 'kind', 'attempts', 'error'),
+                                        show='headings', height=5)
+        self.failed_tree.heading('url', text='URL')
+        self.failed_tree.heading('kind', text='Причина')
+        self.failed_tree.heading('attempts', text='Попыток')
+        self.failed_tree.heading('error', text='Ошибка')
+        self.failed_tree.column('url', width=250)
+        self.failed_tree.column('kind', width=110)
+        self.failed_tree.column('attempts', width=70)
+        self.failed_tree.column('error', width=300)
+        self.failed_tree.pack(fill=tk.BOTH, expand=True)
+        
+        failed_btn_frame = ttk.Frame(failed_frame)
+        failed_btn_frame.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(failed_btn_frame, text="Повторить выбранные",
+                   command=self.retry_selected_failed).pack(side=tk.LEFT, padx=5)
+        ttk.Button(failed_btn_frame, text="Повторить все",
+                   command=self.retry_all_failed).pack(side=tk.LEFT, padx=5)
+        ttk.Button(failed_btn_frame, text="Очистить список",
+                   command=self.clear_failed).pack(side=tk.LEFT, padx=5)
+    
+    def setup_scheduler_tab(self, parent):
+        """Вкладка планировщика"""
+        frame = ttk.Frame(parent, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Планировщик загрузок", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Форма добавления задачи
+        form_frame = ttk.LabelFrame(frame, text="Новая задача", padding="10")
+        form_frame.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(form_frame, text="URL:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.sched_url = ttk.Entry(form_frame, width=50)
+        self.sched_url.grid(row=0, column=1, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        
+        ttk.Label(form_frame, text="Время (ЧЧ:ММ):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.sched_time = ttk.Entry(form_frame, width=10)
+        self.sched_time.insert(0, "02:00")
+        self.sched_time.grid(row=1, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(form_frame, text="Повтор:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.sched_repeat = ttk.Combobox(form_frame, values=["Один раз", "Каждый день", "Каждую неделю"], width=15)
+        self.sched_repeat.set("Один раз")
+        self.sched_repeat.grid(row=2, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Button(form_frame, text="Добавить задачу", command=self.add_scheduled_task).grid(row=3, column=1, pady=10)
+        
+        # Список задач
+        ttk.Label(frame, text="Запланированные задачи:").pack(anchor=tk.W, pady=5)
+        self.scheduled_listbox = tk.Listbox(frame, height=10)
+        self.scheduled_listbox.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        btn_frame = ttk.Frame(frame)
+        btn_frame.pack(pady=5)
+        ttk.Button(btn_frame, text="Удалить выбранную", command=self.remove_scheduled_task).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Очистить все", command=self.clear_scheduled_tasks).pack(side=tk.LEFT, padx=5)
+    
+    def setup_converter_tab(self, parent):
+        """Вкладка конвертера"""
+        frame = ttk.Frame(parent, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Конвертер форматов", font=("Arial", 14, "bold")).pack(pady=10)
+        
+        # Выбор файлов
+        file_frame = ttk.Frame(frame)
+        file_frame.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(file_frame, text="Исходный файл:").pack(side=tk.LEFT, padx=5)
+        self.convert_input = ttk.Entry(file_frame, width=50)
+        self.convert_input.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        ttk.Button(file_frame, text="Обзор...", command=self.browse_convert_input).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Несколько файлов...",
+                   command=self.browse_convert_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(file_frame, text="Папка...", command=self.browse_convert_folder).pack(side=tk.LEFT, padx=5)
+        
+        # Формат конвертации
+        format_frame = ttk.LabelFrame(frame, text="Настройки конвертации", padding="10")
+        format_frame.pack(fill=tk.X, pady=10)
+        
+        ttk.Label(format_frame, text="Выходной формат:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        self.convert_format = ttk.Combobox(format_frame, values=CONVERT_FORMATS, width=10)
+        self.convert_format.set("MP4")
+        self.convert_format.grid(row=0, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(format_frame, text="Качество:").grid(row=1, column=0, sticky=tk.W, pady=5)
+        self.convert_quality = ttk.Combobox(format_frame, values=CONVERT_QUALITIES, width=15)
+        self.convert_quality.set("Оригинальное")
+        self.convert_quality.grid(row=1, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(format_frame, text="Приоритет:").grid(row=0, column=2, sticky=tk.W, padx=(30, 5), pady=5)
+        self.convert_priority = ttk.Combobox(format_frame, values=list(PRIORITY_LABELS.values()),
+                                             width=12, state='readonly')
+        self.convert_priority.set(PRIORITY_LABELS['normal'])
+        self.convert_priority.grid(row=0, column=3, sticky=tk.W, pady=5)
+        
+        ttk.Label(format_frame, text="Процессов ffmpeg (0 - по числу ядер):").grid(
+            row=1, column=2, sticky=tk.W, padx=(30, 5), pady=5)
+        self.convert_workers = tk.IntVar(value=self.config.get('convert_workers', 0))
+        ttk.Spinbox(format_frame, from_=0, to=os.cpu_count() or 1, textvariable=self.convert_workers,
+                    width=5).grid(row=1, column=3, sticky=tk.W, pady=5)
+        
+        ttk.Label(format_frame, text="Профиль кодирования:").grid(row=2, column=0, sticky=tk.W, pady=5)
+        self.convert_profile = ttk.Combobox(format_frame, values=list(PROFILE_LABELS.values()),
+                                            width=18, state='readonly')
+        self.convert_profile.set(PROFILE_LABELS.get(self.config.get('convert_profile'),
+                                                    PROFILE_LABELS['balanced']))
+        self.convert_profile.grid(row=2, column=1, sticky=tk.W, pady=5)
+        self.profile_benchmark_button = ttk.Button(format_frame, text="Тест скорости профилей",
+                                                   command=self.run_profile_benchmark)
+        self.profile_benchmark_button.grid(row=2, column=2, sticky=tk.W, padx=(30, 5), pady=5)
+        
+        # Кнопки
+        convert_btn_frame = ttk.Frame(frame)
+        convert_btn_frame.pack(pady=10)
+        ttk.Button(convert_btn_frame, text="Конвертировать", command=self.start_conversion,
+                   width=20).pack(side=tk.LEFT, padx=5)
+        ttk.Button(convert_btn_frame, text="Отменить выбранные",
+                   command=self.cancel_selected_conversions).pack(side=tk.LEFT, padx=5)
+        ttk.Button(convert_btn_frame, text="Отменить все",
+                   command=self.cancel_all_conversions).pack(side=tk.LEFT, padx=5)
+        ttk.Button(convert_btn_frame, text="Очистить завершённые",
+                   command=self.clear_finished_conversions).pack(side=tk.LEFT, padx=5)
+        
+        # Задачи конвертации
+        self.convert_tree = ttk.Treeview(frame, columns=('file', 'priority', 'status', 'mode', 'progress',
+                                                         'speed', 'eta', 'time'),
+                                         show='headings', height=8)
+        self.convert_tree.heading('file', text='Файл')
+        self.convert_tree.heading('priority', text='Приоритет')
+        self.convert_tree.heading('status', text='Состояние')
+        self.convert_tree.heading('mode', text='Способ')
+        self.convert_tree.heading('progress', text='Прогресс')
+        self.convert_tree.heading('speed', text='Скорость')
+        self.convert_tree.heading('eta', text='Осталось')
+        self.convert_tree.heading('time', text='Время')
+        self.convert_tree.column('file', width=300)
+        self.convert_tree.column('priority', width=90)
+        self.convert_tree.column('status', width=100)
+        self.convert_tree.column('mode', width=150)
+        self.convert_tree.column('progress', width=70)
+        self.convert_tree.column('speed', width=120)
+        self.convert_tree.column('eta', width=70)
+        self.convert_tree.column('time', width=70)
+        self.convert_tree.pack(fill=tk.BOTH, expand=True, pady=5)
+        
+        # Общий прогресс пакета
+        self.convert_progress = ttk.Progressbar(frame, mode='determinate', maximum=100)
+        self.convert_progress.pack(fill=tk.X, pady=5)
+        self.convert_summary = ttk.Label(frame, text="Нет задач")
+        self.convert_summary.pack(anchor=tk.W)
+        
+        self.batch_converter = BatchConverter(self.config.get('convert_workers', 0),
+                                              on_update=self.on_convert_update,
+                                              on_finish=self.on_convert_finished,
+                                              stall_timeout=self.config.get('convert_stall_timeout'))
+        self.convert_refresh_pending = set()  # Задачи, ждущие перерисовки
+        
+        # Лог конвертации
+        ttk.Label(frame, text="Лог конвертации:").pack(anchor=tk.W, pady=5)
+        self.convert_log = scrolledtext.ScrolledText(frame, height=6, wrap=tk.WORD, state='disabled')
+        self.convert_log.pack(fill=tk.BOTH, expand=True, pady=5)
+    
+    def setup_dragdrop(self):
+        """Настройка Drag & Drop"""
+        try:
+            self.url_entry.drop_target_register(DND_FILES)
+            self.url_entry.dnd_bind('<<Drop>>', self.on_drop)
+        except:
+            # Если tkinterdnd2 не установлен, просто пропускаем
+            pass
+    
+    def on_drop(self, event):
+        """Обработка Drag & Drop"""
+        data = event.data
+        # Извлекаем URL из данных
+        if data.startswith('http'):
+            self.url.set(data)
+            self.log("✓ URL добавлен через Drag & Drop")
+    
+    def setup_hotkeys(self):
+        """Настройка горячих клавиш"""
+        # Ctrl+V - вставить и скачать
+        self.root.bind('<Control-v>', lambda e: self.paste_and_download())
+        # Ctrl+D - скачать
+        self.root.bind('<Control-d>', lambda e: self.start_download())
+        # Ctrl+I - информация
+        self.root.bind('<Control-i>', lambda e: self.get_video_info())
+        # Ctrl+Q - добавить в очередь
+        self.root.bind('<Control-q>', lambda e: self.add_to_queue())
+        # Ctrl+U - обновить yt-dlp
+        self.root.bind('<Control-u>', lambda e: self.manual_update_ytdlp())
+        # Ctrl+H - открыть историю (переключить на вкладку истории)
+        # F5 - обновить историю
+        self.root.bind('<F5>', lambda e: self.refresh_history())
+        # Escape - очистить URL
+        self.root.bind('<Escape>', lambda e: self.url.set(""))
+        
+        self.log("✓ Горячие клавиши активированы")
+        self.log("  Ctrl+V: Вставить URL из буфера")
+        self.log("  Ctrl+D: Скачать видео, Ctrl+I: Получить информацию")
+        self.log("  Ctrl+Q: Добавить в очередь, Ctrl+U: Обновить yt-dlp")
+        self.log("  F5: Обновить историю, Esc: Очистить URL")
+    
+    def paste_and_download(self):
+        """Вставить URL из буфера обмена"""
+        try:
+            clipboard = self.root.clipboard_get()
+            if clipboard.startswith('http'):
+                self.url.set(clipboard)
+                self.log("✓ URL вставлен из буфера обмена (Ctrl+V)")
+                self.log("  Используйте Ctrl+D для загрузки")
+        except:
+            pass
+    
+    # ============= МЕТОДЫ ЗАГРУЗКИ =============
+    
+    def make_item(self, url):
+        """Собрать задачу загрузки из текущих настроек интерфейса"""
+        try:
+            speed_limit = self.speed_limit.get()
+        except tk.TclError:
+            speed_limit = 0
+        try:
+            fragments = clamp_fragments(self.fragments.get())
+        except tk.TclError:
+            fragments = clamp_fragments(self.config.get('fragments'))
+        
+        return {
+            'url': url,
+            'quality': self.quality.get(),
+            'subtitles': self.download_subtitles.get(),
+            'subtitle_language': self.subtitle_language.get(),
+            'speed_limit': speed_limit,
+            'cookiefile': self.cookies_file.get() if self.use_cookies.get() else '',
+            'download_path': self.download_path.get(),
+            'refresh_info': self.refresh_info.get(),
+            'fragments': fragments,
+            'downloader': self.downloader.get()
+        }
+    
+    def download_video(self):
+        """Загрузка видео"""
+        url = self.url.get().strip()
+        
+        if not url:
+            messagebox.showwarning("Предупреждение", "Пожалуйста, введите URL видео!")
+            return
+        
+        if not os.path.exists(self.download_path.get()):
+            messagebox.showerror("Ошибка", "Указанная папка не существует!")
+            return
+        
+        if collection_kind(url):
+            self.log("Это плейлист или канал: видео будут добавлены в очередь и загружены параллельно")
+            self.root.after(0, lambda: self.enqueue_collection(url, start=True))
+            return
+        
+        item = self.make_item(url)
+        
+        if self.config.get('skip_downloaded', True) and self.history.is_downloaded(url):
+            if not messagebox.askyesno("Уже скачано",
+                                       "Видео уже есть в истории загрузок.\nСкачать ещё раз?"):
+                self.log(f"Пропущено (уже скачано): {url}")
+                return
+        
+        try:
+            # Запись в очереди на диске: после сбоя загрузка продолжится при запуске
+            self.queue_store.add(item)
+            self.queue_store.mark_active(item)
+            
+            self.is_downloading = True
+            self.download_button.config(state='disabled')
+            self.info_button.config(state='disabled')
+            
+            self.log(f"Начало загрузки: {url}")
+            self.log(f"Качество: {self.quality.get()}")
+            self.log(f"Сохранение в: {self.download_path.get()}")
+            self.log("-" * 80)
+            
+            self.scheduler.set_limit(item['speed_limit'])
+            info = download_with_retry(item, lambda d: self.progress_hook(item, d), self.scheduler,
+                                       info_cache=self.info_cache, ydl_pool=self.ydl_pool,
+                                       journal=self.queue_store, retry_policy=self.retry_policy,
+                                       breaker=self.breaker, on_retry=self.on_download_retry)
+            final = self.progress_tracker.finish(item)
+            self.queue_store.mark_done(item)
+            
+            # Добавляем в историю
+            title = self.history.add_from_info(item, info, final.job_bytes if final else 0)
+            
+            self.log("-" * 80)
+            self.log("✓ Видео успешно загружено!")
+            self.log_integrity_warnings(info)
+            self.submit_postprocess(item, info)
+            
+            # Показываем уведомление
+            self.show_notification("Загрузка завершена!", 
+                                  f"Видео '{title}' успешно загружено")
+            
+            messagebox.showinfo("Успех", "Видео успешно загружено!")
+            
+        except Exception as e:
+            # Без модального окна: ошибка попадает в список неудачных загрузок
+            kind = getattr(e, 'error_kind', None) or classify_error(e)
+            self.progress_tracker.finish(item, 'error')
+            self.queue_store.mark_failed(item, e, kind)
+            self.log(f"✗ Ошибка ({ERROR_KIND_LABELS.get(kind, kind)}): {str(e)}")
+            self.add_failed_entry(item, e, kind)
+            self.show_notification("Ошибка загрузки", f"{item['url'][:50]}: {ERROR_KIND_LABELS.get(kind, kind)}")
+        
+        finally:
+            self.is_downloading = False
+            self.download_button.config(state='normal')
+            self.info_button.config(state='normal')
+    
+    def start_download(self):
+        """Запуск загрузки в отдельном потоке"""
+        if not self.is_downloading:
+            thread = threading.Thread(target=self.download_video, daemon=True)
+            thread.start()
+    
+    def progress_hook(self, item, d):
+        """Обработка прогресса загрузки (события прорежены ProgressTracker)"""
+        event = self.progress_tracker.update(item, d)
+        if event is None:
+            return
+        
+        if event.status == 'downloading':
+            self.log(f"Загрузка: {event.percent:.1f}% | Скорость: {format_size(event.speed)}/s | "
+                     f"Осталось: {format_eta(event.eta)}")
+        elif event.status == 'finished':
+            self.log("Загрузка завершена! Обработка файла...")
+    
+    def refresh_progress(self):
+        """Обновить индикаторы прогресса по последним событиям (в главном потоке)"""
+        try:
+            events = self.progress_tracker.snapshot()
+            
+            # Общий прогресс по текущим файлам активных загрузок
+            if str(self.progress.cget('mode')) == 'determinate':
+                total = sum(event.total_bytes for event in events)
+                done = sum(min(event.downloaded_bytes, event.total_bytes) for event in events)
+                self.progress['value'] = done * 100.0 / total if total else 0
+            
+            if events:
+                self.throughput_label.config(
+                    text=f"Скорость: {format_size(self.progress_tracker.total_speed())}/s | "
+                         f"Активных: {len(events)}")
+            else:
+                self.throughput_label.config(text="")
+            
+            # Таблица активных загрузок на вкладке очереди
+            current = set()
+            for event in events:
+                iid = str(event.job_id)
+                current.add(iid)
+                filled = int(event.percent / 10)
+                values = (event.url,
+                          f"{'█' * filled}{'░' * (10 - filled)} {event.percent:.0f}%",
+                          f"{format_size(event.speed)}/s",
+                          format_eta(event.eta))
+                if self.active_tree.exists(iid):
+                    self.active_tree.item(iid, values=values)
+                else:
+                    self.active_tree.insert('', 'end', iid=iid, values=values)
+            
+            for iid in self.active_tree.get_children():
+                if iid not in current:
+                    self.active_tree.delete(iid)
+            
+            paused = self.breaker.open_sites()
+            self.paused_sites_label.config(text="Приостановлены: " + ", ".join(
+                f"{site} (ещё {format_eta(left)})" for site, left in sorted(paused.items())) if paused else "")
+        finally:
+            self.root.after(PROGRESS_REFRESH_INTERVAL, self.refresh_progress)
+    
+    def start_busy(self):
+        """Показать неопределённый прогресс (получение информации, обновление)"""
+        def start():
+            self.progress.config(mode='indeterminate')
+            self.progress.start(10)
+        self.root.after(0, start)
+    
+    def stop_busy(self):
+        """Вернуть индикатор в режим прогресса загрузок"""
+        def stop():
+            self.progress.stop()
+            self.progress.config(mode='determinate', value=0)
+        self.root.after(0, stop)
+    
+    # ============= ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ =============
+    
+    def browse_folder(self):
+        """Выбор папки для сохранения"""
+        folder = filedialog.askdirectory(initialdir=self.download_path.get())
+        if folder:
+            self.download_path.set(folder)
+            self.config.set('last_download_path', folder)
+    
+    def browse_cookies(self):
+        """Выбор файла cookies"""
+        file = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
+        if file:
+            self.cookies_file.set(file)
+    
+    def log(self, message):
+        """Добавить сообщение в лог (безопасно из любого потока)"""
+        self.log_buffer.put(message)
+    
+    def flush_log(self):
+        """Вывести накопленные сообщения одной вставкой (в главном потоке)"""
+        try:
+            lines, dropped = self.log_buffer.drain()
+            if lines:
+                if dropped:
+                    lines.insert(0, f"... пропущено сообщений: {dropped}")
+                
+                self.log_text.config(state='normal')
+                self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+                
+                # Ограничиваем размер лога
+                line_count = int(self.log_text.index('end-1c').split('.')[0])
+                if line_count > LOG_MAX_LINES:
+                    self.log_text.delete('1.0', f'{line_count - LOG_MAX_LINES + 1}.0')
+                
+                self.log_text.see(tk.END)
+                self.log_text.config(state='disabled')
+        finally:
+            self.root.after(LOG_FLUSH_INTERVAL, self.flush_log)
+    
+    def clear_log(self):
+        """Очистить лог"""
+        self.log_buffer.drain()
+        self.log_text.config(state='normal')
+        self.log_text.delete(1.0, tk.END)
+        self.log_text.config(state='disabled')
+    
+    def show_notification(self, title, message):
+        """Показать системное уведомление"""
+        try:
+            from plyer import notification
+            notification.notify(
+                title=title,
+                message=message,
+                app_name="Video Downloader",
+                timeout=5  # Секунд
+            )
+        except:
+            # Если plyer не работает, пропускаем
+            pass
+    
+    def apply_preset(self, event=None):
+        """Применить пресет настроек"""
+        preset_name = self.current_preset.get()
+        if preset_name != "Нет":
+            preset = self.config.get('presets', {}).get(preset_name, {})
+            if preset:
+                self.quality.set(preset.get('quality', 'best'))
+                self.download_subtitles.set(preset.get('subtitles', False))
+                self.fragments.set(clamp_fragments(preset.get('fragments', self.config.get('fragments'))))
+                self.downloader.set(preset.get('downloader', self.config.get('downloader', 'native')))
+                self.check_downloader()
+                self.log(f"✓ Применён пресет: {preset_name}")
+    
+    # ============= МЕТОДЫ ИНФОРМАЦИИ =============
+    
+    def get_info(self):
+        """Получить информацию о видео"""
+        url = self.url.get().strip()
+        
+        if not url:
+            messagebox.showwarning("Предупреждение", "Пожалуйста, введите URL видео!")
+            return
+        
+        try:
+            self.download_button.config(state='disabled')
+            self.info_button.config(state='disabled')
+            self.start_busy()
+            
+            self.log(f"Получение информации о: {url}")
+            self.log("-" * 80)
+            
+            info, cached = extract_info_cached(url, self.info_cache, self.refresh_info.get(),
+                                               ydl_pool=self.ydl_pool)
+            if cached:
+                self.log("(информация из кэша)")
+            
+            self.log(f"Название: {info.get('title', 'N/A')}")
+            self.log(f"Автор: {info.get('uploader', 'N/A')}")
+            self.log(f"Длительность: {info.get('duration', 0)} секунд")
+            self.log(f"Просмотров: {info.get('view_count', 'N/A')}")
+            
+            # Показываем превью (загрузка в фоне, из кэша - сразу)
+            thumbnail_url = info.get('thumbnail')
+            if thumbnail_url:
+                self.thumbnails.request(thumbnail_url,
+                                        lambda image: self.show_preview(self.preview_label, image))
+            
+            self.log("-" * 80)
+            self.log("✓ Информация получена успешно!")
+            
+        except Exception as e:
+            self.log(f"✗ Ошибка: {str(e)}")
+            messagebox.showerror("Ошибка", f"Не удалось получить информацию:\n{str(e)}")
+        
+        finally:
+            self.download_button.config(state='normal')
+            self.info_button.config(state='normal')
+            self.stop_busy()
+    
+    def show_preview(self, label, image):
+        """Показать миниатюру в метке (PhotoImage создаётся в потоке Tk)"""
+        def show():
+            if image is None:
+                label.config(image='', text="Не удалось загрузить превью")
+                return
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(image)
+            label.config(image=photo, text="")
+            label.image = photo
+        self.root.after(0, show)
+    
+    def get_video_info(self):
+        """Запуск получения информации в потоке"""
+        thread = threading.Thread(target=self.get_info, daemon=True)
+        thread.start()
+    
+    # ============= МЕТОДЫ ОЧЕРЕДИ =============
+    
+    def add_to_queue(self):
+        """Добавить в очередь"""
+        url = self.url.get().strip()
+        if url and collection_kind(url):
+            # Плейлист или канал: в очередь попадут отдельные видео
+            self.enqueue_collection(url)
+            self.url.set("")
+            return
+        if url:
+            item = self.make_item(url)
+            added, duplicates, downloaded = self.queue_store.add_new(
+                [item], self.config.get('skip_downloaded', True))
+            if duplicates:
+                messagebox.showinfo("Информация", "Это видео уже в очереди!")
+                return
+            if downloaded:
+                if not messagebox.askyesno("Уже скачано",
+                                           "Видео уже есть в истории загрузок.\nДобавить в очередь ещё раз?"):
+                    return
+                self.queue_store.add(item)
+            
+            self.download_queue.put(item)
+            self.append_queue_entry(url)
+            self.log(f"✓ Добавлено в очередь: {url}")
+            self.url.set("")
+    
+    def enqueue_new_items(self, items):
+        """Поставить задачи в очередь на диске, пропуская повторы; возвращает добавленные"""
+        added, _, _ = self.queue_store.add_new(items, self.config.get('skip_downloaded', True))
+        return added
+    
+    def enqueue_collection(self, url, start=False):
+        """
+        Развернуть плейлист или канал в фоне и добавить в очередь новые видео
+        
+        Args:
+            start: запустить обработку очереди после добавления
+        """
+        template = self.make_item(url)
+        self.log(f"Получение списка видео: {url}")
+        
+        def sync_thread():
+            try:
+                title, added, total, new = self.subscriptions.sync(
+                    url, self.enqueue_new_items, template, self.ydl_pool)
+            except Exception as e:
+                self.log(f"✗ Не удалось получить список видео ({url}): {str(e)}")
+                return
+            self.log(f"✓ {title or url}: просмотрено {total}, новых {new}, добавлено в очередь {len(added)}")
+            self.root.after(0, lambda: self.add_synced_items(added, start))
+        
+        threading.Thread(target=sync_thread, daemon=True).start()
+    
+    def add_synced_items(self, items, start=False):
+        """Показать добавленные синхронизацией задачи в очереди (в потоке Tk)"""
+        for item in items:
+            self.download_queue.put(item)
+            self.append_queue_entry(item['url'])
+        if items and start and not (self.queue_pool and self.queue_pool.is_running):
+            self.start_queue_processing()
+    
+    def sync_all_sources(self, start=False):
+        """Проверить все сохранённые плейлисты и каналы на новые видео"""
+        sources = self.subscriptions.sources()
+        if not sources:
+            self.log("Нет сохранённых плейлистов и каналов: добавьте ссылку на плейлист или канал в очередь")
+            return
+        
+        self.log(f"Синхронизация источников: {len(sources)}")
+        
+        def sync_thread():
+            added = []
+            for source_id, url, title, last_sync, last_new, count in sources:
+                try:
+                    _, source_added, total, new = self.subscriptions.sync(
+                        url, self.enqueue_new_items, ydl_pool=self.ydl_pool)
+                except Exception as e:
+                    self.log(f"✗ {title or url}: {str(e)}")
+                    continue
+                self.log(f"  {title or url}: новых {new}, добавлено {len(source_added)}")
+                added.extend(source_added)
+            self.log(f"✓ Синхронизация завершена, добавлено в очередь: {len(added)}")
+            self.root.after(0, lambda: self.add_synced_items(added, start))
+        
+        threading.Thread(target=sync_thread, daemon=True).start()
+    
+    def append_queue_entry(self, url):
+        """
+        Показать элемент в списке очереди
+        
+        Название берётся из кэша информации, если оно известно;
+        миниатюра в этом случае загружается заранее в фоне.
+        """
+        try:
+            info = self.info_cache.peek(url)
+        except Exception:
+            info = None
+        
+        label = url
+        if info:
+            if info.get('title'):
+                label = f"{info['title']} | {url}"
+            if info.get('thumbnail'):
+                self.thumbnails.prefetch(info['thumbnail'])
+        
+        self.queue_urls.append(url)
+        self.queue_listbox.insert(tk.END, label)
+    
+    def resume_queue(self):
+        """Вернуть в очередь задачи, не завершённые в прошлый запуск, и продолжить загрузку"""
+        try:
+            items = self.queue_store.resume()
+            self.load_failed_items()
+        except Exception as e:
+            self.log(f"⚠ Не удалось восстановить очередь: {str(e)}")
+            return
+        
+        if not items:
+            return
+        
+        for item in items:
+            self.download_queue.put(item)
+            self.append_queue_entry(item['url'])
+        partial = sum(1 for item in items if item.get('resume_format'))
+        self.log(f"✓ Восстановлено незавершённых загрузок: {len(items)} "
+                 f"(продолжатся с места остановки: {partial})")
+        # Запускаем после показа окна
+        self.root.after(1000, self.start_queue_processing)
+    
+    def on_queue_start(self, item):
+        """Начало загрузки элемента очереди"""
+        self.queue_store.mark_active(item)
+        self.log(f"Начало загрузки: {item['url']}")
+    
+    def on_queue_select(self, event=None):
+        """Превью выбранного элемента очереди"""
+        selection = self.queue_listbox.curselection()
+        if not selection or selection[0] >= len(self.queue_urls):
+            return
+        
+        info = self.info_cache.peek(self.queue_urls[selection[0]])
+        if info and info.get('thumbnail'):
+            self.thumbnails.request(info['thumbnail'],
+                                    lambda image: self.show_preview(self.queue_preview, image))
+        else:
+            self.queue_preview.config(image='', text="Нет предпросмотра")
+    
+    def start_queue_processing(self):
+        """Начать обработку очереди пулом параллельных загрузчиков"""
+        if self.queue_pool and self.queue_pool.is_running:
+            messagebox.showinfo("Информация", "Очередь уже обрабатывается!")
+            return
+        
+        if self.download_queue.empty():
+            messagebox.showinfo("Информация", "Очередь пуста!")
+            return
+        
+        try:
+            workers = clamp_workers(self.queue_workers.get())
+        except tk.TclError:
+            workers = clamp_workers(self.config.get('queue_workers', 4))
+        self.queue_workers.set(workers)
+        self.config.set('queue_workers', workers)
+        
+        try:
+            self.scheduler.set_limit(self.speed_limit.get())
+        except tk.TclError:
+            pass
+        
+        self.start_queue_button.config(state='disabled')
+        self.log(f"Обработка очереди: {self.download_queue.qsize()} элементов, "
+                 f"{workers} параллельных загрузок")
+        self.log("-" * 80)
+        
+        self.queue_pool = DownloadWorkerPool(
+            self.download_queue,
+            workers=workers,
+            scheduler=self.scheduler,
+            info_cache=self.info_cache,
+            progress_hook=self.queue_progress_hook,
+            on_start=self.on_queue_start,
+            on_success=self.on_queue_item_done,
+            on_error=self.on_queue_item_failed,
+            on_finish=self.on_queue_finished,
+            ydl_pool=self.ydl_pool,
+            journal=self.queue_store,
+            retry_policy=self.retry_policy,
+            breaker=self.breaker,
+            on_retry=self.on_download_retry
+        )
+        self.queue_pool.start()
+    
+    def queue_progress_hook(self, item, d):
+        """Прогресс загрузки элемента очереди (в лог только завершение файла)"""
+        event = self.progress_tracker.update(item, d)
+        if event and event.status == 'finished':
+            self.log(f"Загрузка завершена: {item['url']}. Обработка файла...")
+    
+    def on_queue_item_done(self, item, info):
+        """Элемент очереди успешно загружен"""
+        final = self.progress_tracker.finish(item)
+        title = self.history.add_from_info(item, info, final.job_bytes if final else 0)
+        self.queue_store.mark_done(item)
+        self.log(f"✓ Загружено: {title}")
+        self.log_integrity_warnings(info)
+        self.submit_postprocess(item, info)
+    
+    def log_integrity_warnings(self, info):
+        """Файлы загрузки, которые меньше примерного размера от сайта, но оставлены"""
+        for warning in info.get('_integrity_warnings') or []:
+            self.log(f"⚠ Размер не проверен точно: {warning}")
+    
+    def submit_postprocess(self, item, info):
+        """Поставить готовую загрузку в очередь обработки по включённым в настройках этапам"""
+        stages, options = postprocess_settings(self.config)
+        self.postprocessor.submit(item, info, stages, options)
+    
+    def on_postprocess_update(self, job):
+        """Смена этапа обработки загрузки (вызывается из потока обработки)"""
+        if job.status == 'running':
+            self.log(f"⚙ {STAGE_LABELS[job.stage]}: {job.title}")
+        elif job.status == 'error':
+            self.log(f"✗ Обработка не завершена ({job.title}): {job.error}")
+        elif job.status == 'done':
+            self.log(f"✓ Обработано за {job.finished - job.started:.0f} сек: {job.files[0]}")
+        if job.status != 'running':
+            # Файл мог переехать или смениться даже при ошибке на следующем этапе
+            for old, new in job.moved:
+                self.history.update_filename(old, new)
+    
+    def on_postprocess_notify(self, job):
+        """Этап уведомления обработки"""
+        self.show_notification("Файл готов", f"{job.title}: {job.files[0].name}")
+    
+    def on_queue_item_failed(self, item, error, kind):
+        """Элемент очереди не загружен после всех попыток"""
+        self.progress_tracker.finish(item, 'error')
+        self.queue_store.mark_failed(item, error, kind)
+        self.log(f"✗ Ошибка ({item['url']}, {ERROR_KIND_LABELS.get(kind, kind)}): {str(error)}")
+        self.add_failed_entry(item, error, kind)
+    
+    def on_download_retry(self, item, error, kind, delay):
+        """Попытка не удалась, загрузка будет повторена"""
+        self.progress_tracker.finish(item, 'retry')
+        self.queue_store.mark_retry(item, error, kind)
+        self.log(f"↻ Повтор через {delay:.0f} сек ({ERROR_KIND_LABELS.get(kind, kind)}, "
+                 f"попытка {item.get('attempts', 1)}): {item['url']}")
+    
+    def add_failed_entry(self, item, error, kind):
+        """Добавить строку в список неудачных загрузок (из любого потока)"""
+        values = (item['url'], ERROR_KIND_LABELS.get(kind, kind), item.get('attempts', 1),
+                  str(error).splitlines()[0] if str(error) else '')
+        iid = str(item['queue_id']) if item.get('queue_id') is not None else ''
+        
+        def add():
+            if iid and self.failed_tree.exists(iid):
+                self.failed_tree.delete(iid)
+            self.failed_tree.insert('', 0, iid=iid or None, values=values)
+        
+        self.root.after(0, add)
+    
+    def load_failed_items(self):
+        """Заполнить список неудачных загрузок из очереди на диске"""
+        for queue_id, url, kind, attempts, error in self.queue_store.failed_items():
+            self.failed_tree.insert('', tk.END, iid=str(queue_id),
+                                    values=(url, ERROR_KIND_LABELS.get(kind, kind or ''), attempts,
+                                            (error or '').splitlines()[0] if error else ''))
+    
+    def retry_failed(self, iids):
+        """Вернуть неудачные загрузки в очередь и запустить её"""
+        ids = [int(iid) for iid in iids if iid.isdigit()]
+        items = self.queue_store.requeue(ids)
+        for iid in iids:
+            self.failed_tree.delete(iid)
+        for item in items:
+            self.download_queue.put(item)
+            self.append_queue_entry(item['url'])
+        
+        self.log(f"↻ Возвращено в очередь: {len(items)}")
+        if items and not (self.queue_pool and self.queue_pool.is_running):
+            self.start_queue_processing()
+    
+    def retry_selected_failed(self):
+        """Повторить выбранные неудачные загрузки"""
+        self.retry_failed(self.failed_tree.selection())
+    
+    def retry_all_failed(self):
+        """Повторить все неудачные загрузки"""
+        self.retry_failed(self.failed_tree.get_children())
+    
+    def clear_failed(self):
+        """Очистить список неудачных загрузок"""
+        self.queue_store.clear_failed()
+        self.failed_tree.delete(*self.failed_tree.get_children())
+        self.log("Список неудачных загрузок очищен")
+    
+    def on_queue_finished(self, completed, failed):
+        """Все рабочие потоки очереди завершились"""
+        def finish():
+            self.start_queue_button.config(state='normal')
+            self.log("-" * 80)
+            self.log(f"✓ Очередь обработана! Успешно: {completed}, ошибок: {failed}")
+            self.show_notification("Очередь обработана",
+                                   f"Успешно: {completed}, ошибок: {failed}")
+            if failed:
+                self.log("Неудачные загрузки - в списке на вкладке \"Очередь\"")
+            else:
+                messagebox.showinfo("Успех", "Все видео из очереди загружены!")
+        
+        self.root.after(0, finish)
+    
+    def clear_info_cache(self):
+        """Очистить кэш информации о видео"""
+        self.info_cache.clear()
+        self.log("✓ Кэш информации очищен")
+    
+    def clear_queue(self):
+        """Очистить очередь"""
+        while not self.download_queue.empty():
+            self.download_queue.get()
+        self.queue_store.clear_pending()
+        self.queue_listbox.delete(0, tk.END)
+        self.queue_urls.clear()
+        self.log("Очередь очищена")
+    
+    # ============= МЕТОДЫ ИСТОРИИ =============
+    
+    def refresh_history(self):
+        """Обновить историю (с первой страницы)"""
+        self.history_tree.delete(*self.history_tree.get_children())
+        self.history_tree.yview_moveto(0)
+        self.history_loaded = 0
+        self.history_last_row = None
+        self.history_total = self.history.count(self.history_search.get())
+        
+        # Стрелка направления сортировки в заголовке
+        for column, text in self.history_headings.items():
+            if column == self.history_sort:
+                text += " ▼" if self.history_descending else " ▲"
+            self.history_tree.heading(column, text=text)
+        
+        self.load_more_history()
+    
+    def load_more_history(self):
+        """Подгрузить следующую страницу истории"""
+        self.history_page_pending = False
+        if self.history_loaded >= self.history_total:
+            return
+        
+        # Страница за последней показанной строкой: новые загрузки не сдвигают окно
+        rows = self.history.get_page(limit=HISTORY_PAGE_SIZE, sort=self.history_sort,
+                                     descending=self.history_descending,
+                                     search=self.history_search.get(), after=self.history_last_row)
+        if rows:
+            self.history_last_row = rows[-1]
+        for row in rows:
+            if self.history_tree.exists(str(row[0])):
+                continue
+            date = row[6] if len(row) > 6 else "N/A"
+            title = row[2] if len(row) > 2 else "N/A"
+            quality = row[3] if len(row) > 3 else "N/A"
+            size = f"{row[5] / (1024*1024):.1f} MB" if len(row) > 5 and row[5] else "N/A"
+            
+            self.history_tree.insert('', 'end', iid=str(row[0]), values=(date, title, quality, size))
+        
+        self.history_loaded += len(rows)
+        if not rows:
+            self.history_total = self.history_loaded
+        self.history_status.config(text=f"Показано {self.history_loaded} из {self.history_total}")
+    
+    def on_history_scroll(self, first, last):
+        """Прокрутка таблицы истории: подгрузка при приближении к концу"""
+        self.history_scrollbar.set(first, last)
+        if float(last) > 0.9 and self.history_loaded < self.history_total \
+                and not self.history_page_pending:
+            self.history_page_pending = True
+            self.root.after_idle(self.load_more_history)
+    
+    def sort_history(self, column):
+        """Сортировка истории по столбцу (повторный клик меняет направление)"""
+        if self.history_sort == column:
+            self.history_descending = not self.history_descending
+        else:
+            self.history_sort = column
+            self.history_descending = column in ('date', 'size')
+        self.refresh_history()
+    
+    def on_history_search(self, event=None):
+        """Поиск при вводе (с задержкой, чтобы не искать на каждую букву)"""
+        if self.history_search_job:
+            self.root.after_cancel(self.history_search_job)
+        self.history_search_job = self.root.after(HISTORY_SEARCH_DELAY, self.refresh_history)
+    
+    def clear_history_confirm(self):
+        """Подтверждение очистки истории"""
+        if messagebox.askyesno("Подтверждение", "Вы уверены, что хотите очистить историю?"):
+            self.history.clear_history()
+            self.refresh_history()
+            self.log("История очищена")
+    
+    # ============= АВТООБНОВЛЕНИЕ YT-DLP =============
+    
+    def update_ytdlp(self):
+        """Обновление yt-dlp"""
+        try:
+            self.log("Проверка обновлений yt-dlp...")
+            
+            result = subprocess.run(
+                [sys.executable, "-m", "pip", "install", "--upgrade", "yt-dlp"],
+                capture_output=True,
+                text=True,
+                timeout=60
+            )
+            
+            if result.returncode == 0:
+                version_result = subprocess.run(
+                    [sys.executable, "-m", "yt_dlp", "--version"],
+                    capture_output=True,
+                    text=True,
+                    timeout=10
+                )
+                version = version_result.stdout.strip() if version_result.returncode == 0 else "unknown"
+                
+                self.log(f"✓ yt-dlp успешно обновлён до версии {version}")
+                return True
+            else:
+                self.log(f"✗ Ошибка обновления: {result.stderr}")
+                return False
+                
+        except subprocess.TimeoutExpired:
+            self.log("✗ Превышено время ожидания при обновлении")
+            return False
+        except Exception as e:
+            self.log(f"✗ Ошибка при обновлении: {str(e)}")
+            return False
+    
+    def auto_update_ytdlp(self):
+        """Автоматическое обновление yt-dlp при запуске"""
+        def update_thread():
+            try:
+                self.log("=== Автопроверка обновлений yt-dlp ===")
+                success = self.update_ytdlp()
+                
+                if success:
+                    self.log("Приложение готово к работе!")
+                else:
+                    self.log("Приложение готово, но обновление не удалось")
+                    
+                self.log("-" * 80)
+                
+            except Exception as e:
+                self.log(f"Ошибка автообновления: {str(e)}")
+        
+        thread = threading.Thread(target=update_thread, daemon=True)
+        thread.start()
+    
+    def manual_update_ytdlp(self):
+        """Ручное обновление yt-dlp по кнопке"""
+        def update_thread():
+            try:
+                self.update_button.config(state='disabled')
+                self.download_button.config(state='disabled')
+                self.info_button.config(state='disabled')
+                self.start_busy()
+                
+                self.log("=== Ручное обновление yt-dlp ===")
+                success = self.update_ytdlp()
+                
+                if success:
+                    messagebox.showinfo("Успех", "yt-dlp успешно обновлён!")
+                else:
+                    messagebox.showwarning("Предупреждение", "Не удалось обновить yt-dlp.")
+                
+                self.log("-" * 80)
+                
+            except Exception as e:
+                self.log(f"✗ Ошибка: {str(e)}")
+                messagebox.showerror("Ошибка", f"Произошла ошибка:\n{str(e)}")
+            finally:
+                self.update_button.config(state='normal')
+                self.download_button.config(state='normal')
+                self.info_button.config(state='normal')
+                self.stop_busy()
+        
+        thread = threading.Thread(target=update_thread, daemon=True)
+        thread.start()
+    
+    # ============= ДОПОЛНИТЕЛЬНЫЕ ФУНКЦИИ =============
+    
+    def export_history_dialog(self):
+        """Диалог экспорта истории (CSV или JSON Lines, с фильтрами)"""
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Экспорт истории")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text="Формат:").grid(row=0, column=0, sticky=tk.W, pady=5)
+        fmt_combo = ttk.Combobox(frame, values=["CSV", "JSON Lines"], width=15, state='readonly')
+        fmt_combo.set("CSV")
+        fmt_combo.grid(row=0, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(frame, text="С даты (ГГГГ-ММ-ДД):").grid(row=1, column=0, sticky=tk.W, pady=5)
+        date_from = ttk.Entry(frame, width=15)
+        date_from.grid(row=1, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(frame, text="По дату (ГГГГ-ММ-ДД):").grid(row=2, column=0, sticky=tk.W, pady=5)
+        date_to = ttk.Entry(frame, width=15)
+        date_to.grid(row=2, column=1, sticky=tk.W, pady=5)
+        
+        ttk.Label(frame, text="Статус:").grid(row=3, column=0, sticky=tk.W, pady=5)
+        status_combo = ttk.Combobox(frame, values=["Все"] + self.history.get_statuses(),
+                                    width=15, state='readonly')
+        status_combo.set("Все")
+        status_combo.grid(row=3, column=1, sticky=tk.W, pady=5)
+        
+        def start():
+            # Проверяем даты до выбора файла
+            for entry in (date_from, date_to):
+                value = entry.get().strip()
+                if value:
+                    try:
+                        datetime.strptime(value, '%Y-%m-%d')
+                    except ValueError:
+                        messagebox.showwarning("Предупреждение", f"Неверная дата: {value}",
+                                               parent=dialog)
+                        return
+            
+            jsonl = fmt_combo.get() == "JSON Lines"
+            file = filedialog.asksaveasfilename(
+                parent=dialog,
+                defaultextension=".jsonl" if jsonl else ".csv",
+                filetypes=[("JSON Lines", "*.jsonl") if jsonl else ("CSV files", "*.csv"),
+                           ("All files", "*.*")]
+            )
+            if not file:
+                return
+            
+            status = status_combo.get()
+            self.start_history_export(file, 'jsonl' if jsonl else 'csv',
+                                      date_from.get().strip() or None,
+                                      date_to.get().strip() or None,
+                                      None if status == "Все" else status)
+            dialog.destroy()
+        
+        ttk.Button(frame, text="Экспортировать", command=start).grid(row=4, column=0, columnspan=2, pady=10)
+    
+    def start_history_export(self, file, fmt, date_from, date_to, status):
+        """Экспорт истории в фоновом потоке с отображением прогресса"""
+        def progress(written, total):
+            self.root.after(0, lambda: self.history_status.config(
+                text=f"Экспорт: {written} из {total}"))
+        
+        def export_thread():
+            try:
+                written = self.history.export(file, fmt, date_from, date_to, status, progress)
+                self.log(f"✓ История экспортирована в {file} ({written} записей)")
+                self.root.after(0, lambda: messagebox.showinfo(
+                    "Успех", f"История сохранена в {file}\nЗаписей: {written}"))
+            except Exception as e:
+                error = str(e)
+                self.log(f"✗ Ошибка экспорта: {error}")
+                self.root.after(0, lambda: messagebox.showerror(
+                    "Ошибка", f"Не удалось экспортировать:\n{error}"))
+        
+        self.log(f"Экспорт истории в {file}...")
+        threading.Thread(target=export_thread, daemon=True).start()
+    
+    def import_urls_file(self):
+        """Импорт списка URL из файла"""
+        try:
+            file = filedialog.askopenfilename(
+                filetypes=[("Text files", "*.txt"), ("All files", "*.*")]
+            )
+            
+            if file:
+                with open(file, 'r', encoding='utf-8') as f:
+                    urls = [line.strip() for line in f if line.strip().startswith('http')]
+                
+                # Плейлисты и каналы разворачиваются в фоне
+                collections = [url for url in urls if collection_kind(url)]
+                for url in collections:
+                    self.enqueue_collection(url)
+                urls = [url for url in urls if not collection_kind(url)]
+                
+                # Одна транзакция на весь файл; повторы и уже скачанные пропускаются
+                items = [self.make_item(url) for url in urls]
+                added, duplicates, downloaded = self.queue_store.add_new(
+                    items, self.config.get('skip_downloaded', True))
+                for item in added:
+                    self.download_queue.put(item)
+                    self.append_queue_entry(item['url'])
+                
+                summary = f"Добавлено {len(added)} видео в очередь!"
+                if collections:
+                    summary += f"\nПлейлистов и каналов: {len(collections)} (добавляются в фоне)"
+                if duplicates or downloaded:
+                    summary += f"\nПропущено: повторы - {len(duplicates)}, уже скачаны - {len(downloaded)}"
+                self.log(f"✓ Импортировано {len(added)} из {len(urls)} URL в очередь "
+                         f"(повторы: {len(duplicates)}, уже скачаны: {len(downloaded)})")
+                messagebox.showinfo("Успех", summary)
+                
+        except Exception as e:
+            self.log(f"✗ Ошибка импорта: {str(e)}")
+            messagebox.showerror("Ошибка", f"Не удалось импортировать:\n{str(e)}")
+    
+    def show_statistics(self):
+        """Показать статистику загрузок"""
+        try:
+            stats = self.history.get_statistics()
+            total_size_gb = stats['total_bytes'] / (1024**3)
+            
+            stats_text = f"""
+📊 СТАТИСТИКА ЗАГРУЗОК
+
+Всего загружено: {stats['total_count']} видео
+Общий размер: {total_size_gb:.2f} GB
+Скачано за сессию: {format_size(self.progress_tracker.session_bytes)}
+
+По качеству:
+"""
+            for quality, count, size in stats['by_quality']:
+                stats_text += f"  • {quality}: {count} видео ({format_size(size)})\n"
+            
+            stats_text += "\nПо сайтам:\n"
+            for site, count, size in stats['by_site']:
+                stats_text += f"  • {site}: {count} видео ({format_size(size)})\n"
+            
+            stats_text += "\nПо месяцам:\n"
+            for month, count, size in stats['by_month']:
+                stats_text += f"  • {month}: {count} видео ({format_size(size)})\n"
+            
+            # Показываем в новом окне
+            stats_window = tk.Toplevel(self.root)
+            stats_window.title("Статистика загрузок")
+            stats_window.geometry("450x500")
+            
+            text_widget = scrolledtext.ScrolledText(stats_window, wrap=tk.WORD, font=("Courier", 10))
+            text_widget.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+            text_widget.insert(1.0, stats_text)
+            text_widget.config(state='disabled')
+            
+            ttk.Button(stats_window, text="Закрыть", command=stats_window.destroy).pack(pady=10)
+            
+        except Exception as e:
+            messagebox.showerror("Ошибка", f"Не удалось получить статистику:\n{str(e)}")
+    
+    # ============= СИСТЕМНЫЙ ТРЕЙ =============
+    
+    def setup_tray(self):
+        """Настройка иконки в системном трее (pystray загружается в фоновом потоке)"""
+        threading.Thread(target=self.run_tray, daemon=True).start()
+    
+    def run_tray(self):
+        """Создать и запустить иконку в трее"""
+        try:
+            from pystray import Icon, Menu, MenuItem
+            from PIL import Image, ImageDraw
+            
+            # Создаём простую иконку
+            def create_icon():
+                image = Image.new('RGB', (64, 64), color=(73, 109, 137))
+                dc = ImageDraw.Draw(image)
+                dc.rectangle([16, 16, 48, 48], fill=(255, 255, 255))
+                return image
+            
+            # Меню трея
+            menu = Menu(
+                MenuItem('Показать', self.show_window, default=True),
+                MenuItem('Новая загрузка', self.new_download_from_tray),
+                Menu.SEPARATOR,
+                MenuItem('Выход', self.quit_app)
+            )
+            
+            # Создаём иконку
+            self.tray_icon = Icon("VideoDownloader", create_icon(), "Video Downloader", menu)
+            
+            # Обработка закрытия окна - минимизация в трей
+            self.root.after(0, lambda: self.root.protocol('WM_DELETE_WINDOW', self.hide_to_tray))
+            
+            self.log("✓ Системный трей активирован")
+            self.tray_icon.run()
+        except Exception as e:
+            self.log(f"⚠ Системный трей недоступен: {str(e)}")
+    
+    def hide_to_tray(self):
+        """Свернуть в трей"""
+        self.root.withdraw()
+        self.log("Приложение свёрнуто в трей")
+    
+    def show_window(self, icon=None, item=None):
+        """Показать окно из трея"""
+        self.root.deiconify()
+        self.root.lift()
+        self.root.focus_force()
+    
+    def new_download_from_tray(self, icon=None, item=None):
+        """Новая загрузка из трея"""
+        self.show_window()
+        self.url_entry.focus()
+    
+    def quit_app(self, icon=None, item=None):
+        """Выход из приложения"""
+        if self.tray_icon:
+            self.tray_icon.stop()
+        self.postprocessor.stop()
+        self.history.close()
+        self.ydl_pool.close()
+        self.thumbnails.shutdown()
+        if hasattr(self, 'batch_converter'):
+            # Вкладка конвертера строится при первом открытии
+            self.batch_converter.cancel_all()
+        self.root.quit()
+    
+    # ============= ПЛАНИРОВЩИК =============
+    
+    def add_scheduled_task(self):
+        """Добавить запланированную задачу"""
+        url = self.sched_url.get().strip()
+        time_str = self.sched_time.get().strip()
+        repeat = self.sched_repeat.get()
+        
+        if not url or not time_str:
+            messagebox.showwarning("Предупреждение", "Заполните все поля!")
+            return
+        
+        task = {
+            'url': url,
+            'time': time_str,
+            'repeat': repeat,
+            'quality': self.quality.get()
+        }
+        
+        self.scheduled_tasks.append(task)
+        self.scheduled_listbox.insert(tk.END, f"{time_str} | {repeat} | {url}")
+        
+        # Настраиваем schedule
+        if repeat == "Каждый день":
+            import schedule
+            schedule.every().day.at(time_str).do(self.execute_scheduled_download, task)
+        
+        self.log(f"✓ Задача добавлена: {url} в {time_str}")
+        self.sched_url.delete(0, tk.END)
+    
+    def execute_scheduled_download(self, task):
+        """Выполнить запланированную загрузку"""
+        self.quality.set(task['quality'])
+        if collection_kind(task['url']):
+            # Канал или плейлист: загружаются только новые с прошлой синхронизации видео
+            self.enqueue_collection(task['url'], start=True)
+        else:
+            self.url.set(task['url'])
+            self.start_download()
+        self.show_notification("Запланированная загрузка", f"Начата загрузка: {task['url'][:50]}...")
+    
+    def remove_scheduled_task(self):
+        """Удалить выбранную задачу"""
+        selection = self.scheduled_listbox.curselection()
+        if selection:
+            index = selection[0]
+            self.scheduled_listbox.delete(index)
+            if index < len(self.scheduled_tasks):
+                self.scheduled_tasks.pop(index)
+            self.log("✓ Задача удалена")
+    
+    def clear_scheduled_tasks(self):
+        """Очистить все задачи"""
+        self.scheduled_listbox.delete(0, tk.END)
+        self.scheduled_tasks.clear()
+        import schedule
+        schedule.clear()
+        self.log("✓ Все задачи очищены")
+    
+    def check_scheduled_tasks(self):
+        """Проверка и выполнение запланированных задач"""
+        import schedule
+        schedule.run_pending()
+        self.root.after(60000, self.check_scheduled_tasks)  # Проверка каждую минуту
+    
+    # ============= КОНВЕРТЕР =============
+    
+    def browse_convert_input(self):
+        """Выбор файла для конвертации"""
+        file = filedialog.askopenfilename(
+            filetypes=[
+                ("Video files", "*.mp4 *.mkv *.avi *.webm *.mov"),
+                ("Audio files", "*.mp3 *.m4a *.wav *.flac"),
+                ("All files", "*.*")
+            ]
+        )
+        if file:
+            self.convert_input.delete(0, tk.END)
+            self.convert_input.insert(0, file)
+    
+    def browse_convert_files(self):
+        """Выбор нескольких файлов для конвертации"""
+        files = filedialog.askopenfilenames(
+            filetypes=[
+                ("Media files", " ".join(f"*{ext}" for ext in sorted(MEDIA_EXTENSIONS))),
+                ("All files", "*.*")
+            ]
+        )
+        if files:
+            self.add_convert_jobs(files)
+    
+    def browse_convert_folder(self):
+        """Выбор папки: конвертируются все медиафайлы в ней"""
+        folder = filedialog.askdirectory()
+        if folder:
+            self.add_convert_jobs([folder])
+    
+    def write_convert_log(self, message):
+        """Строка в лог конвертации (в потоке Tk)"""
+        self.convert_log.config(state='normal')
+        self.convert_log.insert(tk.END, message + "\n")
+        self.convert_log.see(tk.END)
+        self.convert_log.config(state='disabled')
+    
+    def add_convert_jobs(self, paths):
+        """Поставить файлы (и содержимое папок) в очередь конвертации; возвращает число задач"""
+        files = collect_inputs(paths)
+        if not files:
+            messagebox.showwarning("Предупреждение", "Медиафайлы не найдены!")
+            return 0
+        
+        output_format = self.convert_format.get().lower()
+        quality = self.convert_quality.get()
+        priority = next((key for key, label in PRIORITY_LABELS.items()
+                         if label == self.convert_priority.get()), 'normal')
+        profile = self.selected_convert_profile()
+        self.config.set('convert_profile', profile)
+        for path in files:
+            job = self.batch_converter.add(ConvertJob(path, output_format, quality, priority, profile))
+            self.convert_tree.insert('', tk.END, iid=str(job.id), values=self.convert_job_values(job))
+        
+        self.write_convert_log(f"Добавлено в очередь: {len(files)} ({output_format}, {quality}, "
+                               f"профиль: {PROFILE_LABELS[profile].lower()}, "
+                               f"приоритет: {PRIORITY_LABELS[priority].lower()})")
+        self.update_convert_summary()
+        if self.batch_converter.is_running:
+            self.batch_converter.start()
+        return len(files)
+    
+    def selected_convert_profile(self):
+        """Ключ профиля кодирования, выбранного на вкладке конвертера"""
+        return next((key for key, label in PROFILE_LABELS.items()
+                     if label == self.convert_profile.get()), 'balanced')
+    
+    def run_profile_benchmark(self):
+        """Замерить скорость кодирования каждого профиля на этом компьютере (в фоне)"""
+        if not shutil.which('ffmpeg'):
+            messagebox.showerror("Ошибка", "FFmpeg не найден!\nУстановите FFmpeg или положите ffmpeg.exe рядом с программой.")
+            return
+        self.profile_benchmark_button.config(state='disabled')
+        self.write_convert_log("Тест профилей: кодирование 5-секундного ролика 1280x720 всеми кодировщиками...")
+        
+        def report(result):
+            label = PROFILE_LABELS[result['profile']]
+            if result['error']:
+                line = f"  {label}, {result['encoder']}: ошибка - {result['error']}"
+            else:
+                line = (f"  {label}, {result['encoder']} ({result['threads']} потоков): "
+                        f"{result['fps']} fps, {result['kbps']} кбит/с")
+            self.root.after(0, lambda: self.write_convert_log(line))
+        
+        def benchmark_thread():
+            try:
+                benchmark_profiles(on_result=report)
+            finally:
+                self.root.after(0, lambda: self.profile_benchmark_button.config(state='normal'))
+                self.root.after(0, lambda: self.write_convert_log("Тест профилей завершён"))
+        
+        threading.Thread(target=benchmark_thread, daemon=True).start()
+    
+    @staticmethod
+    def convert_job_values(job):
+        """Строка задачи конвертации в списке"""
+        elapsed = format_eta(job.elapsed) if job.started else ""
+        speed = ""
+        eta = ""
+        if job.status == 'running':
+            speed = " · ".join(part for part in (f"{job.fps:.0f} fps" if job.fps else "",
+                                                 f"{job.speed:.2f}x" if job.speed else "") if part)
+            eta = format_eta(job.eta) if job.eta is not None else ""
+        # Без длительности исходника процент неизвестен - показываем обработанное время
+        progress = f"{job.progress:.0f}%" if job.duration or job.status != 'running' \
+            else format_eta(job.position)
+        mode = PLAN_MODES[job.plan.mode] if job.plan else ""
+        return (job.input_path.name, PRIORITY_LABELS[job.priority],
+                CONVERT_STATUS_LABELS.get(job.status, job.status), mode, progress, speed, eta, elapsed)
+    
+    def update_convert_summary(self):
+        """Общий прогресс и счётчики пакета"""
+        counts = self.batch_converter.counts()
+        self.convert_progress['value'] = self.batch_converter.overall_progress()
+        if not counts:
+            self.convert_summary.config(text="Нет задач")
+            return
+        parts = [f"{label}: {counts[status]}" for status, label in CONVERT_STATUS_LABELS.items()
+                 if counts.get(status)]
+        self.convert_summary.config(
+            text=f"{', '.join(parts)}  |  процессов ffmpeg: {self.batch_converter.workers}, "
+                 f"потоков на каждый: до {self.batch_converter.threads}")
+    
+    def on_convert_update(self, job):
+        """Смена состояния или прогресса задачи (вызывается из рабочего потока)"""
+        if job.status == 'running' and job.id in self.convert_refresh_pending:
+            return  # Перерисовка этой задачи уже запланирована
+        self.convert_refresh_pending.add(job.id)
+        self.root.after(0, lambda: self.refresh_convert_job(job))
+    
+    def refresh_convert_job(self, job):
+        """Обновить строку задачи и общий прогресс"""
+        self.convert_refresh_pending.discard(job.id)
+        if self.convert_tree.exists(str(job.id)):
+            self.convert_tree.item(str(job.id), values=self.convert_job_values(job))
+        if job.status == 'done':
+            plan = f"{job.plan.describe()}, " if job.plan else ""
+            self.write_convert_log(f"✓ {job.output_path.name} ({plan}{job.elapsed:.0f} сек)")
+        elif job.status == 'error':
+            self.write_convert_log(f"✗ {job.input_path.name}: {job.error}")
+        self.update_convert_summary()
+    
+    def on_convert_finished(self, done, failed):
+        """Очередь конвертации опустела (вызывается из рабочего потока)"""
+        def finish():
+            self.write_convert_log(f"Конвертация завершена: успешно {done}, ошибок {failed}")
+            self.write_convert_log("-" * 60)
+            self.update_convert_summary()
+            self.show_notification("Конвертация завершена", f"Готово: {done}, ошибок: {failed}")
+        self.root.after(0, finish)
+    
+    def start_conversion(self):
+        """Запуск пакетной конвертации параллельными процессами ffmpeg"""
+        input_file = self.convert_input.get().strip()
+        if input_file:
+            if not os.path.exists(input_file):
+                messagebox.showwarning("Предупреждение", "Выберите существующий файл!")
+                return
+            self.add_convert_jobs([input_file])
+            self.convert_input.delete(0, tk.END)
+        
+        if not self.batch_converter.counts().get('queued'):
+            messagebox.showwarning("Предупреждение", "Выберите файлы или папку для конвертации!")
+            return
+        
+        if not shutil.which('ffmpeg'):
+            messagebox.showerror("Ошибка", "FFmpeg не найден!\nУстановите FFmpeg или положите ffmpeg.exe рядом с программой.")
+            return
+        
+        if not self.batch_converter.is_running:
+            try:
+                workers = self.convert_workers.get()
+            except tk.TclError:
+                workers = 0
+            self.config.set('convert_workers', workers)
+            self.batch_converter.set_workers(workers)
+        
+        # Потоков у каждой задачи - по её профилю, но не больше доли ядер
+        self.write_convert_log(f"Запуск: процессов ffmpeg - {self.batch_converter.workers}, "
+                               f"потоков на каждый - до {self.batch_converter.threads}")
+        self.batch_converter.start()
+        self.update_convert_summary()
+    
+    def cancel_selected_conversions(self):
+        """Отменить выбранные задачи конвертации"""
+        selected = set(self.convert_tree.selection())
+        for job in list(self.batch_converter.jobs):
+            if str(job.id) in selected:
+                self.batch_converter.cancel(job)
+    
+    def cancel_all_conversions(self):
+        """Отменить все незавершённые задачи конвертации"""
+        self.batch_converter.cancel_all()
+        self.write_convert_log("Конвертация отменена")
+    
+    def clear_finished_conversions(self):
+        """Убрать завершённые задачи из списка"""
+        self.batch_converter.clear_finished()
+        active = {str(job.id) for job in self.batch_converter.jobs}
+        for iid in self.convert_tree.get_children():
+            if iid not in active:
+                self.convert_tree.delete(iid)
+        self.update_convert_summary()
+    
+    def setup_dragdrop(self):
+        """Настройка Drag & Drop"""
+        try:
+            self.url_entry.drop_target_register(DND_FILES)
+            self.url_entry.dnd_bind('<<Drop>>', self.on_drop)
+            self.log("✓ Drag & Drop активирован")
+        except Exception as e:
+            self.log(f"⚠ Drag & Drop недоступен: {str(e)}")
+    
+    def on_drop(self, event):
+        """Обработка Drag & Drop"""
+        data = event.data
+        if data.startswith('http'):
+            self.url.set(data)
+            self.log("✓ URL добавлен через Drag & Drop")
+
+
+def run_gui(profiler=None):
+    """
+    Запуск графического интерфейса
+    
+    Args:
+        profiler: объект с методами mark(stage) и report() для --profile-startup
+    """
+    try:
+        # Пробуем использовать TkinterDnD для Drag & Drop
+        root = TkinterDnD.Tk()
+    except:
+        # Если не получается, используем обычный Tk
+        root = tk.Tk()
+    if profiler:
+        profiler.mark("окно Tk")
+    
+    app = VideoDownloaderApp(root, profiler)
+    if profiler:
+        def shown():
+            root.update_idletasks()
+            profiler.mark("окно отрисовано")
+            profiler.report()
+        root.after_idle(shown)
+    root.mainloop()
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль обработки загруженных файлов для Video Downloader
+
+Готовые загрузки ставятся в очередь и обрабатываются отдельным пулом
+потоков (конвертация, раскладка по папкам сайтов, метаданные,
+уведомление), поэтому потоки загрузки не ждут ffmpeg и диск.
+Не зависит от tkinter.
+"""
+
+import glob
+import itertools
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from queue import Queue, Empty
+
+from converter import BatchConverter, ConvertJob, CREATE_NO_WINDOW, ENCODER_PROFILES
+from defaults import DEFAULT_PROFILE, DEFAULT_POSTPROCESS_WORKERS, DEFAULT_STALL_TIMEOUT
+from engine import get_site
+
+
+# Этапы в порядке выполнения
+POSTPROCESS_STAGES = ['convert', 'organize', 'metadata', 'notify']
+STAGE_LABELS = {
+    'convert': 'Конвертация',
+    'organize': 'Раскладка по папкам',
+    'metadata': 'Метаданные',
+    'notify': 'Уведомление',
+}
+
+# Папки сайтов для раскладки загрузок
+SITE_FOLDERS = {
+    'youtube': 'YouTube',
+    'tiktok': 'TikTok',
+    'instagram': 'Instagram',
+    'pinterest': 'Pinterest',
+    'other': 'Other',
+}
+
+# Поля информации yt-dlp, которые записываются в файл: (тег ffmpeg, поле)
+METADATA_FIELDS = [
+    ('title', 'title'),
+    ('artist', 'uploader'),
+    ('comment', 'webpage_url'),
+    ('description', 'description'),
+]
+
+# Расширения субтитров и обложек, которые переносятся вместе с видео
+SIDECAR_EXTENSIONS = {'.vtt', '.srt', '.ass', '.lrc', '.ttml', '.srv1', '.srv2', '.srv3', '.json3',
+                      '.jpg', '.jpeg', '.png', '.webp'}
+
+# Язык в имени субтитров: 'имя.en.vtt', 'имя.pt-BR.srt'
+SIDECAR_LANGUAGE = re.compile(r'^[A-Za-z]{2,3}(?:[-_][A-Za-z0-9]+)*$')
+
+# Ключи настроек, включающие этапы
+STAGE_SETTINGS = {
+    'convert': 'postprocess_convert',
+    'organize': 'auto_organize',
+    'metadata': 'postprocess_metadata',
+    'notify': 'postprocess_notify',
+}
+
+
+def postprocess_settings(config):
+    """
+    Этапы и параметры обработки из настроек (Config)
+
+    Returns:
+        (этапы, параметры для PostProcessor.submit)
+    """
+    stages = [stage for stage in POSTPROCESS_STAGES if config.get(STAGE_SETTINGS[stage], False)]
+    options = {
+        'format': config.get('postprocess_format', 'mp4'),
+        'profile': config.get('convert_profile', DEFAULT_PROFILE),
+        'keep_original': config.get('postprocess_keep_original', False),
+    }
+    return stages, options
+
+
+def downloaded_files(info):
+    """Итоговые файлы загрузки по словарю информации yt-dlp"""
+    paths = [download.get('filepath') for download in info.get('requested_downloads') or []]
+    paths = [path for path in paths if path] or [info.get('filepath') or info.get('_filename')]
+    return [Path(path) for path in paths if path and os.path.exists(path)]
+
+
+def unique_path(path):
+    """path, а если такой файл уже есть - 'имя (N).ext'"""
+    path = Path(path)
+    candidate = path
+    for index in itertools.count(1):
+        if not candidate.exists():
+            return candidate
+        candidate = path.with_name(f"{path.stem} ({index}){path.suffix}")
+
+
+def companion_files(path, info=None):
+    """
+    Субтитры и обложка загрузки
+
+    Берутся пути из информации yt-dlp (requested_subtitles, thumbnails);
+    если их там нет - только файлы 'имя.ext' и 'имя.<язык>.ext' с
+    расширением из SIDECAR_EXTENSIONS. Недокачанные .part/.ytdl и файлы
+    других загрузок с похожим именем не попадают.
+    """
+    path = Path(path)
+    info = info or {}
+    paths = [subtitle.get('filepath') for subtitle in (info.get('requested_subtitles') or {}).values()
+             if subtitle]
+    paths += [thumbnail.get('filepath') for thumbnail in info.get('thumbnails') or []]
+    files = [Path(item) for item in paths if item]
+    if files:
+        return [item for item in dict.fromkeys(files) if item != path and item.is_file()]
+
+    files = []
+    for extension in SIDECAR_EXTENSIONS:
+        candidate = path.with_name(path.stem + extension)
+        if candidate.is_file():
+            files.append(candidate)
+    try:
+        for other in path.parent.glob(glob.escape(path.stem) + '.*.*'):
+            language, extension = os.path.splitext(other.name[len(path.stem) + 1:])
+            if extension.lower() in SIDECAR_EXTENSIONS and SIDECAR_LANGUAGE.match(language) \
+                    and other.is_file():
+                files.append(other)
+    except OSError:
+        pass
+    return sorted(files)
+
+
+class PostJob:
+    """Обработка одной загрузки"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, item, info, stages, options=None):
+        """
+        Args:
+            item: задача загрузки ('url', 'download_path')
+            info: словарь информации yt-dlp
+            stages: этапы из POSTPROCESS_STAGES
+            options: 'format', 'profile', 'keep_original' для конвертации
+        """
+        self.id = next(self._ids)
+        self.item = item
+        self.info = info
+        self.title = info.get('title') or item['url']
+        self.stages = [stage for stage in POSTPROCESS_STAGES if stage in stages]
+        self.options = options or {}
+        self.files = downloaded_files(info)
+        self.original_files = list(self.files)
+        self.status = 'queued'  # 'queued', 'running', 'done', 'error'
+        self.stage = None
+        self.error = None
+        self.started = None
+        self.finished = None
+
+    @property
+    def moved(self):
+        """Пары (старый путь, новый путь) для файлов, которые переместились или сменили имя"""
+        return [(old, new) for old, new in zip(self.original_files, self.files) if old != new]
+
+
+class PostProcessor:
+    """
+    Очередь обработки загруженных файлов с собственным пулом потоков
+
+    Потоки запускаются при появлении задач и завершаются, когда очередь
+    опустеет. Конвертация выполняется через BatchConverter с его
+    контролем зависаний ffmpeg.
+    """
+
+    def __init__(self, workers=DEFAULT_POSTPROCESS_WORKERS, on_update=None, on_notify=None,
+                 stall_timeout=DEFAULT_STALL_TIMEOUT):
+        """
+        Args:
+            workers: потоков обработки
+            on_update: функция (job) при смене этапа или завершении (из потока обработки)
+            on_notify: функция (job) на этапе 'notify'
+            stall_timeout: остановить ffmpeg без продвижения дольше стольких секунд
+        """
+        self.workers = max(1, int(workers or 1))
+        self.on_update = on_update
+        self.on_notify = on_notify
+        self.converter = BatchConverter(self.workers, stall_timeout=stall_timeout)
+        self.completed = 0
+        self.failed = 0
+        self._queue = Queue()
+        self._lock = threading.Lock()
+        self._active_workers = 0
+        self._stopped = False
+
+    def submit(self, item, info, stages, options=None):
+        """
+        Поставить загрузку в очередь обработки (не блокирует поток загрузки)
+
+        Returns:
+            PostJob или None, если этапов или файлов нет
+        """
+        job = PostJob(item, info, stages, options)
+        if not job.stages or not job.files:
+            return None
+        with self._lock:
+            self._queue.put(job)
+            self._stopped = False
+            start = self._active_workers < self.workers
+            if start:
+                self._active_workers += 1
+        if start:
+            threading.Thread(target=self._worker, name="postprocess-worker", daemon=True).start()
+        return job
+
+    def wait(self):
+        """Дождаться обработки всех поставленных задач"""
+        self._queue.join()
+
+    def stop(self):
+        """Отбросить ожидающие задачи и остановить текущую конвертацию"""
+        with self._lock:
+            self._stopped = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except Empty:
+                break
+            self._queue.task_done()
+        self.converter.cancel_all()
+
+    def _notify(self, job):
+        if self.on_update:
+            try:
+                self.on_update(job)
+            except Exception:
+                pass
+
+    def _worker(self):
+        """Цикл потока обработки"""
+        while True:
+            # Под блокировкой: submit не увидит поток, который уже решил завершиться
+            with self._lock:
+                try:
+                    job = self._queue.get_nowait()
+                except Empty:
+                    self._active_workers -= 1
+                    return
+            try:
+                self._process(job)
+            finally:
+                self._queue.task_done()
+
+    def _process(self, job):
+        """Выполнить этапы задачи по порядку; ошибка этапа прерывает остальные"""
+        job.status, job.started = 'running', time.time()
+        for stage in job.stages:
+            with self._lock:
+                if self._stopped:
+                    job.status, job.error = 'error', "Обработка остановлена"
+                    break
+            job.stage = stage
+            self._notify(job)
+            try:
+                getattr(self, f'_stage_{stage}')(job)
+            except Exception as e:
+                job.status, job.error = 'error', f"{STAGE_LABELS[stage]}: {e}"
+                break
+        else:
+            job.status = 'done'
+        job.finished = time.time()
+        with self._lock:
+            if job.status == 'done':
+                self.completed += 1
+            else:
+                self.failed += 1
+        self._notify(job)
+
+    def _stage_convert(self, job):
+        """Конвертировать файлы в выбранный формат (файлы уже в нём пропускаются)"""
+        output_format = job.options.get('format', 'mp4').lower()
+        profile = job.options.get('profile', DEFAULT_PROFILE)
+        if profile not in ENCODER_PROFILES:
+            profile = DEFAULT_PROFILE
+        # Потоков ffmpeg - по профилю, но не больше доли ядер на поток обработки
+        # (BatchConverter создан с тем же числом процессов)
+        for index, path in enumerate(job.files):
+            if path.suffix.lower() == f'.{output_format}':
+                continue
+            convert_job = self.converter.run(ConvertJob(path, output_format, profile=profile))
+            if convert_job.status != 'done':
+                raise RuntimeError(convert_job.error or "отменено")
+            target = unique_path(path.with_suffix(f'.{output_format}'))
+            convert_job.output_path.replace(target)
+            if not job.options.get('keep_original'):
+                path.unlink()
+            job.files[index] = target
+
+    def _stage_organize(self, job):
+        """Переместить файлы (и субтитры рядом с ними) в папку сайта"""
+        base = Path(job.item.get('download_path') or job.files[0].parent)
+        folder = base / SITE_FOLDERS.get(get_site(job.item['url']), SITE_FOLDERS['other'])
+        folder.mkdir(parents=True, exist_ok=True)
+        for index, path in enumerate(job.files):
+            if path.parent == folder:
+                continue
+            for companion in companion_files(path, job.info):
+                shutil.move(str(companion), str(unique_path(folder / companion.name)))
+            target = unique_path(folder / path.name)
+            shutil.move(str(path), str(target))
+            job.files[index] = target
+
+    def _stage_metadata(self, job):
+        """Записать название, автора, дату и ссылку в теги файла (ffmpeg, без перекодирования)"""
+        tags = []
+        for tag, field in METADATA_FIELDS:
+            if job.info.get(field):
+                tags += ['-metadata', f"{tag}={job.info[field]}"]
+        upload_date = job.info.get('upload_date') or ''
+        if len(upload_date) == 8:
+            tags += ['-metadata', f"date={upload_date[:4]}-{upload_date[4:6]}-{upload_date[6:]}"]
+        if not tags:
+            return
+        for path in job.files:
+            temp = path.with_name(f"{path.stem}.meta{path.suffix}")
+            result = subprocess.run(['ffmpeg', '-nostdin', '-hide_banner', '-v', 'error', '-y',
+                                     '-i', str(path), '-map', '0', '-c', 'copy'] + tags + [str(temp)],
+                                    capture_output=True, text=True, errors='replace',
+                                    creationflags=CREATE_NO_WINDOW)
+            if result.returncode != 0:
+                if temp.exists():
+                    temp.unlink()
+                lines = result.stderr.strip().splitlines()
+                raise RuntimeError(lines[-1] if lines else f"ffmpeg завершился с кодом {result.returncode}")
+            temp.replace(path)
+
+    def _stage_notify(self, job):
+        if self.on_notify:
+            self.on_notify(job)
@@ -0,0 +1,891 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль хранения данных (история загрузок и конфигурация) для Video Downloader
+"""
+
+import json
+import sqlite3
+import threading
+import weakref
+from pathlib import Path
+
+from engine import get_site, canonical_url, collection_kind, expand_collection, SYNC_STOP_AFTER_KNOWN, \
+    DEFAULT_HOST_LIMITS, DEFAULT_PROGRESS_RATE, DEFAULT_INFO_CACHE_TTL, \
+    DEFAULT_INFO_CACHE_MB, DEFAULT_RETRY_ATTEMPTS, DEFAULT_RETRY_DELAY, DEFAULT_BREAKER_THRESHOLD, \
+    DEFAULT_BREAKER_COOLDOWN, DEFAULT_FRAGMENTS
+from defaults import DEFAULT_PROFILE, DEFAULT_STALL_TIMEOUT, DEFAULT_POSTPROCESS_WORKERS
+
+
+# История: строк за один запрос
+HISTORY_PAGE_SIZE = 200
+
+# Экспорт: строк за одну выборку из курсора
+EXPORT_CHUNK_SIZE = 5000
+EXPORT_COLUMNS = ['id', 'url', 'title', 'quality', 'filename', 'size', 'download_date', 'status']
+
+# Очередь: сколько дней хранить завершённые и неудачные элементы
+QUEUE_KEEP_DAYS = 30
+
+# Поиск повторов: ключей в одном запросе IN (...)
+LOOKUP_CHUNK_SIZE = 500
+
+
+def create_history_fts(conn):
+    """Миграция: полнотекстовый индекс FTS5 по названию и URL"""
+    try:
+        conn.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS downloads_fts
+            USING fts5(title, url, content='downloads', content_rowid='id')
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite собран без FTS5 - поиск будет работать через LIKE
+        return
+    
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS downloads_fts_insert AFTER INSERT ON downloads BEGIN
+            INSERT INTO downloads_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS downloads_fts_delete AFTER DELETE ON downloads BEGIN
+            INSERT INTO downloads_fts (downloads_fts, rowid, title, url)
+            VALUES ('delete', old.id, old.title, old.url);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS downloads_fts_update AFTER UPDATE ON downloads BEGIN
+            INSERT INTO downloads_fts (downloads_fts, rowid, title, url)
+            VALUES ('delete', old.id, old.title, old.url);
+            INSERT INTO downloads_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+        END
+    ''')
+    conn.execute("INSERT INTO downloads_fts (downloads_fts) VALUES ('rebuild')")
+
+
+def add_canonical_urls(conn):
+    """Миграция: канонические ключи URL в истории и очереди для поиска повторов"""
+    # Триггер FTS должен срабатывать только на изменение названия и URL,
+    # иначе заполнение нового столбца перестроит весь полнотекстовый индекс
+    has_trigger = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'downloads_fts_update'"
+    ).fetchone()
+    if has_trigger:
+        conn.execute('DROP TRIGGER downloads_fts_update')
+        conn.execute('''
+            CREATE TRIGGER downloads_fts_update AFTER UPDATE OF title, url ON downloads BEGIN
+                INSERT INTO downloads_fts (downloads_fts, rowid, title, url)
+                VALUES ('delete', old.id, old.title, old.url);
+                INSERT INTO downloads_fts (rowid, title, url) VALUES (new.id, new.title, new.url);
+            END
+        ''')
+    
+    for table in ('downloads', 'queue'):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN canonical TEXT')
+        conn.execute(f'UPDATE {table} SET canonical = canonical_of(url)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_downloads_canonical ON downloads(canonical)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_queue_canonical ON queue(canonical, state)')
+
+
+def lookup_keys(conn, sql, keys):
+    """
+    Какие из ключей встречаются в выборке
+    
+    Args:
+        sql: запрос с '{marks}' на месте списка параметров IN (...)
+    """
+    keys = list(dict.fromkeys(keys))
+    found = set()
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        marks = ', '.join('?' * len(chunk))
+        found.update(row[0] for row in conn.execute(sql.format(marks=marks), chunk))
+    return found
+
+
+class _ThreadConnection:
+    """
+    Соединение SQLite одного потока
+
+    Хранится только в threading.local: когда поток завершается, объект
+    удаляется и соединение закрывается сразу, не дожидаясь сборщика мусора
+    (у самого sqlite3.Connection есть циклические ссылки через кэш запросов).
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        weakref.finalize(self, conn.close)
+
+
+class DownloadHistory:
+    """Класс для работы с историей загрузок"""
+    
+    # Миграции схемы: элемент N переводит базу с версии N на N+1
+    # (номер версии хранится в PRAGMA user_version)
+    MIGRATIONS = [
+        # 1: индексы для сортировки по дате и поиска по URL и качеству
+        [
+            'CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads(download_date)',
+            'CREATE INDEX IF NOT EXISTS idx_downloads_url ON downloads(url)',
+            'CREATE INDEX IF NOT EXISTS idx_downloads_quality ON downloads(quality)',
+        ],
+        # 2: сводная таблица статистики по дням, качеству и сайтам
+        [
+            '''
+                CREATE TABLE IF NOT EXISTS download_stats (
+                    day TEXT NOT NULL,
+                    quality TEXT NOT NULL,
+                    site TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    bytes INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (day, quality, site)
+                )
+            ''',
+            '''
+                INSERT OR REPLACE INTO download_stats (day, quality, site, count, bytes)
+                SELECT date(download_date), COALESCE(quality, 'unknown'), site_of(url),
+                       COUNT(*), COALESCE(SUM(size), 0)
+                FROM downloads
+                GROUP BY 1, 2, 3
+            ''',
+        ],
+        # 3: индексы для сортировки таблицы и полнотекстовый поиск
+        [
+            'CREATE INDEX IF NOT EXISTS idx_downloads_title ON downloads(title)',
+            'CREATE INDEX IF NOT EXISTS idx_downloads_size ON downloads(size)',
+            create_history_fts,
+        ],
+        # 4: постоянная очередь загрузок (переживает перезапуск и сбой)
+        [
+            '''
+                CREATE TABLE IF NOT EXISTS queue (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    item TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_queue_state ON queue(state, id)',
+        ],
+        # 5: состояние частичной загрузки для возобновления
+        [
+            'ALTER TABLE queue ADD COLUMN partial TEXT',
+        ],
+        # 6: класс последней ошибки (для списка неудачных загрузок)
+        [
+            'ALTER TABLE queue ADD COLUMN error_kind TEXT',
+        ],
+        # 7: канонические URL для пропуска повторов и уже скачанных видео
+        [
+            add_canonical_urls,
+        ],
+        # 8: источники (плейлисты и каналы) и уже виденные в них видео
+        [
+            '''
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    canonical TEXT NOT NULL UNIQUE,
+                    title TEXT,
+                    item TEXT NOT NULL,
+                    added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_sync TIMESTAMP,
+                    last_new INTEGER NOT NULL DEFAULT 0
+                )
+            ''',
+            '''
+                CREATE TABLE IF NOT EXISTS source_entries (
+                    source_id INTEGER NOT NULL,
+                    canonical TEXT NOT NULL,
+                    seen_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (source_id, canonical)
+                ) WITHOUT ROWID
+            ''',
+        ],
+        # 9: поиск записи по файлу (обработка после загрузки перемещает файлы)
+        [
+            'CREATE INDEX IF NOT EXISTS idx_downloads_filename ON downloads(filename)',
+        ],
+    ]
+    
+    # Столбцы таблицы истории, по которым разрешена сортировка
+    SORT_COLUMNS = {
+        'date': 'download_date',
+        'title': 'title',
+        'quality': 'quality',
+        'size': 'size',
+    }
+    
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path) if db_path else Path.home() / ".videodownloader" / "history.db"
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()  # Своё соединение у каждого потока
+        # Слабые ссылки: соединение завершившегося потока закрывается вместе с ним
+        self._connections = weakref.WeakSet()  # _ThreadConnection
+        self._connections_lock = threading.Lock()
+        self.init_database()
+    
+    def connect(self):
+        """Долгоживущее соединение текущего потока"""
+        holder = getattr(self._local, 'holder', None)
+        if holder is not None:
+            return holder.conn
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.create_function('site_of', 1, lambda url: get_site(url or ''), deterministic=True)
+        conn.create_function('canonical_of', 1, lambda url: canonical_url(url or ''), deterministic=True)
+        holder = _ThreadConnection(conn)
+        self._local.holder = holder
+        with self._connections_lock:
+            self._connections.add(holder)
+        return conn
+    
+    def close(self):
+        """Закрыть все соединения"""
+        with self._connections_lock:
+            for holder in list(self._connections):
+                try:
+                    holder.conn.execute('PRAGMA optimize')
+                    holder.conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+        self._local = threading.local()
+    
+    def init_database(self):
+        """Инициализация базы данных"""
+        conn = self.connect()
+        with conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS downloads (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    url TEXT NOT NULL,
+                    title TEXT,
+                    quality TEXT,
+                    filename TEXT,
+                    size INTEGER,
+                    download_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    status TEXT DEFAULT 'completed'
+                )
+            ''')
+        self.migrate()
+    
+    def migrate(self):
+        """Применить недостающие миграции схемы"""
+        conn = self.connect()
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        
+        for number in range(version, len(self.MIGRATIONS)):
+            with conn:
+                conn.execute('BEGIN')
+                for statement in self.MIGRATIONS[number]:
+                    if callable(statement):
+                        statement(conn)
+                    else:
+                        conn.execute(statement)
+                conn.execute(f'PRAGMA user_version = {number + 1}')
+    
+    def add_download(self, url, title, quality, filename, size=0):
+        """Добавить запись о загрузке (и обновить сводную статистику)"""
+        conn = self.connect()
+        with conn:
+            conn.execute(
+                'INSERT INTO downloads (url, title, quality, filename, size, canonical) VALUES (?, ?, ?, ?, ?, ?)',
+                (url, title, quality, filename, size, canonical_url(url))
+            )
+            conn.execute(
+                '''INSERT INTO download_stats (day, quality, site, count, bytes)
+                   VALUES (date('now'), ?, ?, 1, ?)
+                   ON CONFLICT (day, quality, site)
+                   DO UPDATE SET count = count + 1, bytes = bytes + excluded.bytes''',
+                (quality or 'unknown', get_site(url), size or 0)
+            )
+    
+    def update_filename(self, old, new):
+        """Файл загрузки перемещён или переименован после обработки"""
+        conn = self.connect()
+        with conn:
+            conn.execute('UPDATE downloads SET filename = ? WHERE filename = ?', (str(new), str(old)))
+    
+    def is_downloaded(self, url):
+        """Скачивалось ли это видео (по каноническому URL)"""
+        return bool(self.downloaded_keys([canonical_url(url)]))
+    
+    def downloaded_keys(self, keys):
+        """Какие из канонических ключей уже есть в истории (поиск по индексу)"""
+        return lookup_keys(self.connect(),
+                           "SELECT DISTINCT canonical FROM downloads WHERE canonical IN ({marks}) "
+                           "AND status = 'completed'",
+                           keys)
+    
+    def get_history(self, limit=100):
+        """Получить историю загрузок"""
+        cursor = self.connect().execute(
+            'SELECT * FROM downloads ORDER BY download_date DESC LIMIT ?',
+            (limit,)
+        )
+        return cursor.fetchall()
+    
+    def add_from_info(self, item, info, downloaded_bytes=0):
+        """
+        Добавить запись по задаче загрузки и словарю информации yt-dlp
+        
+        Args:
+            downloaded_bytes: размер по данным прогресса, если yt-dlp не сообщил filesize
+        
+        Returns:
+            название видео
+        """
+        title = info.get('title', 'Unknown')
+        # Итоговый файл (после слияния дорожек), иначе - имя по шаблону
+        filename = next((download['filepath'] for download in info.get('requested_downloads') or []
+                         if download.get('filepath')), None) or info.get('_filename', '')
+        self.add_download(item['url'], title, item.get('quality'), filename,
+                          info.get('filesize') or downloaded_bytes)
+        return title
+    
+    @property
+    def has_fts(self):
+        """Доступен ли полнотекстовый индекс"""
+        return self.connect().execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'downloads_fts'"
+        ).fetchone() is not None
+    
+    @staticmethod
+    def fts_query(text):
+        """Превратить ввод пользователя в запрос FTS5 (все слова, по префиксу)"""
+        words = text.split()
+        return ' '.join('"' + word.replace('"', '""') + '"*' for word in words)
+    
+    def _search_clause(self, search):
+        """Условие WHERE и параметры для поиска по названию и URL"""
+        if not search or not search.strip():
+            return '', []
+        if self.has_fts:
+            return ('WHERE id IN (SELECT rowid FROM downloads_fts WHERE downloads_fts MATCH ?)',
+                    [self.fts_query(search)])
+        pattern = f"%{search.strip()}%"
+        return 'WHERE title LIKE ? OR url LIKE ?', [pattern, pattern]
+    
+    def get_page(self, offset=0, limit=HISTORY_PAGE_SIZE, sort='date', descending=True, search=None,
+                 after=None):
+        """
+        Получить окно записей истории
+        
+        Args:
+            offset: сколько записей пропустить (если after не задан)
+            limit: размер окна
+            sort: столбец сортировки ('date', 'title', 'quality', 'size')
+            descending: по убыванию
+            search: строка поиска по названию и URL
+            after: последняя строка предыдущего окна - следующее окно начинается
+                   сразу за ней, даже если с тех пор добавились новые записи
+        
+        Returns:
+            строки со столбцами EXPORT_COLUMNS (не зависят от порядка столбцов таблицы)
+        """
+        column = self.SORT_COLUMNS.get(sort, 'download_date')
+        direction = 'DESC' if descending else 'ASC'
+        where, params = self._search_clause(search)
+        if after is not None:
+            keyset, keyset_params = self._keyset_clause(column, descending, after)
+            where = f"WHERE ({where[len('WHERE '):]}) AND ({keyset})" if where else f"WHERE {keyset}"
+            params = params + keyset_params
+            offset = 0
+        columns = ', '.join(EXPORT_COLUMNS)
+        cursor = self.connect().execute(
+            f'SELECT {columns} FROM downloads {where} '
+            f'ORDER BY {column} {direction}, id {direction} LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+        return cursor.fetchall()
+    
+    @staticmethod
+    def _keyset_clause(column, descending, row):
+        """
+        Условие 'строки после row' для порядка ORDER BY column, id (NULL в SQLite - наименьшие)
+        
+        row - строка get_page: столбцы в порядке EXPORT_COLUMNS
+        """
+        value, row_id = row[EXPORT_COLUMNS.index(column)], row[EXPORT_COLUMNS.index('id')]
+        less = '<' if descending else '>'
+        if value is None:
+            if descending:
+                return f'{column} IS NULL AND id < ?', [row_id]
+            return f'{column} IS NOT NULL OR id > ?', [row_id]
+        clause = f'{column} {less} ? OR ({column} = ? AND id {less} ?)'
+        if descending:
+            clause += f' OR {column} IS NULL'
+        return clause, [value, value, row_id]
+    
+    def count(self, search=None):
+        """Количество записей истории (с учётом поиска)"""
+        where, params = self._search_clause(search)
+        return self.connect().execute(f'SELECT COUNT(*) FROM downloads {where}', params).fetchone()[0]
+    
+    @staticmethod
+    def _filter_clause(date_from=None, date_to=None, status=None):
+        """Условие WHERE для фильтров по дате (ГГГГ-ММ-ДД, включительно) и статусу"""
+        conditions, params = [], []
+        if date_from:
+            conditions.append('download_date >= ?')
+            params.append(date_from)
+        if date_to:
+            conditions.append("download_date < date(?, '+1 day')")
+            params.append(date_to)
+        if status:
+            conditions.append('status = ?')
+            params.append(status)
+        return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+    
+    def get_statuses(self):
+        """Список встречающихся статусов загрузок"""
+        return [row[0] for row in self.connect().execute(
+            'SELECT DISTINCT status FROM downloads WHERE status IS NOT NULL ORDER BY 1')]
+    
+    def iter_rows(self, date_from=None, date_to=None, status=None, chunk_size=EXPORT_CHUNK_SIZE):
+        """Потоковый обход записей порциями (без загрузки всей таблицы в память)"""
+        where, params = self._filter_clause(date_from, date_to, status)
+        columns = ', '.join(EXPORT_COLUMNS)
+        cursor = self.connect().execute(f'SELECT {columns} FROM downloads {where} ORDER BY id', params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+    
+    def export(self, path, fmt='csv', date_from=None, date_to=None, status=None, progress=None):
+        """
+        Потоковый экспорт истории в CSV или JSON Lines
+        
+        Args:
+            path: файл назначения
+            fmt: 'csv' или 'jsonl'
+            date_from, date_to: диапазон дат ГГГГ-ММ-ДД (включительно)
+            status: только записи с этим статусом
+            progress: функция (записано, всего), вызывается после каждой порции
+        
+        Returns:
+            количество записанных строк
+        """
+        where, params = self._filter_clause(date_from, date_to, status)
+        total = self.connect().execute(f'SELECT COUNT(*) FROM downloads {where}', params).fetchone()[0]
+        written = 0
+        
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            if fmt == 'jsonl':
+                def write_rows(rows):
+                    for row in rows:
+                        f.write(json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + '\n')
+            else:
+                import csv
+                writer = csv.writer(f)
+                writer.writerow(['ID', 'URL', 'Title', 'Quality', 'Filename', 'Size', 'Date', 'Status'])
+                write_rows = writer.writerows
+            
+            for rows in self.iter_rows(date_from, date_to, status):
+                write_rows(rows)
+                written += len(rows)
+                if progress:
+                    progress(written, total)
+        
+        return written
+    
+    def get_statistics(self, months=12):
+        """
+        Статистика по сводной таблице (не зависит от размера истории)
+        
+        Returns:
+            словарь: 'total_count', 'total_bytes' и списки (ключ, количество, байт)
+            'by_quality', 'by_site', 'by_month' (последние months месяцев)
+        """
+        conn = self.connect()
+        total_count, total_bytes = conn.execute(
+            'SELECT COALESCE(SUM(count), 0), COALESCE(SUM(bytes), 0) FROM download_stats'
+        ).fetchone()
+        
+        def breakdown(key, order='2 DESC', limit=-1):
+            return conn.execute(
+                f'SELECT {key}, SUM(count), SUM(bytes) FROM download_stats '
+                f'GROUP BY 1 ORDER BY {order} LIMIT ?',
+                (limit,)
+            ).fetchall()
+        
+        return {
+            'total_count': total_count,
+            'total_bytes': total_bytes,
+            'by_quality': breakdown('quality'),
+            'by_site': breakdown('site'),
+            'by_month': breakdown('substr(day, 1, 7)', '1 DESC', months),
+        }
+    
+    def clear_history(self):
+        """Очистить историю"""
+        conn = self.connect()
+        with conn:
+            conn.execute('DELETE FROM downloads')
+            conn.execute('DELETE FROM download_stats')
+
+
+class PersistentQueue:
+    """
+    Очередь загрузок в SQLite (таблица queue в history.db)
+    
+    Элемент проходит состояния pending -> active -> done/failed. Задачи
+    хранятся как JSON; id записи кладётся в задачу под ключом 'queue_id'.
+    Служит также журналом частичных загрузок для engine.download_item.
+    """
+    
+    def __init__(self, history):
+        """
+        Args:
+            history: DownloadHistory, чьи соединения и схема используются
+        """
+        self.history = history
+    
+    @staticmethod
+    def _payload(item):
+        return json.dumps({key: value for key, value in item.items() if key != 'queue_id'},
+                          ensure_ascii=False)
+    
+    def add(self, item):
+        """Добавить задачу в очередь; возвращает её id"""
+        return self.add_many([item])[0]
+    
+    def add_many(self, items):
+        """Добавить задачи одной транзакцией; возвращает список id"""
+        conn = self.history.connect()
+        ids = []
+        with conn:
+            for item in items:
+                cursor = conn.execute('INSERT INTO queue (url, item, canonical) VALUES (?, ?, ?)',
+                                      (item['url'], self._payload(item), canonical_url(item['url'])))
+                item['queue_id'] = cursor.lastrowid
+                ids.append(cursor.lastrowid)
+        return ids
+    
+    def queued_keys(self, keys):
+        """Какие из канонических ключей уже ждут загрузки или загружаются"""
+        return lookup_keys(self.history.connect(),
+                           "SELECT DISTINCT canonical FROM queue WHERE canonical IN ({marks}) "
+                           "AND state IN ('pending', 'active')",
+                           keys)
+    
+    def add_new(self, items, skip_downloaded=True):
+        """
+        Добавить задачи, пропуская повторы
+        
+        Повтором считается видео с тем же каноническим URL, что уже в очереди,
+        раньше в этом же списке или (при skip_downloaded) в истории загрузок.
+        
+        Returns:
+            (добавленные, повторы в очереди, уже скачанные)
+        """
+        keys = [canonical_url(item['url']) for item in items]
+        queued = self.queued_keys(keys)
+        downloaded = self.history.downloaded_keys(keys) if skip_downloaded else set()
+        
+        added, duplicates, done = [], [], []
+        for item, key in zip(items, keys):
+            if key in downloaded:
+                done.append(item)
+            elif key in queued:
+                duplicates.append(item)
+            else:
+                queued.add(key)
+                added.append(item)
+        
+        self.add_many(added)
+        return added, duplicates, done
+    
+    def _update(self, item, sql, params=()):
+        """Обновить запись задачи (задачи не из очереди пропускаются)"""
+        queue_id = item.get('queue_id')
+        if queue_id is None:
+            return
+        conn = self.history.connect()
+        with conn:
+            conn.execute(f'UPDATE queue SET {sql} WHERE id = ?', (*params, queue_id))
+    
+    def mark_active(self, item):
+        """Загрузка задачи началась"""
+        self._update(item, "state = 'active', attempts = attempts + 1, "
+                           "started_at = CURRENT_TIMESTAMP, error = NULL")
+    
+    def mark_done(self, item):
+        """Задача загружена"""
+        self._update(item, "state = 'done', finished_at = CURRENT_TIMESTAMP, partial = NULL")
+    
+    def save_partial(self, item, state):
+        """Запомнить выбранный формат и временные файлы начатой загрузки"""
+        self._update(item, 'partial = ?', (json.dumps(state, ensure_ascii=False),))
+    
+    def mark_failed(self, item, error, kind=None):
+        """Загрузка задачи завершилась ошибкой (kind - класс из engine.classify_error)"""
+        self._update(item, "state = 'failed', finished_at = CURRENT_TIMESTAMP, error = ?, error_kind = ?",
+                     (str(error), kind))
+    
+    def mark_retry(self, item, error, kind=None):
+        """Попытка не удалась, задача будет повторена позже"""
+        self._update(item, "state = 'pending', error = ?, error_kind = ?", (str(error), kind))
+    
+    def failed_items(self, limit=1000):
+        """Неудачные задачи, новые первыми: (id, url, класс ошибки, попыток, ошибка)"""
+        return self.history.connect().execute(
+            "SELECT id, url, error_kind, attempts, error FROM queue WHERE state = 'failed' "
+            "ORDER BY finished_at DESC, id DESC LIMIT ?",
+            (limit,)
+        ).fetchall()
+    
+    def requeue(self, ids):
+        """Вернуть неудачные задачи в pending; возвращает их словари"""
+        conn = self.history.connect()
+        items = []
+        with conn:
+            for queue_id in ids:
+                row = conn.execute("SELECT item, partial FROM queue WHERE id = ? AND state = 'failed'",
+                                   (queue_id,)).fetchone()
+                if row is None:
+                    continue
+                conn.execute("UPDATE queue SET state = 'pending', error = NULL, error_kind = NULL "
+                             "WHERE id = ?", (queue_id,))
+                item = json.loads(row[0])
+                item['queue_id'] = queue_id
+                if row[1]:
+                    item['resume_format'] = json.loads(row[1]).get('format')
+                items.append(item)
+        return items
+    
+    def clear_failed(self):
+        """Удалить неудачные задачи из списка"""
+        conn = self.history.connect()
+        with conn:
+            conn.execute("DELETE FROM queue WHERE state = 'failed'")
+    
+    def resume(self):
+        """
+        Подготовить очередь после запуска программы
+        
+        Задачи, прерванные посреди загрузки, возвращаются в pending и
+        получают 'resume_format' - формат, чьи .part-файлы остались на диске;
+        завершённые записи старше QUEUE_KEEP_DAYS удаляются.
+        
+        Returns:
+            список незавершённых задач в порядке добавления
+        """
+        conn = self.history.connect()
+        with conn:
+            conn.execute("UPDATE queue SET state = 'pending' WHERE state = 'active'")
+            conn.execute(
+                "DELETE FROM queue WHERE state IN ('done', 'failed') "
+                "AND finished_at < datetime('now', ?)",
+                (f'-{QUEUE_KEEP_DAYS} days',)
+            )
+        
+        items = []
+        for queue_id, payload, partial in conn.execute(
+                "SELECT id, item, partial FROM queue WHERE state = 'pending' ORDER BY id"):
+            item = json.loads(payload)
+            item['queue_id'] = queue_id
+            if partial:
+                item['resume_format'] = json.loads(partial).get('format')
+            items.append(item)
+        return items
+    
+    def clear_pending(self):
+        """Удалить ещё не начатые задачи; возвращает их число"""
+        conn = self.history.connect()
+        with conn:
+            return conn.execute("DELETE FROM queue WHERE state = 'pending'").rowcount
+    
+    def counts(self):
+        """Число задач в каждом состоянии"""
+        return dict(self.history.connect().execute(
+            'SELECT state, COUNT(*) FROM queue GROUP BY state'
+        ).fetchall())
+
+
+class SubscriptionStore:
+    """
+    Источники - плейлисты и каналы - и видео, уже виденные в каждом из них
+    
+    Повторная синхронизация источника ставит в очередь только новые видео.
+    """
+    
+    def __init__(self, history):
+        """
+        Args:
+            history: DownloadHistory, чьи соединения используются
+        """
+        self.history = history
+    
+    def find(self, url):
+        """Запись источника (id, url, title, item) или None"""
+        return self.history.connect().execute(
+            'SELECT id, url, title, item FROM sources WHERE canonical = ?', (canonical_url(url),)
+        ).fetchone()
+    
+    def sources(self):
+        """Все источники: (id, url, title, last_sync, last_new, видео)"""
+        return self.history.connect().execute('''
+            SELECT s.id, s.url, s.title, s.last_sync, s.last_new,
+                   (SELECT COUNT(*) FROM source_entries e WHERE e.source_id = s.id)
+            FROM sources s ORDER BY s.title
+        ''').fetchall()
+    
+    def known_keys(self, source_id):
+        """Канонические ключи уже виденных видео источника"""
+        return {row[0] for row in self.history.connect().execute(
+            'SELECT canonical FROM source_entries WHERE source_id = ?', (source_id,))}
+    
+    def remove(self, source_id):
+        """Удалить источник и список его видео"""
+        conn = self.history.connect()
+        with conn:
+            conn.execute('DELETE FROM source_entries WHERE source_id = ?', (source_id,))
+            conn.execute('DELETE FROM sources WHERE id = ?', (source_id,))
+    
+    def mark_seen(self, url, keys):
+        """Запомнить видео (канонические ключи) как виденные в источнике url"""
+        source = self.find(url)
+        if source is None or not keys:
+            return
+        conn = self.history.connect()
+        with conn:
+            conn.executemany('INSERT OR IGNORE INTO source_entries (source_id, canonical) VALUES (?, ?)',
+                             [(source[0], key) for key in keys])
+    
+    def sync(self, url, enqueue, template=None, ydl_pool=None, full=False, mark_seen=True):
+        """
+        Развернуть источник и поставить в очередь видео, которых не было в прошлый раз
+        
+        Видео запоминаются как виденные только после enqueue, поэтому сбой
+        между ними не теряет новые видео. Если enqueue не сохраняет задачи
+        (пакетный режим без очереди на диске), нужен mark_seen=False и
+        вызов mark_seen() после успешной загрузки каждого видео.
+        
+        Args:
+            enqueue: функция (список задач) -> список реально добавленных задач
+            template: задача-образец (качество, папка...); по умолчанию - сохранённая с источником
+            full: не учитывать уже виденные видео
+            mark_seen: сразу запомнить новые видео как виденные
+        
+        Returns:
+            (название, добавленные задачи, видео в источнике просмотрено, из них новых)
+        """
+        source = self.find(url)
+        if template is None:
+            template = json.loads(source[3]) if source else {}
+        known = self.known_keys(source[0]) if source and not full else set()
+        
+        # Каналы отдают новые видео первыми - дальше известных можно не листать
+        stop = SYNC_STOP_AFTER_KNOWN if known and collection_kind(url) == 'channel' else 0
+        title, entries = expand_collection(url, ydl_pool, known, stop)
+        
+        new = [entry for entry in entries if entry['key'] not in known]
+        items = [dict(template, url=entry['url']) for entry in new]
+        added = enqueue(items)
+        
+        conn = self.history.connect()
+        with conn:
+            payload = json.dumps({key: value for key, value in template.items()
+                                  if key not in ('url', 'queue_id')}, ensure_ascii=False)
+            conn.execute('''
+                INSERT INTO sources (url, canonical, title, item, last_sync, last_new)
+                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP, ?)
+                ON CONFLICT (canonical) DO UPDATE SET
+                    title = excluded.title, item = excluded.item,
+                    last_sync = excluded.last_sync, last_new = excluded.last_new
+            ''', (url, canonical_url(url), title, payload, len(added)))
+            source_id = conn.execute('SELECT id FROM sources WHERE canonical = ?',
+                                     (canonical_url(url),)).fetchone()[0]
+            if mark_seen:
+                conn.executemany('INSERT OR IGNORE INTO source_entries (source_id, canonical) VALUES (?, ?)',
+                                 [(source_id, entry['key']) for entry in entries])
+        
+        return title, added, len(entries), len(new)
+
+
+class Config:
+    """Класс для работы с конфигурацией и пресетами"""
+    
+    def __init__(self):
+        self.config_path = Path.home() / ".videodownloader" / "config.json"
+        self.config_path.parent.mkdir(exist_ok=True)
+        self.default_config = {
+            'theme': 'default',
+            'last_download_path': str(Path.home() / "Downloads"),
+            'speed_limit': 0,
+            'download_subtitles': False,
+            'subtitle_language': 'en',
+            'auto_update': True,
+            'auto_organize': False,  # Раскладывать загрузки по папкам сайтов (этап обработки)
+            'postprocess_convert': False,  # Конвертировать загрузки в postprocess_format
+            'postprocess_format': 'mp4',
+            'postprocess_keep_original': False,  # Оставлять исходный файл после конвертации
+            'postprocess_metadata': False,  # Записывать название, автора и ссылку в теги файла
+            'postprocess_notify': False,  # Уведомлять о завершении обработки
+            'postprocess_workers': DEFAULT_POSTPROCESS_WORKERS,  # Потоков обработки загрузок
+            'queue_workers': 4,  # Параллельных загрузок в очереди
+            'host_limits': dict(DEFAULT_HOST_LIMITS),  # Соединений на сайт
+            'progress_rate_hz': DEFAULT_PROGRESS_RATE,  # Событий прогресса в секунду
+            'info_cache_ttl': DEFAULT_INFO_CACHE_TTL,  # Срок жизни кэша информации (сек)
+            'info_cache_mb': DEFAULT_INFO_CACHE_MB,  # Размер кэша информации (MB)
+            'retry_attempts': DEFAULT_RETRY_ATTEMPTS,  # Попыток при временных ошибках
+            'retry_delay': DEFAULT_RETRY_DELAY,  # Задержка перед первым повтором (сек)
+            'breaker_threshold': DEFAULT_BREAKER_THRESHOLD,  # Ошибок подряд до паузы сайта
+            'breaker_cooldown': DEFAULT_BREAKER_COOLDOWN,  # Пауза сайта (сек)
+            'skip_downloaded': True,  # Не ставить в очередь уже скачанные видео
+            'fragments': DEFAULT_FRAGMENTS,  # Фрагментов DASH/HLS параллельно на загрузку
+            'downloader': 'native',  # Загрузчик: native или aria2c
+            'convert_workers': 0,  # Процессов ffmpeg при конвертации (0 - по числу ядер)
+            'convert_stall_timeout': DEFAULT_STALL_TIMEOUT,  # Остановить ffmpeg без продвижения (сек)
+            'convert_profile': DEFAULT_PROFILE,  # Профиль кодирования: 'fast', 'balanced', 'archival'
+            'presets': {
+                '4K Video': {'quality': '2160', 'subtitles': False, 'fragments': 8},
+                'HD Video': {'quality': '1080', 'subtitles': False},
+                'Audio Only': {'quality': 'audio', 'subtitles': False},
+                'With Subtitles': {'quality': 'best', 'subtitles': True}
+            }
+        }
+        self.config = self.load_config()
+    
+    def load_config(self):
+        """Загрузить конфигурацию"""
+        if self.config_path.exists():
+            try:
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                    # Добавляем недостающие ключи
+                    for key, value in self.default_config.items():
+                        if key not in config:
+                            config[key] = value
+                    return config
+            except:
+                return self.default_config.copy()
+        return self.default_config.copy()
+    
+    def save_config(self):
+        """Сохранить конфигурацию"""
+        try:
+            with open(self.config_path, 'w', encoding='utf-8') as f:
+                json.dump(self.config, f, ensure_ascii=False, indent=4)
+        except Exception as e:
+            print(f"Error saving config: {e}")
+    
+    def get(self, key, default=None):
+        """Получить значение"""
+        return self.config.get(key, default)
+    
+    def set(self, key, value):
+        """Установить значение"""
+        self.config[key] = value
+        self.save_config()
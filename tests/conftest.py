@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Общие настройки тестов Video Downloader"""
+
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+# Модули приложения лежат в корне проекта
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Заглушка ffmpeg/ffprobe: пишет аргументы в журнал, ffprobe отдаёт H.264/AAC,
+# ffmpeg создаёт выходной файл и выводит -progress (источник с 'bad' в имени - ошибка,
+# с 'stall' - зависание: progress=continue без продвижения out_time)
+FAKE_FFMPEG = '''#!{python}
+import json, os, sys, time
+args = sys.argv[1:]
+with open(os.environ['FAKE_FFMPEG_LOG'], 'a') as log:
+    log.write(json.dumps([os.path.basename(sys.argv[0])] + args) + '\\n')
+if os.path.basename(sys.argv[0]) == 'ffprobe':
+    print(json.dumps({{'format': {{'duration': '2.0'}}, 'streams': [
+        {{'index': 0, 'codec_type': 'video', 'codec_name': 'h264', 'height': 720}},
+        {{'index': 1, 'codec_type': 'audio', 'codec_name': 'aac'}}]}}))
+    sys.exit(0)
+source, output = args[args.index('-i') + 1], args[-1]
+if 'bad' in os.path.basename(source):
+    sys.stderr.write('Invalid data found when processing input\\n')
+    sys.exit(1)
+with open(output, 'w') as f:
+    f.write('converted')
+if 'stall' in os.path.basename(source):
+    for _ in range(300):
+        print('out_time_us=1000000')
+        print('progress=continue', flush=True)
+        time.sleep(0.1)
+for step in (1, 2):
+    print('out_time_us=%d' % (step * 1000000))
+    print('speed=2.0x')
+    print('progress=' + ('end' if step == 2 else 'continue'), flush=True)
+    time.sleep(float(os.environ.get('FAKE_FFMPEG_SLEEP', '0.05')))
+'''
+
+
+@pytest.fixture
+def fake_ffmpeg(tmp_path, monkeypatch):
+    """ffmpeg и ffprobe-заглушки в PATH; возвращает функцию, читающую их вызовы"""
+    if os.name == 'nt':
+        pytest.skip('заглушки ffmpeg - скрипты с shebang')
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    for name in ('ffmpeg', 'ffprobe'):
+        script = bin_dir / name
+        script.write_text(FAKE_FFMPEG.format(python=sys.executable))
+        script.chmod(script.stat().st_mode | stat.S_IXUSR)
+    log = tmp_path / 'ffmpeg.log'
+    monkeypatch.setenv('FAKE_FFMPEG_LOG', str(log))
+    monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def calls(program='ffmpeg'):
+        if not log.exists():
+            return []
+        lines = [json.loads(line) for line in log.read_text().splitlines()]
+        return [line[1:] for line in lines if line[0] == program]
+
+    return calls
@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+"""Тесты пакетной конвертации"""
+
+import threading
+import time
+
+import pytest
+
+from converter import (BENCHMARK_ENCODERS, ENCODER_PROFILES, BatchConverter, ConvertJob, benchmark_profiles,
+                       plan_conversion, plan_workers)
+
+
+def media(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b'x')
+    return path
+
+
+def probe(*streams):
+    """Результат probe_media из описаний (тип, кодек, высота)"""
+    return {'duration': 10.0, 'streams': [
+        {'index': index, 'type': kind, 'codec': codec, 'height': height, 'attached_pic': False}
+        for index, (kind, codec, height) in enumerate(streams)]}
+
+
+def actions(plan):
+    return [(stream['type'], encoder, height) for stream, encoder, height in plan.streams]
+
+
+def run_batch(converter):
+    finished = threading.Event()
+    converter.on_finish = lambda done, failed: finished.set()
+    converter.start()
+    assert finished.wait(30)
+
+
+@pytest.mark.parametrize('workers, cpu_count, threads, expected', [
+    (0, 8, 2, (4, 2)),
+    (0, 8, 4, (2, 4)),
+    (3, 8, 2, (3, 2)),
+    (16, 4, 2, (4, 1)),
+    (0, 1, 2, (1, 1)),
+])
+def test_plan_workers(workers, cpu_count, threads, expected):
+    assert plan_workers(workers, cpu_count, threads) == expected
+
+
+def test_priority_order(fake_ffmpeg, tmp_path):
+    converter = BatchConverter(workers=1)
+    for name, priority in (('low.mkv', 'low'), ('normal.mkv', 'normal'), ('high.mkv', 'high')):
+        converter.add(ConvertJob(media(tmp_path, name), 'mp4', priority=priority))
+    run_batch(converter)
+    sources = [args[args.index('-i') + 1] for args in fake_ffmpeg('ffmpeg')]
+    assert [source.rsplit('/', 1)[-1] for source in sources] == ['high.mkv', 'normal.mkv', 'low.mkv']
+
+
+def test_errors_and_cancel(fake_ffmpeg, tmp_path):
+    converter = BatchConverter(workers=1)
+    good = converter.add(ConvertJob(media(tmp_path, 'good.mkv'), 'mp4'))
+    bad = converter.add(ConvertJob(media(tmp_path, 'bad.mkv'), 'mp4'))
+    cancelled = converter.add(ConvertJob(media(tmp_path, 'later.mkv'), 'mp4', priority='low'))
+    converter.cancel(cancelled)
+    run_batch(converter)
+    assert good.status == 'done' and good.output_path.exists() and good.progress == 100.0
+    assert good.plan.mode == 'copy'
+    assert bad.status == 'error' and 'Invalid data' in bad.error
+    assert cancelled.status == 'cancelled'
+    assert converter.counts() == {'done': 1, 'error': 1, 'cancelled': 1}
+
+
+def test_stall_with_repeated_progress(fake_ffmpeg, tmp_path):
+    # ffmpeg печатает progress=continue, но out_time не растёт - задача должна остановиться
+    converter = BatchConverter(1, stall_timeout=1)
+    started = time.monotonic()
+    job = converter.run(ConvertJob(media(tmp_path, 'stall.mkv'), 'mp4'))
+    assert job.status == 'error' and 'не продвигается' in job.error
+    assert time.monotonic() - started < 10
+
+
+def test_add_while_workers_exit(fake_ffmpeg, tmp_path, monkeypatch):
+    # Задачи добавляются, пока рабочие потоки заканчивают очередь: ни одна не должна зависнуть
+    monkeypatch.setenv('FAKE_FFMPEG_SLEEP', '0')
+    converter = BatchConverter(workers=2)
+    jobs = []
+    for index in range(12):
+        jobs.append(converter.add(ConvertJob(media(tmp_path, f'clip{index}.mkv'), 'mp4')))
+        converter.start()
+        time.sleep(0.02 * (index % 3))
+    deadline = time.time() + 30
+    while time.time() < deadline and any(job.status in ('queued', 'running') for job in jobs):
+        time.sleep(0.05)
+    assert [job.status for job in jobs] == ['done'] * len(jobs)
+
+
+def test_plan_copies_compatible_streams():
+    plan = plan_conversion(probe(('video', 'h264', 1080), ('audio', 'aac', None)), 'mp4')
+    assert plan.mode == 'copy'
+    assert actions(plan) == [('video', None, None), ('audio', None, None)]
+    assert '-threads' not in plan.arguments(4)
+
+
+def test_plan_reencodes_only_audio():
+    plan = plan_conversion(probe(('video', 'vp9', 720), ('audio', 'vorbis', None)), 'mp4')
+    assert plan.mode == 'audio'
+    assert actions(plan) == [('video', None, None), ('audio', 'aac', None)]
+
+
+def test_plan_transcodes_incompatible_video():
+    plan = plan_conversion(probe(('video', 'h264', 720), ('audio', 'aac', None)), 'webm')
+    assert plan.mode == 'transcode'
+    assert actions(plan) == [('video', 'libvpx-vp9', None), ('audio', 'libopus', None)]
+    args = plan.arguments(3)
+    assert args[-2:] == ['-threads', '3'] and '-crf:0' in args
+
+
+def test_plan_scales_down_but_not_up():
+    source = probe(('video', 'h264', 1080), ('audio', 'aac', None))
+    assert actions(plan_conversion(source, 'mp4', '720p'))[0] == ('video', 'libx264', 720)
+    assert plan_conversion(source, 'mp4', '1080p').mode == 'copy'
+    assert plan_conversion(source, 'mp4', '1440p').mode == 'copy'
+
+
+def test_plan_profile_encoder():
+    source = probe(('video', 'mpeg2video', 720))
+    assert actions(plan_conversion(source, 'mp4', profile='archival')) == [('video', 'libx265', None)]
+    assert actions(plan_conversion(source, 'mkv', '480p', 'archival')) == [('video', 'libx265', 480)]
+
+
+def test_plan_subtitles_only_for_mkv():
+    source = probe(('video', 'h264', 720), ('audio', 'aac', None), ('subtitle', 'webvtt', None))
+    assert [kind for kind, _, _ in actions(plan_conversion(source, 'mkv'))] == ['video', 'audio', 'subtitle']
+    assert [kind for kind, _, _ in actions(plan_conversion(source, 'mp4'))] == ['video', 'audio']
+
+
+def test_plan_audio_container():
+    assert actions(plan_conversion(probe(('video', 'h264', 720), ('audio', 'opus', None)), 'mp3')) == \
+        [('audio', 'libmp3lame', None)]
+    assert plan_conversion(probe(('video', 'h264', 720)), 'm4a').streams == []
+
+
+def test_benchmark_covers_every_encoder_and_profile(fake_ffmpeg):
+    results = benchmark_profiles(seconds=1)
+    assert [(result['profile'], result['encoder']) for result in results] == \
+        [(profile, encoder) for profile in ENCODER_PROFILES for encoder in BENCHMARK_ENCODERS]
+    assert all(result['error'] is None and result['fps'] for result in results)
+    outputs = [args[-1].rsplit('/', 1)[-1] for args in fake_ffmpeg('ffmpeg')]
+    assert outputs[:4] == ['fast_libx264.mp4', 'fast_libx265.mp4', 'fast_libvpx-vp9.webm', 'fast_mpeg4.avi']
+
+
+def test_threads_follow_job_profile(fake_ffmpeg, tmp_path, monkeypatch):
+    # Явное число процессов: потоки по профилю задачи, но не больше доли ядер
+    monkeypatch.setattr('converter.os.cpu_count', lambda: 8)
+    converter = BatchConverter(workers=2)
+    for profile in ('fast', 'archival'):
+        converter.add(ConvertJob(media(tmp_path, f'{profile}.mkv'), 'mp4', '480p', profile=profile))
+    converter.set_workers(1)
+    run_batch(converter)
+    threads = {args[args.index('-i') + 1].rsplit('/', 1)[-1]: args[args.index('-threads') + 1]
+               for args in fake_ffmpeg('ffmpeg')}
+    assert threads == {'fast.mkv': '2', 'archival.mkv': '4'}
+
+    converter.set_workers(4)
+    assert converter.threads == 2
+    job = converter.add(ConvertJob(media(tmp_path, 'late.mkv'), 'mp4', '480p', profile='archival'))
+    run_batch(converter)
+    assert fake_ffmpeg('ffmpeg')[-1][-3:-1] == ['-threads', '2'] and job.status == 'done'
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Тесты поиска повторов загрузок"""
+
+import pytest
+
+from engine import canonical_url
+from storage import DownloadHistory, PersistentQueue
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DownloadHistory(tmp_path / 'history.db')
+    yield history
+    history.close()
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'https://youtu.be/dQw4w9WgXcQ?si=abc',
+    'https://youtube.com/shorts/dQw4w9WgXcQ',
+    'https://www.youtube.com/watch?feature=share&v=dQw4w9WgXcQ&pp=xyz',
+    'https://m.youtube.com/watch?v=dQw4w9WgXcQ',
+    'youtube.com/embed/dQw4w9WgXcQ',
+    ' HTTPS://WWW.YOUTUBE.COM/watch?v=dQw4w9WgXcQ',
+])
+def test_canonical_url_same_video(url):
+    assert canonical_url(url) == 'youtube:dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('first, second', [
+    ('https://example.com/v?site=a', 'https://example.com/v?site=b'),
+    ('https://example.com/v?sig=1', 'https://example.com/v?sig=2'),
+    ('https://example.com/v?size=720', 'https://example.com/v?size=1080'),
+    ('https://example.com/v?ppid=1', 'https://example.com/v?ppid=2'),
+    ('https://notyoutube.com/watch?v=dQw4w9WgXcQ', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://example.com/go?u=https://youtu.be/dQw4w9WgXcQ', 'https://youtu.be/dQw4w9WgXcQ'),
+    ('https://www.youtube.com/watch?v=dQw4w9WgXcQ1', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+    ('https://www.youtube.com/watch?x=1#&v=dQw4w9WgXcQ', 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'),
+])
+def test_canonical_url_distinct_videos(first, second):
+    assert canonical_url(first) != canonical_url(second)
+
+
+def test_is_downloaded_distinct_parameters(history):
+    history.add_download('https://example.com/v?site=a', 'A', 'best', 'a.mp4')
+    assert history.is_downloaded('https://example.com/v?site=a&utm_source=mail')
+    assert not history.is_downloaded('https://example.com/v?site=b')
+
+
+def test_queue_add_new_skips_only_duplicates(history):
+    queue = PersistentQueue(history)
+    history.add_download('https://youtu.be/dQw4w9WgXcQ', 'A', 'best', 'a.mp4')
+    added, duplicates, done = queue.add_new([
+        {'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'},
+        {'url': 'https://example.com/v?sig=1'},
+        {'url': 'https://example.com/v?sig=2'},
+        {'url': 'https://example.com/v?sig=1&fbclid=x'},
+    ])
+    assert [item['url'] for item in added] == ['https://example.com/v?sig=1', 'https://example.com/v?sig=2']
+    assert [item['url'] for item in duplicates] == ['https://example.com/v?sig=1&fbclid=x']
+    assert len(done) == 1
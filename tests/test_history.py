@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Тесты истории загрузок: соединения, миграции, постраничная выборка"""
+
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from storage import EXPORT_COLUMNS, DownloadHistory
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DownloadHistory(tmp_path / 'history.db')
+    yield history
+    history.close()
+
+
+def test_short_lived_threads_do_not_keep_connections(history):
+    def work():
+        history.is_downloaded('https://example.com/v')
+
+    for _ in range(200):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+    assert len(history._connections) <= 2
+    if os.path.isdir('/proc/self/fd'):
+        assert len(os.listdir('/proc/self/fd')) < 100
+
+
+def test_close_closes_live_connections(history):
+    history.add_download('https://example.com/v', 'V', 'best', 'v.mp4')
+    history.close()
+    assert len(history._connections) == 0
+    # После close соединение открывается заново
+    assert history.is_downloaded('https://example.com/v')
+
+
+def test_migrations_reach_latest_version(history):
+    conn = history.connect()
+    assert conn.execute('PRAGMA user_version').fetchone()[0] == len(DownloadHistory.MIGRATIONS)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    # Повторное открытие не применяет миграции заново
+    again = DownloadHistory(history.db_path)
+    assert again.connect().execute('PRAGMA user_version').fetchone()[0] == len(DownloadHistory.MIGRATIONS)
+    again.close()
+
+
+def fill(history, count):
+    for index in range(count):
+        # Часть строк без размера и названия - NULL в сортировке
+        history.add_download(f'https://example.com/v{index}', f'Video {index % 7}' if index % 5 else None,
+                             'best', f'v{index}.mp4', (index % 4) * 1000 if index % 3 else None)
+
+
+def pages(history, **kwargs):
+    rows, last = [], None
+    while True:
+        page = history.get_page(limit=7, after=last, **kwargs)
+        if not page:
+            return rows
+        rows += page
+        last = page[-1]
+
+
+@pytest.mark.parametrize('sort', ['date', 'title', 'quality', 'size'])
+@pytest.mark.parametrize('descending', [True, False])
+def test_keyset_pages_match_full_order(history, sort, descending):
+    fill(history, 50)
+    full = history.get_page(limit=1000, sort=sort, descending=descending)
+    assert pages(history, sort=sort, descending=descending) == full
+
+
+def test_keyset_pages_with_search(history):
+    fill(history, 50)
+    full = history.get_page(limit=1000, search='Video', sort='size')
+    assert pages(history, search='Video', sort='size') == full
+
+
+def test_new_download_does_not_repeat_rows(history):
+    fill(history, 20)
+    first = history.get_page(limit=10)
+    history.add_download('https://example.com/new', 'New', 'best', 'new.mp4')
+    second = history.get_page(limit=10, after=first[-1])
+    ids = [row[0] for row in first + second]
+    assert len(ids) == len(set(ids)) == 20
+
+
+def test_keyset_pages_independent_of_table_layout(history):
+    # Таблица пересоздана с другим порядком столбцов и лишним столбцом (как после миграций)
+    fill(history, 30)
+    history.connect().executescript('''
+        ALTER TABLE downloads ADD COLUMN extra TEXT DEFAULT 'x';
+        CREATE TABLE downloads_new AS
+            SELECT extra, status, size, download_date, filename, quality, title, url, canonical, id
+            FROM downloads;
+        DROP TABLE downloads;
+        ALTER TABLE downloads_new RENAME TO downloads;
+    ''')
+    for sort in ('date', 'size', 'title'):
+        full = history.get_page(limit=1000, sort=sort)
+        assert len(full[0]) == len(EXPORT_COLUMNS) and len(full) == 30
+        assert pages(history, sort=sort) == full
+def test_update_filename_uses_index(history):
+    history.add_download('https://example.com/v', 'V', 'best', '/downloads/v.mp4')
+    history.update_filename('/downloads/v.mp4', '/downloads/Other/v.mp4')
+    assert history.get_history()[0][4] == '/downloads/Other/v.mp4'
+    plan = history.connect().execute(
+        'EXPLAIN QUERY PLAN UPDATE downloads SET filename = ? WHERE filename = ?', ('a', 'b')).fetchall()
+    assert any('idx_downloads_filename' in row[-1] for row in plan)
+
+
+def test_storage_does_not_import_ffmpeg_modules():
+    # Настройки и история нужны и без конвертера: storage не тянет converter и postprocess
+    code = "import sys, storage; print(sorted({'converter', 'postprocess'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    assert result.stdout.strip() == '[]', result.stderr
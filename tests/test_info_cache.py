@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Тесты ключей и кэша информации о видео"""
+
+import pytest
+
+from engine import InfoCache, normalize_url
+
+
+@pytest.mark.parametrize('first, second', [
+    ('https://example.com/v?site=a', 'https://example.com/v?site=b'),
+    ('https://example.com/v?sig=1', 'https://example.com/v?sig=2'),
+    ('https://example.com/v?size=720', 'https://example.com/v?size=1080'),
+    ('https://example.com/v?ppid=1', 'https://example.com/v?ppid=2'),
+    ('https://example.com/v?features=a', 'https://example.com/v?features=b'),
+])
+def test_normalize_url_keeps_real_parameters(first, second):
+    assert normalize_url(first) != normalize_url(second)
+
+
+@pytest.mark.parametrize('url', [
+    'https://www.example.com/v/?id=1&utm_source=x&utm_medium=y',
+    'https://example.com/v?fbclid=abc&id=1',
+    'https://example.com/v?id=1&gclid=abc#t=10',
+    'https://example.com/v?si=abc&id=1&feature=share&pp=xyz',
+])
+def test_normalize_url_drops_tracking(url):
+    assert normalize_url(url) == 'https://example.com/v?id=1'
+
+
+def test_info_cache_does_not_mix_parameters(tmp_path):
+    cache = InfoCache(tmp_path / 'info.db')
+    cache.put('https://example.com/v?site=a', {'id': 'a'})
+    cache.put('https://example.com/v?site=b', {'id': 'b'})
+    assert cache.get('https://example.com/v?site=a')['id'] == 'a'
+    assert cache.get('https://example.com/v?site=b')['id'] == 'b'
+    assert cache.get('https://example.com/v?site=a&utm_source=mail')['id'] == 'a'
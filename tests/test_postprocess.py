@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""Тесты обработки загруженных файлов"""
+
+import pytest
+
+from postprocess import PostProcessor, companion_files, unique_path
+
+
+def touch(path):
+    path.write_bytes(b'x')
+    return path
+
+
+@pytest.fixture
+def folder(tmp_path):
+    video = touch(tmp_path / 'Title.mp4')
+    for name in ('Title.en.vtt', 'Title.pt-BR.srt', 'Title.jpg', 'Title.webp',
+                 'Title.f137.mp4.part', 'Title.f140.m4a.ytdl', 'Title.temp.mp4',
+                 'Title.Remastered.mp4', 'Title.Remastered.en.vtt', 'Title 2.en.vtt'):
+        touch(tmp_path / name)
+    return video
+
+
+def test_companion_files_by_name(folder):
+    names = sorted(path.name for path in companion_files(folder))
+    assert names == ['Title.en.vtt', 'Title.jpg', 'Title.pt-BR.srt', 'Title.webp']
+
+
+def test_companion_files_from_info(folder):
+    info = {
+        'requested_subtitles': {'en': {'filepath': str(folder.with_name('Title.en.vtt'))}},
+        'thumbnails': [{'url': 'https://example.com/t.jpg'},
+                       {'url': 'https://example.com/t.webp', 'filepath': str(folder.with_name('Title.webp'))}],
+    }
+    assert sorted(path.name for path in companion_files(folder, info)) == ['Title.en.vtt', 'Title.webp']
+
+
+def test_unique_path(tmp_path):
+    touch(tmp_path / 'Song (Live).mp4')
+    touch(tmp_path / 'Song (Live) (1).mp4')
+    assert unique_path(tmp_path / 'Song (Live).mp4').name == 'Song (Live) (2).mp4'
+    assert unique_path(tmp_path / 'Other.mp4').name == 'Other.mp4'
+
+
+def test_organize_moves_only_own_files(folder):
+    processor = PostProcessor()
+    info = {'title': 'Title', 'requested_downloads': [{'filepath': str(folder)}]}
+    job = processor.submit({'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+                            'download_path': str(folder.parent)}, info, ['organize'])
+    processor.wait()
+    assert job.status == 'done'
+    target = folder.parent / 'YouTube'
+    assert job.files == [target / 'Title.mp4']
+    assert job.moved == [(folder, target / 'Title.mp4')]
+    assert sorted(path.name for path in target.iterdir()) == \
+        ['Title.en.vtt', 'Title.jpg', 'Title.mp4', 'Title.pt-BR.srt', 'Title.webp']
+    assert (folder.parent / 'Title.f137.mp4.part').exists()
+    assert (folder.parent / 'Title.Remastered.en.vtt').exists()
+
+
+def test_convert_stage_threads_per_job(fake_ffmpeg, tmp_path):
+    processor = PostProcessor(workers=2)
+    converter = processor.converter
+    before = (converter.workers, converter.threads)
+    jobs = []
+    for index in range(3):
+        source = touch(tmp_path / f'clip{index}.mkv')
+        jobs.append(processor.submit({'url': f'https://example.com/v{index}'},
+                                     {'requested_downloads': [{'filepath': str(source)}]},
+                                     ['convert'], {'format': 'mp4', 'profile': 'fast'}))
+    processor.wait()
+    assert [job.status for job in jobs] == ['done'] * 3
+    assert [job.files[0].name for job in jobs] == ['clip0.mp4', 'clip1.mp4', 'clip2.mp4']
+    assert not (tmp_path / 'clip0.mkv').exists()  # Исходник удалён (keep_original не задан)
+    assert (converter.workers, converter.threads) == before
+    assert converter.jobs == []  # Выполненные задачи не копятся
+    assert len(fake_ffmpeg('ffmpeg')) == 3
+
+
+@pytest.mark.parametrize('workers, profile, expected', [
+    (1, 'fast', '2'),
+    (1, 'archival', '4'),
+    (4, 'archival', '2'),
+])
+def test_convert_stage_profile_threads(fake_ffmpeg, tmp_path, monkeypatch, workers, profile, expected):
+    # Потоков ffmpeg - по профилю, но не больше доли ядер на поток обработки
+    monkeypatch.setattr('converter.os.cpu_count', lambda: 8)
+    processor = PostProcessor(workers=workers)
+    source = touch(tmp_path / 'clip.mkv')
+    job = processor.submit({'url': 'https://example.com/v'}, {'requested_downloads': [{'filepath': str(source)}]},
+                           ['convert'], {'format': 'webm', 'profile': profile})
+    processor.wait()
+    assert job.status == 'done'
+    args = fake_ffmpeg('ffmpeg')[0]
+    assert args[args.index('-threads') + 1] == expected
@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Тесты очереди загрузок на диске"""
+
+import pytest
+
+from storage import DownloadHistory, PersistentQueue
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DownloadHistory(tmp_path / 'history.db')
+    yield history
+    history.close()
+
+
+def test_resume_after_crash(history):
+    queue = PersistentQueue(history)
+    done, active, pending = ({'url': f'https://example.com/v{index}', 'quality': 'best'} for index in range(3))
+    queue.add_many([done, active, pending])
+    queue.mark_active(done)
+    queue.mark_done(done)
+    queue.mark_active(active)
+    queue.save_partial(active, {'format': '137+140', 'files': ['v1.f137.mp4.part'], 'downloaded_bytes': 10})
+
+    # Программа упала посреди загрузки; при запуске - новое подключение к той же базе
+    history.close()
+    items = PersistentQueue(DownloadHistory(history.db_path)).resume()
+    assert [item['url'] for item in items] == [active['url'], pending['url']]
+    assert items[0]['resume_format'] == '137+140'
+    assert 'resume_format' not in items[1]
+    assert items[0]['queue_id'] == active['queue_id']
+
+
+def test_failed_items_requeue(history):
+    queue = PersistentQueue(history)
+    item = {'url': 'https://example.com/v'}
+    queue.add(item)
+    queue.mark_failed(item, RuntimeError('HTTP Error 404'), 'permanent')
+    failed = queue.failed_items()
+    assert [row[1] for row in failed] == [item['url']]
+
+    requeued = queue.requeue([failed[0][0]])
+    assert [entry['url'] for entry in requeued] == [item['url']]
+    assert queue.failed_items() == []
+    assert [entry['url'] for entry in queue.resume()] == [item['url']]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Тесты повторов загрузки и предохранителей сайтов"""
+
+import pytest
+
+import engine
+from engine import CircuitBreaker, CircuitOpenError, RetryPolicy, download_with_retry
+
+URL = 'https://www.tiktok.com/@user/video/1'
+
+
+def test_breaker_opens_after_threshold(monkeypatch):
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    assert not breaker.record_failure('tiktok', 'network')
+    assert breaker.record_failure('tiktok', 'rate_limit')
+    assert breaker.allow('tiktok') > 0
+    assert set(breaker.open_sites()) == {'tiktok'}
+    assert not breaker.record_failure('youtube', 'geo')  # Ошибка видео, а не сайта
+    assert breaker.allow('youtube') == 0
+
+    # После паузы - одна пробная загрузка, успех снимает блокировку
+    monkeypatch.setattr(engine.time, 'monotonic', lambda: 10 ** 9)
+    assert breaker.allow('tiktok') == 0
+    assert breaker.allow('tiktok') > 0
+    breaker.record_success('tiktok')
+    assert breaker.open_sites() == {} and breaker.allow('tiktok') == 0
+
+
+def test_single_download_respects_open_breaker(monkeypatch):
+    calls = []
+    monkeypatch.setattr(engine, 'download_item', lambda item, *args, **kwargs: calls.append(item) or {})
+    breaker = CircuitBreaker(threshold=1, cooldown=60)
+    breaker.record_failure('tiktok', 'network')
+    with pytest.raises(CircuitOpenError) as error:
+        download_with_retry({'url': URL}, breaker=breaker)
+    assert error.value.error_kind == 'paused' and error.value.site == 'tiktok'
+    assert calls == []
+
+    # Другие сайты не затронуты
+    assert download_with_retry({'url': 'https://example.com/v'}, breaker=breaker) == {}
+
+
+def test_retry_trips_breaker(monkeypatch):
+    def fail(item, *args, **kwargs):
+        raise ConnectionResetError('connection reset')
+
+    monkeypatch.setattr(engine, 'download_item', fail)
+    monkeypatch.setattr(engine.time, 'sleep', lambda seconds: None)
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    item = {'url': URL}
+    with pytest.raises(CircuitOpenError):
+        download_with_retry(item, breaker=breaker, retry_policy=RetryPolicy(max_attempts=5))
+    assert item['attempts'] == 2
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""Тесты общего планировщика полосы и соединений"""
+
+import threading
+from queue import Queue
+
+import engine
+from engine import DEFAULT_FRAGMENTS, BandwidthScheduler, DownloadWorkerPool, download_item
+from storage import Config
+
+URL = 'https://www.youtube.com/watch?v=dQw4w9WgXcQ'
+
+
+def test_fragments_count_against_host_limit():
+    scheduler = BandwidthScheduler(host_limits={'youtube': 4})
+    first = scheduler.try_acquire(URL, connections=3)
+    second = scheduler.try_acquire(URL, connections=3)
+    assert (first.connections, second.connections) == (3, 1)
+    assert scheduler.try_acquire(URL) is None
+
+    scheduler.release(first)
+    third = scheduler.try_acquire(URL, connections=8)
+    assert third.connections == 2  # Лимит 4 на две загрузки
+    assert scheduler.try_acquire(URL).connections == 1
+    assert scheduler.try_acquire(URL) is None
+
+
+def test_fragments_leave_room_for_peers():
+    scheduler = BandwidthScheduler()
+    jobs = [scheduler.try_acquire(URL, connections=DEFAULT_FRAGMENTS, peers=4) for _ in range(4)]
+    assert [job.connections for job in jobs] == [1, 1, 1, 1]
+
+
+def test_single_connection_by_default():
+    scheduler = BandwidthScheduler(host_limits={'tiktok': 2})
+    url = 'https://www.tiktok.com/@user/video/1'
+    jobs = [scheduler.try_acquire(url), scheduler.try_acquire(url)]
+    assert [job.connections for job in jobs] == [1, 1]
+    assert scheduler.try_acquire(url) is None
+
+
+def test_download_uses_granted_fragments(monkeypatch):
+    options = []
+
+    def fake_run(ydl_opts, item, info_cache, ydl_pool):
+        options.append(ydl_opts)
+        return {}
+
+    monkeypatch.setattr(engine, '_run_download', fake_run)
+    scheduler = BandwidthScheduler(host_limits={'youtube': 4})
+    busy = scheduler.try_acquire(URL, connections=2)
+    item = {'url': URL, 'quality': 'best', 'format': 'mp4', 'download_path': '.', 'fragments': 8}
+    download_item(item, scheduler=scheduler)
+    assert options[0]['concurrent_fragment_downloads'] == 2
+
+    scheduler.release(busy)
+    download_item(item, scheduler=scheduler)
+    assert options[1]['concurrent_fragment_downloads'] == 4
+    assert scheduler.try_acquire(URL, connections=4).connections == 4
+
+
+def test_default_batch_downloads_in_parallel(monkeypatch, tmp_path):
+    # Настройки по умолчанию: загрузки с YouTube идут одновременно, а не по одной
+    monkeypatch.setenv('HOME', str(tmp_path))
+    config = Config()
+    workers = config.get('queue_workers')
+    barrier = threading.Barrier(workers, timeout=5)
+    granted = []
+
+    def fake_download(item, progress_hook, scheduler, job, *args):
+        granted.append(job.connections)
+        barrier.wait()
+        return {}
+
+    monkeypatch.setattr(engine, 'download_item', fake_download)
+    download_queue = Queue()
+    for index in range(workers * 3):
+        download_queue.put({'url': f'{URL}{index}', 'fragments': config.get('fragments')})
+    finished = threading.Event()
+    pool = DownloadWorkerPool(download_queue, workers, BandwidthScheduler(0, config.get('host_limits')),
+                              on_finish=lambda completed, failed: finished.set())
+    pool.start()
+    assert finished.wait(10)
+    assert (pool.completed, pool.failed) == (workers * 3, 0)
+    assert sum(granted[:workers]) <= config.get('host_limits')['youtube']
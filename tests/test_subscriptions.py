@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Тесты синхронизации плейлистов и каналов"""
+
+import pytest
+
+import storage
+from storage import DownloadHistory, PersistentQueue, SubscriptionStore
+
+PLAYLIST = 'https://www.youtube.com/playlist?list=PL123'
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = DownloadHistory(tmp_path / 'history.db')
+    yield history
+    history.close()
+
+
+@pytest.fixture
+def playlist(monkeypatch):
+    """Содержимое плейлиста, которое вернёт expand_collection (можно менять в тесте)"""
+    videos = ['aaaaaaaaaaa', 'bbbbbbbbbbb']
+
+    def expand(url, ydl_pool=None, known=None, stop_after_known=0):
+        return 'Playlist', [{'url': f'https://www.youtube.com/watch?v={video}', 'title': video,
+                             'key': f'youtube:{video}'} for video in videos]
+
+    monkeypatch.setattr(storage, 'expand_collection', expand)
+    return videos
+
+
+def urls(items):
+    return [item['url'] for item in items]
+
+
+def test_sync_enqueues_only_new_videos(history, playlist):
+    subscriptions = SubscriptionStore(history)
+    queue = PersistentQueue(history)
+    enqueue = lambda items: queue.add_new(items)[0]
+
+    title, added, scanned, new = subscriptions.sync(PLAYLIST, enqueue, {'quality': '720'})
+    assert (title, scanned, new, len(added)) == ('Playlist', 2, 2, 2)
+    assert added[0]['quality'] == '720' and added[0]['queue_id']
+
+    playlist.append('ccccccccccc')
+    _, added, scanned, new = subscriptions.sync(PLAYLIST, enqueue)
+    assert urls(added) == ['https://www.youtube.com/watch?v=ccccccccccc']
+    assert added[0]['quality'] == '720'  # Образец задачи сохранён с источником
+    assert (scanned, new) == (3, 1)
+
+
+def test_sync_without_mark_seen_keeps_failed_videos_new(history, playlist):
+    subscriptions = SubscriptionStore(history)
+    _, added, _, _ = subscriptions.sync(PLAYLIST, lambda items: items, mark_seen=False)
+    assert len(added) == 2
+
+    # Скачалось только первое видео
+    subscriptions.mark_seen(PLAYLIST, ['youtube:aaaaaaaaaaa'])
+    _, added, _, new = subscriptions.sync(PLAYLIST, lambda items: items, mark_seen=False)
+    assert urls(added) == ['https://www.youtube.com/watch?v=bbbbbbbbbbb']
+    assert new == 1
+
+
+def test_full_sync_ignores_seen(history, playlist):
+    subscriptions = SubscriptionStore(history)
+    subscriptions.sync(PLAYLIST, lambda items: items)
+    _, added, _, _ = subscriptions.sync(PLAYLIST, lambda items: items, full=True)
+    assert len(added) == 2
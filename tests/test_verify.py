@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""Тесты проверки скачанных файлов"""
+
+import hashlib
+
+import pytest
+
+from engine import DownloadMonitor, IntegrityError, verify_file
+
+
+@pytest.fixture
+def media(tmp_path):
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'x' * 1000)
+    return path
+
+
+def test_exact_size(media):
+    assert verify_file(media, {'filesize': 1000}) is None
+    with pytest.raises(IntegrityError):
+        verify_file(media, {'filesize': 2000})
+
+
+def test_content_length(media):
+    assert verify_file(media, {'filesize_approx': 5000}, total_bytes=1000) is None
+    with pytest.raises(IntegrityError):
+        verify_file(media, {'filesize_approx': 1000}, total_bytes=1200)
+
+
+def test_approx_size_only_warns(media):
+    assert verify_file(media, {'filesize_approx': 1200}) is None
+    assert 'video.mp4' in verify_file(media, {'filesize_approx': 5000})
+
+
+def test_checksum(media):
+    assert verify_file(media, {'sha256': hashlib.sha256(b'x' * 1000).hexdigest().upper()}) is None
+    with pytest.raises(IntegrityError):
+        verify_file(media, {'md5': '0' * 32})
+
+
+def test_monitor_keeps_file_with_approx_size(media):
+    monitor = DownloadMonitor({'url': 'https://example.com/v'})
+    monitor.hook({'status': 'finished', 'filename': str(media), 'info_dict': {'filesize_approx': 5000}})
+    assert media.exists() and len(monitor.warnings) == 1
+    monitor.check()
+
+
+def test_monitor_deletes_on_content_length(media):
+    monitor = DownloadMonitor({'url': 'https://example.com/v'})
+    fmt = {'format_id': '18', 'filesize_approx': 1000}
+    monitor.hook({'status': 'downloading', 'filename': str(media), 'tmpfilename': str(media) + '.part',
+                  'downloaded_bytes': 500, 'total_bytes': 1500, 'info_dict': fmt})
+    monitor.hook({'status': 'finished', 'filename': str(media), 'info_dict': fmt})
+    assert not media.exists()
+    with pytest.raises(IntegrityError):
+        monitor.check()
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Модуль миниатюр для Video Downloader
+"""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+# Размер превью по умолчанию
+THUMBNAIL_SIZE = (200, 150)
+
+
+class ThumbnailCache:
+    """
+    Кэш миниатюр: LRU уменьшенных изображений в памяти и их копии на диске
+
+    Загрузка и декодирование выполняются пулом фоновых потоков; вызывающий
+    код получает готовое уменьшенное PIL.Image и сам создаёт PhotoImage
+    в потоке Tk.
+    """
+
+    def __init__(self, cache_dir=None, memory_items=300, disk_items=5000, workers=4):
+        """
+        Args:
+            cache_dir: папка дискового кэша (по умолчанию ~/.videodownloader/thumbnails)
+            memory_items: сколько изображений держать в памяти
+            disk_items: сколько файлов хранить на диске
+            workers: число потоков загрузки
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else Path.home() / ".videodownloader" / "thumbnails"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._pending = {}  # Загрузки в процессе: ключ -> список callback
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnail")
+        self._executor.submit(self._prune_disk)
+
+    @staticmethod
+    def _key(url, size):
+        return hashlib.sha1(f"{url}|{size[0]}x{size[1]}".encode('utf-8')).hexdigest()
+
+    def _remember(self, key, image):
+        """Положить изображение в LRU памяти"""
+        with self._lock:
+            self._memory[key] = image
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get_cached(self, url, size=THUMBNAIL_SIZE):
+        """Изображение из памяти или None (без обращения к диску и сети)"""
+        key = self._key(url, size)
+        with self._lock:
+            image = self._memory.get(key)
+            if image is not None:
+                self._memory.move_to_end(key)
+            return image
+
+    def load(self, url, size=THUMBNAIL_SIZE):
+        """Получить уменьшенное изображение (память -> диск -> сеть); блокирующий вызов"""
+        image = self.get_cached(url, size)
+        if image is not None:
+            return image
+
+        # PIL и urllib.request загружаются в фоновом потоке при первой миниатюре
+        import urllib.request
+        from PIL import Image
+
+        key = self._key(url, size)
+        path = self.cache_dir / f"{key}.jpg"
+        if path.exists():
+            image = Image.open(path)
+            image.load()
+            path.touch()  # Для вытеснения старых файлов по времени изменения
+        else:
+            with urllib.request.urlopen(url, timeout=15) as u:
+                raw_data = u.read()
+            image = Image.open(io.BytesIO(raw_data))
+            # Для JPEG декодируем сразу в уменьшенном масштабе
+            image.draft('RGB', size)
+            image = image.convert('RGB').resize(size, Image.Resampling.LANCZOS)
+            image.save(path, 'JPEG', quality=85)
+
+        self._remember(key, image)
+        return image
+
+    def request(self, url, callback, size=THUMBNAIL_SIZE):
+        """
+        Запросить миниатюру асинхронно
+
+        callback(image) вызывается с PIL.Image или None при ошибке: сразу,
+        если изображение уже в памяти, иначе из фонового потока.
+        """
+        image = self.get_cached(url, size)
+        if image is not None:
+            callback(image)
+            return
+
+        key = self._key(url, size)
+        with self._lock:
+            if key in self._pending:
+                self._pending[key].append(callback)
+                return
+            self._pending[key] = [callback]
+
+        self._executor.submit(self._fetch, url, size, key)
+
+    def prefetch(self, url, size=THUMBNAIL_SIZE):
+        """Загрузить миниатюру в кэш заранее"""
+        self.request(url, lambda image: None, size)
+
+    def _fetch(self, url, size, key):
+        try:
+            image = self.load(url, size)
+        except Exception:
+            image = None
+
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            try:
+                callback(image)
+            except Exception:
+                pass
+
+    def _prune_disk(self):
+        """Удалить самые старые файлы сверх лимита"""
+        try:
+            files = sorted(self.cache_dir.glob('*.jpg'), key=lambda p: p.stat().st_mtime)
+            for path in files[:max(0, len(files) - self.disk_items)]:
+                path.unlink()
+        except OSError:
+            pass
+
+    def shutdown(self):
+        """Остановить фоновые потоки"""
+        self._executor.shutdown(wait=False, cancel_futures=True)